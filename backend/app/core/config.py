@@ -38,6 +38,16 @@ class Settings(BaseSettings):
     ZHIPU_API_KEY: str | None = None
     VOLCANO_API_KEY: str | None = None
 
+    # --------------------------------------------
+    # Embedding Configuration
+    # --------------------------------------------
+    # 本地 ONNX 向量模型（如 BAAI/bge-small-zh-v1.5），为空则只使用 DashScope 云端接口
+    # 配置后只用本地模型（失败不回退云端），report_chunks 中已有向量需用
+    # scripts/reembed_report_chunks.py 重新生成；维度不是 1536 时先执行
+    # supabase/optional/report_chunks_embedding_512.sql 等改维度脚本
+    LOCAL_EMBEDDING_MODEL: str | None = None
+    EMBEDDING_DIM: int = 1536  # 向量维度，需与 report_chunks.embedding 列一致
+
     # --------------------------------------------
     # Tushare Pro Configuration
     # --------------------------------------------
@@ -56,6 +66,7 @@ class Settings(BaseSettings):
     # Redis Configuration (可选)
     # --------------------------------------------
     REDIS_URL: str = "redis://localhost:6379"
+    REDIS_CACHE_ENABLED: bool = True  # 行情大对象（沪深300日线、全市场快照）跨进程共享，连接失败自动降级
 
     # --------------------------------------------
     # API Configuration
@@ -66,15 +77,20 @@ class Settings(BaseSettings):
     API_TIMEOUT_SLOW: int = 30
 
     # 重试配置
-    API_MAX_RETRIES: int = 3
-    API_RETRY_DELAY: int = 2  # 重试延迟（秒）
+    API_MAX_RETRIES: int = 5
+    API_RETRY_DELAY: float = 0.2  # 指数退避基数（秒），第 n 次重试前随机等待 0 ~ min(5, 基数 * 2^n) 秒
 
     # 缓存配置
     CACHE_ENABLED: bool = True
     CACHE_TTL: int = 300  # 缓存5分钟
+    STOCK_META_CACHE_ENABLED: bool = True  # 股票名称/板块/行业持久化到 SQLite（重启后仍有效）
+    STOCK_META_CACHE_TTL_DAYS: int = 30
+    FUNDAMENTALS_CACHE_TTL_DAYS: int = 7  # 财务指标/利润表/现金流量表/分红的持久化缓存（同上 SQLite 库）
+    CACHE_DIR: str = ""  # 持久化缓存目录（SQLite 库所在位置），留空为 ~/.cache/ashare-sentinel
 
     # 数据源配置
     DATA_SOURCE_FALLBACK_TO_AKSHARE: bool = True  # Tushare失败时是否降级到AkShare
+    HTTP_SHARED_SESSION_ENABLED: bool = True  # AkShare/Tushare/DashScope 复用连接池 Session；关闭后三者均保持库自身的 requests 用法
 
     # 日志配置
     LOG_LEVEL: str = "INFO"  # 日志级别: DEBUG, INFO, WARNING, ERROR
@@ -5,6 +5,7 @@ Supabase 数据库连接工具
 """
 
 import os
+from functools import lru_cache
 from supabase import create_client, Client
 from typing import Optional
 
@@ -20,9 +21,10 @@ import sys
 print(f"[DEBUG Supabase] URL={SUPABASE_URL}", file=sys.stderr)
 
 
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
     """
-    获取 Supabase 客户端（用于后端操作）
+    获取 Supabase 客户端（用于后端操作，进程内复用同一实例）
 
     使用方式:
         client = get_supabase_client()
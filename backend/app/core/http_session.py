@@ -0,0 +1,65 @@
+"""
+进程内共享的 HTTP 连接池
+
+AkShare、Tushare 等数据源 SDK 直接调用模块级 requests.get/post，每次都新建 TCP/TLS 连接。
+install_shared_session() 把 requests.request/get/post 替换为走同一个连接池 Session 的版本，
+复用到东方财富/新浪/Tushare 等站点的 keep-alive 连接。
+
+依赖对 requests 模块函数的替换，出现兼容问题时可通过 HTTP_SHARED_SESSION_ENABLED 关闭；
+该开关同时控制 llm_service 为 DashScope SDK 挂载的连接池。
+"""
+
+import functools
+import logging
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def shared_session_enabled() -> bool:
+    """是否启用共享连接池（HTTP_SHARED_SESSION_ENABLED）"""
+    return getattr(settings, 'HTTP_SHARED_SESSION_ENABLED', True)
+
+
+@functools.cache
+def install_shared_session() -> Optional[requests.Session]:
+    """
+    创建共享 Session 并替换 requests 模块级函数（多次调用只安装一次）
+
+    未启用或安装失败时返回 None，requests 保持原样。
+    """
+    if not shared_session_enabled():
+        return None
+    try:
+        session = requests.Session()
+        # 只共享连接池，不共享 Cookie：模块级 requests.get/post 原本是无状态的，
+        # 雪球/东方财富下发的 Cookie 不应带到其他线程、其他站点的请求里（CookieJar 的并发写入也不安全）
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # 重试由各调用方自行控制（_retry_akshare_call / DataFetcher._retry_request）
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=64, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        def _shared_request(method, url, **kwargs):
+            return session.request(method, url, **kwargs)
+
+        def _shared_get(url, params=None, **kwargs):
+            return session.get(url, params=params, **kwargs)
+
+        def _shared_post(url, data=None, json=None, **kwargs):
+            return session.post(url, data=data, json=json, **kwargs)
+
+        requests.request = _shared_request
+        requests.get = _shared_get
+        requests.post = _shared_post
+        logger.info("Routed requests module calls through a shared keep-alive session")
+        return session
+    except Exception as e:
+        logger.warning("Failed to install shared requests session: %s", e)
+        return None
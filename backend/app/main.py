@@ -76,12 +76,18 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # 标准库导入
+import asyncio
+import atexit
+import json
 import logging
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from typing import Literal, Optional
 
 # 第三方库导入
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
@@ -89,13 +95,21 @@ from pydantic import BaseModel
 from app.core.config import settings
 from app.deps import get_current_user, get_current_user_optional
 from app.services.ocr_service import process_pdf
-from app.services.llm_service import generate_chat_response, classify_stock, generate_portfolio_review
+from app.services.llm_service import (
+    generate_chat_response,
+    stream_chat_response,
+    warm_up_local_embedding,
+    classify_stock,
+    generate_portfolio_review
+)
 from app.services.market_service import (
+    aget_batch_technical,
+    aget_market_sentiment,
+    aget_stock_info,
+    aget_stock_technical_analysis,
     get_stock_info,
     get_weekly_performance,
     validate_symbol,
-    get_market_sentiment,
-    get_stock_technical_analysis,
     calculate_financial_metrics
 )
 from app.services.market_service_baostock import get_financials_baostock
@@ -112,10 +126,20 @@ os.makedirs(os.path.dirname(settings.LOG_FILE_PATH), exist_ok=True)
 _file_handler = logging.FileHandler(settings.LOG_FILE_PATH, encoding='utf-8')
 _file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
 
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+
+# 日志经队列异步写出：请求线程只做入队，文件/控制台 I/O 由后台监听线程完成
+_log_queue = queue.SimpleQueue()
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+_queue_listener = QueueListener(_log_queue, _file_handler, _console_handler, respect_handler_level=True)
+_queue_listener.start()
+atexit.register(_queue_listener.stop)
+
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL, "INFO"),
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[_file_handler]
+    handlers=[_queue_handler]
 )
 
 logger = logging.getLogger(__name__)
@@ -123,10 +147,20 @@ logger = logging.getLogger(__name__)
 # ============================================
 # Application Configuration
 # ============================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时预热本地向量模型（未配置 LOCAL_EMBEDDING_MODEL 时跳过）"""
+    if settings.LOCAL_EMBEDDING_MODEL:
+        loaded = await asyncio.to_thread(warm_up_local_embedding)
+        logger.info("Local embedding warm-up %s", "done" if loaded else "skipped")
+    yield
+
+
 app = FastAPI(
     title="Fintech Platform API",
     description="Investment Research & Intelligence Platform",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS 中间件 - 从配置读取
@@ -433,6 +467,44 @@ async def chat_with_report(request: ChatRequest):
     )
 
 
+@app.post("/api/v1/chat/stream")
+async def chat_with_report_stream(request: ChatRequest):
+    """
+    与研报进行对话（流式 SSE 输出）
+
+    Args:
+        request: 包含 report_id、query 和可选参数的请求体
+
+    Returns:
+        StreamingResponse: text/event-stream，每个事件为一段增量回答
+    """
+    logger.info("Chat stream request for report %s: %.50s...", request.report_id, request.query)
+
+    async def event_stream():
+        error = "抱歉，生成回答时出现错误，请稍后重试。"
+        has_output = False
+        try:
+            async for delta in stream_chat_response(
+                report_id=request.report_id,
+                query=request.query,
+                match_threshold=request.match_threshold,
+                match_count=request.match_count,
+            ):
+                has_output = True
+                yield f"data: {json.dumps({'delta': delta}, ensure_ascii=False)}\n\n"
+        except Exception:
+            # 已输出部分内容时改发 error 事件，前端据此标记回答不完整
+            event = 'error' if has_output else 'delta'
+            yield f"data: {json.dumps({event: error}, ensure_ascii=False)}\n\n"
+        else:
+            if not has_output:
+                yield f"data: {json.dumps({'delta': error}, ensure_ascii=False)}\n\n"
+
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 # ============================================
 # Portfolio Management Endpoints
 # ============================================
@@ -450,7 +522,7 @@ async def add_stock(request: AddStockRequest):
     print(f"[INFO] Adding stock to portfolio: {request.symbol}")
 
     # 获取股票信息（如果 AkShare 失败，使用默认值）
-    stock_info = get_stock_info(request.symbol)
+    stock_info = await aget_stock_info(request.symbol)
     if not stock_info:
         print(f"[WARN] Failed to fetch stock info for {request.symbol}, using defaults")
         # 使用默认值，允许用户继续
@@ -725,7 +797,7 @@ async def get_market_sentiment_endpoint():
     print(f"[INFO] Fetching market sentiment")
 
     try:
-        sentiment = get_market_sentiment()
+        sentiment = await aget_market_sentiment()
         if not sentiment:
             from fastapi import HTTPException
             raise HTTPException(status_code=404, detail="Market sentiment data unavailable")
@@ -807,7 +879,7 @@ async def get_stock_technical_analysis_endpoint(symbol: str, update_persistent:
             from fastapi import HTTPException
             raise HTTPException(status_code=400, detail="Invalid stock symbol format")
 
-        technical = get_stock_technical_analysis(symbol)
+        technical = await aget_stock_technical_analysis(symbol)
         if not technical:
             # 返回默认数据而不是404错误
             print(f"[WARN] Technical analysis unavailable for {symbol}, returning default data")
@@ -938,8 +1010,11 @@ async def generate_portfolio_report():
         if not a_share_items:
             raise HTTPException(status_code=404, detail="No A-share stocks found in portfolio")
 
-        # 2. 获取市场情绪
-        sentiment = get_market_sentiment()
+        # 2. 获取市场情绪与全部持仓的技术分析（并发执行，技术分析按批拉取日线）
+        sentiment, technicals = await asyncio.gather(
+            aget_market_sentiment(),
+            aget_batch_technical([item.symbol for item in a_share_items])
+        )
 
         report_lines = []
         report_lines.append("=" * 60)
@@ -974,7 +1049,7 @@ async def generate_portfolio_report():
             sector = item.sector or "其他"
 
             # 获取技术分析
-            technical = get_stock_technical_analysis(symbol)
+            technical = technicals.get(symbol)
             if technical:
                 # 信号对应的中文描述
                 action_signal = technical.get("action_signal", "HOLD")
@@ -1021,7 +1096,7 @@ async def generate_portfolio_report():
         sell_signals = 0
 
         for item in a_share_items:
-            technical = get_stock_technical_analysis(item.symbol)
+            technical = technicals.get(item.symbol)
             if technical:
                 signal = technical.get("action_signal", "")
                 if signal in ["BUY", "STRONG_BUY"]:
@@ -1107,7 +1182,7 @@ async def conduct_ic_meeting(request: ICMeetingRequest):
 
     try:
         # 1. 获取基本股票信息 (包含当前价格)
-        stock_info = get_stock_info(request.symbol, fetch_price=True)
+        stock_info = await aget_stock_info(request.symbol, fetch_price=True)
         stock_name = stock_info.get("name", request.symbol) if stock_info else request.symbol
         industry = stock_info.get("industry_en", "未知行业") if stock_info else "未知行业"
 
@@ -16,9 +16,9 @@ from typing import Dict
 
 from app.core.llm_factory import LLMFactory
 from app.services.market_service import (
-    get_market_snapshot,
-    get_stock_technical_analysis,
-    get_news_titles
+    aget_market_snapshot,
+    aget_news_titles,
+    aget_stock_technical_analysis
 )
 
 
@@ -171,17 +171,17 @@ class CommitteeService:
         }
 
     async def _load_data(self, symbol: str) -> Dict:
-        """加载市场数据"""
-        snapshot = get_market_snapshot(symbol)
+        """加载市场数据（快照、技术面、新闻三者互不依赖，并发获取）"""
+        snapshot, technical, news = await asyncio.gather(
+            aget_market_snapshot(symbol),
+            aget_stock_technical_analysis(symbol),
+            aget_news_titles(symbol, limit=5)  # 新闻标题（舆情数据）
+        )
         if not snapshot:
             return None
 
-        technical = get_stock_technical_analysis(symbol)
         fund = snapshot.get('fundamentals', {})
 
-        # 获取新闻标题（舆情数据）
-        news = get_news_titles(symbol, limit=5)
-
         return {
             "pe_ttm": fund.get('pe_ttm'),
             "pb": fund.get('pb'),
@@ -7,11 +7,12 @@ import time
 import requests
 import os
 import sys
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 import pandas as pd
 
 from app.core.config import settings
+from app.core.http_session import install_shared_session
 
 # =============================================================================
 # 彻底禁用 TQDM 进度条（必须在导入 tushare 之前执行）
@@ -144,15 +145,21 @@ class DataFetcher:
         """配置 Tushare 底层 requests session 的超时和连接池"""
         try:
             # 获取 Tushare 底层的 requests session
-            session = self.pro._DataApi__session
+            # 新版 DataApi 没有 session 属性，直接调用模块级 requests.post，
+            # 由进程内共享的连接池 Session 接管（HTTP_SHARED_SESSION_ENABLED 关闭时保持原样）
+            session = getattr(self.pro, '_DataApi__session', None)
+            if session is None:
+                if install_shared_session() is not None:
+                    print("[TUSHARE] Using shared keep-alive session")
+                return
 
             # 配置超时
             session.timeout = (self.connect_timeout, self.read_timeout)
 
             # 配置连接池
             adapter = requests.adapters.HTTPAdapter(
-                pool_connections=10,
-                pool_maxsize=20,
+                pool_connections=16,
+                pool_maxsize=64,
                 max_retries=0,  # 我们自己控制重试
                 pool_block=False
             )
@@ -444,6 +451,51 @@ class DataFetcher:
 
         return df_mapped
 
+    def get_stock_daily_batch(
+        self,
+        symbols: List[str],
+        start_date: str = None,
+        end_date: str = None
+    ) -> pd.DataFrame:
+        """
+        批量获取多只A股日线数据 (Tushare daily 支持逗号分隔的多个 ts_code)
+
+        Args:
+            symbols: 6位股票代码列表
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+
+        Returns:
+            DataFrame with columns: ts_code, 日期, 开盘, 收盘, 最高, 最低, 成交量；
+            按日期升序，调用方按 ts_code 分组
+        """
+        ts_codes = ','.join(self._add_suffix(symbol) for symbol in symbols)
+        ts_start = self._convert_date_format(start_date) if start_date else '19700101'
+        ts_end = self._convert_date_format(end_date) if end_date else '20500101'
+
+        cache_key = self._get_cache_key('stock_daily_batch', symbols=ts_codes,
+                                        start=ts_start, end=ts_end)
+        cached_data = self._get_from_cache(cache_key)
+        if cached_data is not None:
+            return cached_data
+
+        def fetch_data():
+            return self.pro.daily(
+                ts_code=ts_codes,
+                start_date=ts_start,
+                end_date=ts_end
+            )
+
+        df = self._retry_request(fetch_data)
+
+        if df is None or df.empty:
+            return pd.DataFrame()
+
+        df_mapped = self._map_fields(df, data_type='stock')
+        self._set_cache(cache_key, df_mapped)
+
+        return df_mapped
+
     def get_stock_info(self, symbol: str) -> Dict:
         """
         获取个股基本信息 (对应 AkShare: stock_individual_info_em)
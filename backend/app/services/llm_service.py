@@ -4,19 +4,144 @@ LLM Service - AI-Powered Report Summarization & Chat
 使用阿里云通义千问 (Qwen) 生成研报摘要和对话功能
 """
 
-import json
+import asyncio
+import functools
+import itertools
 import logging
-from typing import Dict, List, Optional
-
-import dashscope
+import math
+import random
+import re
+import time
+import types
+from bisect import bisect_left, bisect_right
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
 from supabase import Client
 
 from app.core.config import settings
-from app.core.db import get_db_client
+from app.core.db import db_client
+from app.core.http_session import shared_session_enabled
 
 logger = logging.getLogger(__name__)
 
 
+# ============================================
+# DashScope HTTP 连接池
+# ============================================
+class _PooledSession(requests.Session):
+    """进程内共享的 Session，忽略 SDK 每次调用后的 close()，保持 keep-alive 连接"""
+
+    def close(self):
+        pass
+
+
+def _build_dashscope_session() -> requests.Session:
+    """创建带连接池的 Session，复用到 dashscope.aliyuncs.com 的 TLS 连接"""
+    session = _PooledSession()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=3)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _install_dashscope_session(session: requests.Session) -> None:
+    """
+    让 dashscope SDK 复用共享 Session
+
+    SDK 在 http_request 模块中每次调用都会 `requests.Session()` 新建会话，
+    这里把该模块引用的 requests 替换为只重写 Session 工厂的代理模块。
+    """
+    try:
+        from dashscope.api_entities import http_request
+    except ImportError:
+        logger.warning("dashscope http_request module not found, HTTP keep-alive disabled")
+        return
+
+    requests_proxy = types.ModuleType("requests")
+    requests_proxy.__dict__.update(requests.__dict__)
+    requests_proxy.Session = lambda: session
+    http_request.requests = requests_proxy
+
+
+@functools.cache
+def _get_dashscope():
+    """延迟导入 dashscope SDK，首次调用时加载并挂载共享连接池（HTTP_SHARED_SESSION_ENABLED 关闭时不挂载）"""
+    import dashscope
+
+    if shared_session_enabled():
+        _install_dashscope_session(_build_dashscope_session())
+    return dashscope
+
+
+# ============================================
+# DashScope 限流/瞬时错误重试
+# ============================================
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+_DASHSCOPE_MAX_ATTEMPTS = 5
+_DASHSCOPE_BACKOFF_BASE = 1.0   # 秒
+_DASHSCOPE_BACKOFF_MAX = 30.0   # 秒
+
+
+def _retry_after_seconds(response) -> Optional[float]:
+    """读取响应中的 Retry-After 头（SDK 未暴露 headers 时返回 None）"""
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return min(float(value), _DASHSCOPE_BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(response, attempt: int) -> float:
+    """优先遵循 Retry-After，否则按指数退避（带少量抖动）"""
+    delay = _retry_after_seconds(response)
+    if delay is None:
+        delay = min(_DASHSCOPE_BACKOFF_MAX, _DASHSCOPE_BACKOFF_BASE * (2 ** attempt))
+        delay += random.uniform(0, delay * 0.1)
+    return delay
+
+
+def _call_dashscope_with_retry(call, **kwargs):
+    """
+    调用 dashscope 接口，遇到 429/5xx 时指数退避重试
+
+    Args:
+        call: 如 Generation.call / TextEmbedding.call
+        **kwargs: 透传给 call 的参数
+
+    Returns:
+        最后一次调用的响应（仍可能是错误响应，由调用方处理）
+    """
+    for attempt in range(_DASHSCOPE_MAX_ATTEMPTS):
+        response = call(**kwargs)
+        if (response.status_code not in _RETRYABLE_STATUS or
+                attempt == _DASHSCOPE_MAX_ATTEMPTS - 1):
+            return response
+
+        delay = _backoff_delay(response, attempt)
+        logger.warning("DashScope API %s (attempt %d/%d), retrying in %.1fs",
+                       response.status_code, attempt + 1, _DASHSCOPE_MAX_ATTEMPTS, delay)
+        time.sleep(delay)
+
+    return response
+
+
+# 匹配 markdown 代码块（可选 json 标注），一次扫描提取其中的 JSON 内容
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def _parse_json_response(result_text: str):
+    """从模型回复中提取并解析 JSON（兼容有无 markdown 代码块）"""
+    match = _FENCE_RE.search(result_text)
+    payload = match.group(1).strip() if match else result_text.strip()
+    return orjson.loads(payload)
+
+
 # 本地分类映射（当 AI 失败时使用）
 _SECTOR_INDUSTRY_MAPPING = {
     # A 股分类
@@ -40,56 +165,113 @@ _SECTOR_INDUSTRY_MAPPING = {
 }
 
 
+# 预先小写化的匹配表：(关键词, 板块, 行业)，避免每次分类都重复 lower()
+_LOCAL_INDUSTRY_KEYS = tuple(
+    (industry_en_key.lower(), sector_cn, industry_cn)
+    for sector_cn, industries in _SECTOR_INDUSTRY_MAPPING.items()
+    for industry_en_key, industry_cn in industries.items()
+)
+_LOCAL_SECTOR_KEYS = tuple(
+    (sector_cn.lower(), sector_cn, next(iter(industries.values())))
+    for sector_cn, industries in _SECTOR_INDUSTRY_MAPPING.items()
+)
+
+
 def _get_local_classification(sector_en: str, industry_en: str) -> dict:
     """从本地映射获取分类"""
     sector_en_lower = sector_en.lower() if sector_en else ""
     industry_en_lower = industry_en.lower() if industry_en else ""
 
     # 直接匹配行业
-    for sector_cn, industries in _SECTOR_INDUSTRY_MAPPING.items():
-        for industry_en_key, industry_cn in industries.items():
-            if (industry_en_key.lower() in industry_en_lower or
-                    industry_en_key.lower() in sector_en_lower):
-                return {"sector_cn": sector_cn, "industry_cn": industry_cn}
-
-    # 模糊匹配板块
-    for sector_cn, industries in _SECTOR_INDUSTRY_MAPPING.items():
-        if sector_cn.lower() in sector_en_lower or sector_cn.lower() in industry_en_lower:
-            # 找该板块下的第一个行业
-            return {"sector_cn": sector_cn, "industry_cn": list(industries.values())[0]}
+    for key, sector_cn, industry_cn in _LOCAL_INDUSTRY_KEYS:
+        if key in industry_en_lower or key in sector_en_lower:
+            return {"sector_cn": sector_cn, "industry_cn": industry_cn}
+
+    # 模糊匹配板块（取该板块下的第一个行业）
+    for key, sector_cn, industry_cn in _LOCAL_SECTOR_KEYS:
+        if key in sector_en_lower or key in industry_en_lower:
+            return {"sector_cn": sector_cn, "industry_cn": industry_cn}
 
     return {"sector_cn": "其他", "industry_cn": "其他"}
 
 
-def generate_summary(report_id: str) -> str | None:
-    """为报告生成 AI 摘要"""
-    db: Client = get_db_client()
+# 摘要输入的字符预算、每批读取的文本块数、回退寻找句子边界的窗口
+_SUMMARY_CHAR_BUDGET = 6000
+_SUMMARY_CHUNK_BATCH = 10
+_SENTENCE_BOUNDARY_WINDOW = 200
 
-    try:
-        # 获取报告文本块
-        chunks_result = (
+
+def _iter_report_chunk_contents(db: Client, report_id: str) -> Iterator[str]:
+    """按页码顺序分批产出报告文本块内容，调用方停止迭代后不再发起查询"""
+    offset = 0
+    while True:
+        batch = (
             db.table("report_chunks")
             .select("content")
             .eq("report_id", report_id)
             .order("page_number")
+            .range(offset, offset + _SUMMARY_CHUNK_BATCH - 1)
             .execute()
         )
+        for chunk in batch.data or []:
+            yield chunk["content"]
 
-        if not chunks_result.data:
-            print(f"[ERROR] No chunks found for report {report_id}")
-            return None
+        if not batch.data or len(batch.data) < _SUMMARY_CHUNK_BATCH:
+            return
+        offset += _SUMMARY_CHUNK_BATCH
+
+
+def _cut_at_sentence_boundary(text: str, limit: int) -> str:
+    """截断到 limit 字符以内，并尽量回退到末尾窗口内最后一个句号或段落边界"""
+    head = text[:limit]
+    window_start = max(0, len(head) - _SENTENCE_BOUNDARY_WINDOW)
+    cut = max(head.rfind("。", window_start), head.rfind("\n\n", window_start))
+    return head[:cut + 1] if cut >= 0 else head
+
+
+def _join_within_budget(contents: Iterable[str], budget: int) -> Tuple[str, int]:
+    """
+    用 "\n\n" 拼接文本块直到字符预算用完
 
-        # 拼接文本，限制在 6000 字符以内
-        full_text = "\n\n".join([chunk["content"] for chunk in chunks_result.data])
-        text_to_analyze = full_text[:6000]
+    Returns:
+        (拼接后的文本, 使用的文本块数)
+    """
+    parts = []
+    total = 0
+    for body in contents:
+        remaining = budget - total
+        if remaining <= 0:
+            break
+        if len(body) >= remaining:
+            parts.append(_cut_at_sentence_boundary(body, remaining))
+            break
+        parts.append(body)
+        total += len(body) + 2
+
+    return "\n\n".join(parts), len(parts)
 
-        print(f"[OK] Analyzing {len(text_to_analyze)} characters from "
-              f"{len(chunks_result.data)} chunks")
+
+def generate_summary(report_id: str) -> str | None:
+    """为报告生成 AI 摘要"""
+    db: Client = db_client
+
+    try:
+        # 按页分批读取文本块，拼够字符预算即停止，不再拉取整份报告
+        text_to_analyze, chunk_count = _join_within_budget(
+            _iter_report_chunk_contents(db, report_id), _SUMMARY_CHAR_BUDGET
+        )
+
+        if not chunk_count:
+            logger.error("No chunks found for report %s", report_id)
+            return None
+
+        logger.info("Analyzing %d characters from %d chunks",
+                    len(text_to_analyze), chunk_count)
 
         # 调用通义千问 API
         api_key = settings.DASHSCOPE_API_KEY
         if not api_key:
-            print("[ERROR] DASHSCOPE_API_KEY not found")
+            logger.error("DASHSCOPE_API_KEY not found")
             return None
 
         messages = [
@@ -105,46 +287,115 @@ def generate_summary(report_id: str) -> str | None:
             },
         ]
 
-        response = dashscope.Generation.call(
-            model="qwen-plus",
-            messages=messages,
-            api_key=api_key,
-        )
-
-        if response.status_code != 200:
-            print(f"[ERROR] Qwen API Error: {response.code} - {response.message}")
+        summary = "".join(_stream_qwen(messages, api_key))
+        if not summary:
             return None
 
-        summary = response.output.text
-        print(f"[OK] Generated summary: {summary[:50]}...")
+        logger.info("Generated summary: %.50s...", summary)
 
         # 更新数据库
         db.table("reports").update({"summary": summary}).eq("id", report_id).execute()
-        print(f"[OK] Summary saved to report {report_id}")
+        logger.info("Summary saved to report %s", report_id)
         return summary
 
     except Exception as e:
-        print(f"[ERROR] Error generating summary: {e}")
+        logger.error("Error generating summary: %s", e)
+        return None
+
+
+def _l2_normalize(embedding: List[float]) -> List[float]:
+    """L2 归一化向量，使 match_documents 可用内积 (<#>) 代替余弦距离"""
+    norm = math.sqrt(math.fsum(x * x for x in embedding))
+    if norm == 0:
+        return embedding
+    return [x / norm for x in embedding]
+
+
+@functools.cache
+def _get_local_embedder():
+    """加载本地 ONNX 向量模型（未配置、依赖缺失或维度不匹配时返回 None）"""
+    model_name = settings.LOCAL_EMBEDDING_MODEL
+    if not model_name:
+        return None
+
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("sentence-transformers not installed, local embedding disabled")
+        return None
+
+    try:
+        model = SentenceTransformer(model_name, backend="onnx")
+    except Exception as e:
+        logger.warning("Failed to load local embedding model %s: %s", model_name, e)
+        return None
+
+    dim = model.get_sentence_embedding_dimension()
+    if dim != settings.EMBEDDING_DIM:
+        logger.warning("Local embedding dim %s != EMBEDDING_DIM %s, local embedding disabled",
+                       dim, settings.EMBEDDING_DIM)
         return None
 
+    logger.info("Local embedding model %s loaded (dim=%d)", model_name, dim)
+    return model
+
+
+def warm_up_local_embedding() -> bool:
+    """
+    预热本地向量模型，让首个对话请求不必承担模型加载和首次推理耗时
+
+    模型不可用或首次推理失败时只记录日志并返回 False，不影响服务启动
+    （之后的请求由 create_embedding 同样返回 None）。
+    """
+    model = _get_local_embedder()
+    if model is None:
+        return False
+
+    try:
+        model.encode("预热", normalize_embeddings=True)
+    except Exception as e:
+        logger.error("Local embedding warm-up failed: %s", e)
+        return False
+    return True
+
 
 def create_embedding(text: str) -> List[float] | None:
-    """使用阿里云 text-embedding-v1 模型生成文本向量嵌入"""
+    """
+    生成文本向量嵌入（已 L2 归一化）
+
+    配置了 LOCAL_EMBEDDING_MODEL 时只使用本地 ONNX 模型（省去一次网络往返），
+    否则使用阿里云 text-embedding-v1 模型。两者不混用：维度相同也不代表向量空间相同，
+    查询向量必须与 report_chunks 中已存向量出自同一模型，本地模型不可用时返回 None。
+    """
+    if settings.LOCAL_EMBEDDING_MODEL:
+        model = _get_local_embedder()
+        if model is None:
+            logger.error("Local embedding model %s unavailable", settings.LOCAL_EMBEDDING_MODEL)
+            return None
+        try:
+            embedding = model.encode(text, normalize_embeddings=True).tolist()
+            logger.debug("Generated local embedding chars=%d dim=%d", len(text), len(embedding))
+            return embedding
+        except Exception as e:
+            logger.error("Local embedding failed: %s", e)
+            return None
+
     api_key = settings.DASHSCOPE_API_KEY
 
     if not api_key:
-        print("[ERROR] DASHSCOPE_API_KEY not found")
+        logger.error("DASHSCOPE_API_KEY not found")
         return None
 
     try:
-        response = dashscope.TextEmbedding.call(
+        response = _call_dashscope_with_retry(
+            _get_dashscope().TextEmbedding.call,
             model="text-embedding-v1",
             input=text,
             api_key=api_key,
         )
 
         if response.status_code != 200:
-            print(f"[ERROR] Embedding API Error: {response.code} - {response.message}")
+            logger.error("Embedding API Error: %s - %s", response.code, response.message)
             return None
 
         # 提取 embedding
@@ -167,17 +418,151 @@ def create_embedding(text: str) -> List[float] | None:
             embedding = output.embedding
 
         if embedding:
-            print(f"[OK] Generated embedding for {len(text)} characters, dim: {len(embedding)}")
-            return embedding
-
-        print("[ERROR] Failed to extract embedding from response")
+            if len(embedding) != settings.EMBEDDING_DIM:
+                logger.error("DashScope embedding dim %d != EMBEDDING_DIM %d",
+                             len(embedding), settings.EMBEDDING_DIM)
+                return None
+            logger.debug("Generated embedding chars=%d dim=%d", len(text), len(embedding))
+            return _l2_normalize(embedding)
+
+        logger.error("Failed to extract embedding from response")
         return None
 
     except Exception as e:
-        print(f"[ERROR] Error creating embedding: {e}")
+        logger.error("Error creating embedding: %s", e)
         return None
 
 
+class QwenStreamError(RuntimeError):
+    """通义千问流式调用返回错误状态（此前已产出的文本不完整，不能当作完整回答使用）"""
+
+
+def _stream_qwen(messages: List[Dict], api_key: str) -> Iterator[str]:
+    """
+    以流式方式调用通义千问，逐段产出增量文本
+
+    使用 incremental_output=True，每个分片只包含新生成的内容，
+    调用方无需自行做差分。首个分片即返回 429/5xx 时按退避策略重试；
+    已开始输出后不再重试，避免重复内容。任一分片返回非 200 状态时抛出
+    QwenStreamError，调用方据此区分中途失败与正常结束。
+    """
+    for attempt in range(_DASHSCOPE_MAX_ATTEMPTS):
+        responses = _get_dashscope().Generation.call(
+            model="qwen-plus",
+            messages=messages,
+            api_key=api_key,
+            stream=True,
+            incremental_output=True,
+        )
+        first = next(responses, None)
+        if first is None:
+            return
+        if (first.status_code not in _RETRYABLE_STATUS or
+                attempt == _DASHSCOPE_MAX_ATTEMPTS - 1):
+            break
+
+        delay = _backoff_delay(first, attempt)
+        logger.warning("Qwen stream %s (attempt %d/%d), retrying in %.1fs",
+                       first.status_code, attempt + 1, _DASHSCOPE_MAX_ATTEMPTS, delay)
+        time.sleep(delay)
+
+    for response in itertools.chain((first,), responses):
+        if response.status_code != 200:
+            logger.error("Qwen API Error: %s - %s", response.code, response.message)
+            raise QwenStreamError(f"{response.code}: {response.message}")
+
+        if response.output is None or not response.output.text:
+            continue
+
+        yield response.output.text
+
+
+def _build_chat_messages(
+    report_id: str,
+    query: str,
+    match_threshold: float,
+    match_count: int
+) -> List[Dict] | None:
+    """检索相关文本块并构建 RAG 对话消息"""
+    db: Client = db_client
+
+    # 为用户问题生成向量
+    query_embedding = create_embedding(query)
+    if not query_embedding:
+        return None
+
+    # 向量搜索获取相关上下文
+    logger.debug("Calling match_documents with threshold=%s, count=%s",
+                 match_threshold, match_count)
+    match_result = db.rpc(
+        "match_documents",
+        params={
+            "query_embedding": query_embedding,
+            "match_threshold": match_threshold,
+            "match_count": match_count,
+            "filter_report_id": report_id,
+        }
+    ).execute()
+
+    if not match_result.data:
+        context = "未找到与问题相关的内容。"
+    else:
+        context_parts = []
+        for chunk in match_result.data:
+            context_parts.append(f"[Page {chunk['page_number']}] {chunk['content']}")
+        context = "\n\n".join(context_parts)
+        logger.info("Retrieved %d relevant chunks", len(match_result.data))
+
+    return [
+        {
+            "role": "system",
+            "content": ("你是一位资深的金融分析师助手。请基于提供的研报内容回答用户的问题。"
+                        "如果提供的上下文中没有相关信息，请明确告知。回答要准确、专业、简洁。")
+        },
+        {
+            "role": "user",
+            "content": f"基于以下研报内容，请回答问题：\n\n【研报内容】\n{context}\n\n【问题】\n{query}"
+        }
+    ]
+
+
+async def stream_chat_response(
+    report_id: str,
+    query: str,
+    match_threshold: float = 0.1,
+    match_count: int = 5
+) -> AsyncIterator[str]:
+    """
+    使用 RAG 流式生成回答，逐段产出文本
+
+    检索和生成均为同步 SDK 调用，这里放到线程池中执行，
+    避免阻塞事件循环；首个分片到达即可推送给前端。
+    """
+    api_key = settings.DASHSCOPE_API_KEY
+    if not api_key:
+        logger.error("DASHSCOPE_API_KEY not found")
+        return
+
+    try:
+        messages = await asyncio.to_thread(
+            _build_chat_messages, report_id, query, match_threshold, match_count
+        )
+        if not messages:
+            return
+
+        stream = _stream_qwen(messages, api_key)
+        while True:
+            delta = await asyncio.to_thread(next, stream, None)
+            if delta is None:
+                break
+            yield delta
+
+    except Exception as e:
+        # 已推送的部分回答不完整，向上抛出，由接口层告知前端
+        logger.error("Error streaming chat response: %s", e)
+        raise
+
+
 def generate_chat_response(
     report_id: str,
     query: str,
@@ -192,76 +577,52 @@ def generate_chat_response(
     2. 在数据库中搜索相似的文本块
     3. 将找到的文本块作为上下文
     4. 使用 Qwen 生成回答
-    """
-    db: Client = get_db_client()
 
+    非流式兼容接口：内部消费流式结果并拼接为完整文本。
+    """
     try:
-        # 为用户问题生成向量
-        query_embedding = create_embedding(query)
-        if not query_embedding:
+        messages = _build_chat_messages(report_id, query, match_threshold, match_count)
+        if not messages:
             return None
 
-        # 向量搜索获取相关上下文
-        print(f"[DEBUG] Calling match_documents with threshold={match_threshold}, "
-              f"count={match_count}")
-        match_result = db.rpc(
-            "match_documents",
-            params={
-                "query_embedding": query_embedding,
-                "match_threshold": match_threshold,
-                "match_count": match_count,
-                "filter_report_id": report_id,
-            }
-        ).execute()
-
-        if not match_result.data:
-            context = "未找到与问题相关的内容。"
-        else:
-            context_parts = []
-            for chunk in match_result.data:
-                context_parts.append(f"[Page {chunk['page_number']}] {chunk['content']}")
-            context = "\n\n".join(context_parts)
-            print(f"[OK] Retrieved {len(match_result.data)} relevant chunks")
-
         # 使用 Qwen 生成回答
         api_key = settings.DASHSCOPE_API_KEY
         if not api_key:
-            print("[ERROR] DASHSCOPE_API_KEY not found")
+            logger.error("DASHSCOPE_API_KEY not found")
             return None
 
-        messages = [
-            {
-                "role": "system",
-                "content": ("你是一位资深的金融分析师助手。请基于提供的研报内容回答用户的问题。"
-                            "如果提供的上下文中没有相关信息，请明确告知。回答要准确、专业、简洁。")
-            },
-            {
-                "role": "user",
-                "content": f"基于以下研报内容，请回答问题：\n\n【研报内容】\n{context}\n\n【问题】\n{query}"
-            }
-        ]
-
-        response = dashscope.Generation.call(
-            model="qwen-plus",
-            messages=messages,
-            api_key=api_key,
-        )
-
-        if response.status_code != 200:
-            print(f"[ERROR] Qwen API Error: {response.code} - {response.message}")
+        answer = "".join(_stream_qwen(messages, api_key))
+        if not answer:
             return None
 
-        answer = response.output.text
-        print(f"[OK] Generated chat response: {answer[:50]}...")
+        logger.info("Generated chat response: %.50s...", answer)
         return answer
 
     except Exception as e:
-        print(f"[ERROR] Error generating chat response: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error generating chat response: %s", e)
         return None
 
 
+# 股票分類提示詞（模組級預先構建，每次調用只做一次 format_map）
+_CLASSIFY_SYSTEM_PROMPT = (
+    "你是一位資深的金融分析師，擅長將股票分類到中文的板块和行业。"
+    "請根據公司的英文名稱、sector 和 industry，"
+    "將其分類到最合適的中文板块和行业。"
+    "\n\n常見的中文板块包括：半導體、新能源、醫療健康、消費品、金融、"
+    "科技、工業、房地產、公用事業、能源、通信、材料、其他"
+    "\n\n請以 JSON 格式返回：{\"sector_cn\": \"板块名稱\", "
+    "\"industry_cn\": \"行业名稱\"}"
+)
+_CLASSIFY_USER_TEMPLATE = (
+    "請將以下股票分類到中文的板块和行业：\n\n"
+    "股票代碼：{symbol}\n"
+    "公司名稱：{name}\n"
+    "英文 Sector：{sector_en}\n"
+    "英文 Industry：{industry_en}\n\n"
+    "請返回 JSON 格式：{{\"sector_cn\": \"...\", \"industry_cn\": \"...\"}}"
+)
+
+
 def classify_stock(symbol: str, name: str, sector_en: str, industry_en: str) -> dict:
     """
     使用 AI 將股票分類為中文板块和行业
@@ -269,86 +630,85 @@ def classify_stock(symbol: str, name: str, sector_en: str, industry_en: str) ->
     Returns:
         {"sector_cn": "板块名稱", "industry_cn": "行业名稱"}
     """
-    print(f"[DEBUG] classify_stock called: symbol={symbol}, "
-          f"sector_en={sector_en}, industry_en={industry_en}")
+    logger.debug("classify_stock called: symbol=%s, sector_en=%s, industry_en=%s",
+                 symbol, sector_en, industry_en)
 
     api_key = settings.DASHSCOPE_API_KEY
 
     # 1. 先尝试本地映射（快速且可靠）
     local_result = _get_local_classification(sector_en, industry_en)
-    print(f"[DEBUG] Local classification result: {local_result}")
+    logger.debug("Local classification result: %s", local_result)
     if local_result["sector_cn"] != "其他":
-        print(f"[OK] Local classification for {symbol}: {local_result['sector_cn']} / "
-              f"{local_result['industry_cn']}")
+        logger.info("Local classification for %s: %s / %s",
+                    symbol, local_result['sector_cn'], local_result['industry_cn'])
         return local_result
 
     # 2. 本地映射失败，尝试 AI 分类
     if not api_key:
-        print("[WARN] DASHSCOPE_API_KEY not found, using local fallback")
+        logger.warning("DASHSCOPE_API_KEY not found, using local fallback")
         return local_result
 
     try:
         messages = [
-            {
-                "role": "system",
-                "content": ("你是一位資深的金融分析師，擅長將股票分類到中文的板块和行业。"
-                            "請根據公司的英文名稱、sector 和 industry，"
-                            "將其分類到最合適的中文板块和行业。"
-                            "\n\n常見的中文板块包括：半導體、新能源、醫療健康、消費品、金融、"
-                            "科技、工業、房地產、公用事業、能源、通信、材料、其他"
-                            "\n\n請以 JSON 格式返回：{\"sector_cn\": \"板块名稱\", "
-                            "\"industry_cn\": \"行业名稱\"}")
-            },
+            {"role": "system", "content": _CLASSIFY_SYSTEM_PROMPT},
             {
                 "role": "user",
-                "content": (f"請將以下股票分類到中文的板块和行业：\n\n"
-                            f"股票代碼：{symbol}\n"
-                            f"公司名稱：{name}\n"
-                            f"英文 Sector：{sector_en}\n"
-                            f"英文 Industry：{industry_en}\n\n"
-                            "請返回 JSON 格式：{\"sector_cn\": \"...\", \"industry_cn\": \"...\"}")
-            }
+                "content": _CLASSIFY_USER_TEMPLATE.format_map({
+                    "symbol": symbol,
+                    "name": name,
+                    "sector_en": sector_en,
+                    "industry_en": industry_en,
+                }),
+            },
         ]
 
-        response = dashscope.Generation.call(
+        response = _call_dashscope_with_retry(
+            _get_dashscope().Generation.call,
             model="qwen-plus",
             messages=messages,
             api_key=api_key,
-            result_format="message",
         )
 
         if response.status_code != 200:
-            print(f"[WARN] Qwen API Error: {response.code} - "
-                  f"{response.message}, using local fallback")
+            logger.warning("Qwen API Error: %s - %s, using local fallback",
+                           response.code, response.message)
             return local_result
 
         # 解析 JSON 響應
         if response.output is None or response.output.text is None:
-            print("[WARN] Qwen API returned None output, using local fallback")
+            logger.warning("Qwen API returned None output, using local fallback")
             return local_result
 
-        result_text = response.output.text.strip()
-
-        # 嘗試提取 JSON（處理可能的 markdown 代碼塊）
-        if "```json" in result_text:
-            result_text = result_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in result_text:
-            result_text = result_text.split("```")[1].split("```")[0].strip()
-
-        result = json.loads(result_text)
+        # 解析 JSON（處理可能的 markdown 代碼塊）
+        result = _parse_json_response(response.output.text)
         sector_cn = result.get("sector_cn", "其他")
         industry_cn = result.get("industry_cn", "其他")
 
-        print(f"[OK] AI Classified {symbol}: {sector_cn} / {industry_cn}")
+        logger.info("AI Classified %s: %s / %s", symbol, sector_cn, industry_cn)
         return {"sector_cn": sector_cn, "industry_cn": industry_cn}
 
     except Exception as e:
-        print(f"[WARN] Error classifying stock {symbol}: {e}, using local fallback")
-        import traceback
-        traceback.print_exc()
+        logger.warning("Error classifying stock %s: %s, using local fallback",
+                       symbol, e, exc_info=True)
         return local_result
 
 
+# ============================================
+# 复盘评分查找表
+# ============================================
+# 涨跌幅分段：(-inf, -5) → -30，[-5, 0] → -15，(0, 5] → +15，(5, inf) → +30
+# bisect_left 统计严格小于涨跌幅的阈值个数；-5 取其前一个浮点数，使 -5 本身落入 [-5, 0] 段
+_PRICE_TREND_THRESHOLDS = (math.nextafter(-5.0, -math.inf), 0.0, 5.0)
+_PRICE_TREND_DELTAS = (-30, -15, 15, 30)
+
+_MA20_STATUS_DELTAS = {"站上均线": 20, "跌破均线": -20}
+_VOLUME_STATUS_DELTAS = {"放量": 10, "缩量": -10}
+
+# 健康分 → 交易信号：<20 / [20,40) / [40,60) / [60,80) / >=80
+_SIGNAL_THRESHOLDS = (20, 40, 60, 80)
+_ACTION_SIGNALS = ("STRONG_SELL", "SELL", "HOLD", "BUY", "STRONG_BUY")
+
+
 def generate_portfolio_review(
     symbol: str,
     name: str,
@@ -381,28 +741,15 @@ def generate_portfolio_review(
     base_health_score = 50
 
     # 价格趋势影响 (+/- 30)
-    if price_change_pct > 5:
-        base_health_score += 30
-    elif price_change_pct > 0:
-        base_health_score += 15
-    elif price_change_pct < -5:
-        base_health_score -= 30
-    else:
-        base_health_score -= 15
+    base_health_score += _PRICE_TREND_DELTAS[bisect_left(_PRICE_TREND_THRESHOLDS, price_change_pct)]
 
     # 整合技术面数据
     if technical_data:
         # MA20状态 (+/- 20)
-        if technical_data.get("ma20_status") == "站上均线":
-            base_health_score += 20
-        elif technical_data.get("ma20_status") == "跌破均线":
-            base_health_score -= 20
+        base_health_score += _MA20_STATUS_DELTAS.get(technical_data.get("ma20_status"), 0)
 
         # 量能状态 (+/- 10)
-        if technical_data.get("volume_status") == "放量":
-            base_health_score += 10
-        elif technical_data.get("volume_status") == "缩量":
-            base_health_score -= 10
+        base_health_score += _VOLUME_STATUS_DELTAS.get(technical_data.get("volume_status"), 0)
 
         # 使用技术面计算的health_score
         base_health_score = (base_health_score + technical_data.get("health_score", 50)) / 2
@@ -411,21 +758,12 @@ def generate_portfolio_review(
     health_score = max(0, min(100, int(base_health_score)))
 
     # 确定信号
-    if health_score >= 80:
-        action_signal = "STRONG_BUY"
-    elif health_score >= 60:
-        action_signal = "BUY"
-    elif health_score >= 40:
-        action_signal = "HOLD"
-    elif health_score >= 20:
-        action_signal = "SELL"
-    else:
-        action_signal = "STRONG_SELL"
+    action_signal = _ACTION_SIGNALS[bisect_right(_SIGNAL_THRESHOLDS, health_score)]
 
     # 生成AI分析（如果API可用）
     ai_analysis = None
     if not api_key:
-        print("[WARN] DASHSCOPE_API_KEY not found, using template")
+        logger.warning("DASHSCOPE_API_KEY not found, using template")
 
         # 使用模板生成分析
         ma_status = technical_data.get("ma20_status", "中性") if technical_data else "中性"
@@ -507,28 +845,20 @@ def generate_portfolio_review(
                 }
             ]
 
-            response = dashscope.Generation.call(
+            response = _call_dashscope_with_retry(
+                _get_dashscope().Generation.call,
                 model="qwen-plus",
                 messages=messages,
                 api_key=api_key,
             )
 
             if response.status_code != 200:
-                print(f"[WARN] Qwen API Error: {response.code} - "
-                      f"{response.message}, using fallback")
+                logger.warning("Qwen API Error: %s - %s, using fallback",
+                               response.code, response.message)
                 ai_analysis = None
             else:
-                result_text = response.output.text.strip()
-
-                # 提取JSON
-                if "```json" in result_text:
-                    result_text = result_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in result_text:
-                    result_text = result_text.split("```")[1].split("```")[0].strip()
-
-                import json as json_module
                 try:
-                    ai_result = json_module.loads(result_text)
+                    ai_result = _parse_json_response(response.output.text)
 
                     # 更新健康分和信号
                     if "health_score" in ai_result:
@@ -540,15 +870,15 @@ def generate_portfolio_review(
                             action_signal = ai_result["action_signal"]
 
                     ai_analysis = ai_result.get("analysis", "")
-                    print(f"[OK] AI Analysis for {symbol}: {action_signal}, "
-                          f"Score={health_score}")
+                    logger.info("AI Analysis for %s: %s, Score=%s",
+                                symbol, action_signal, health_score)
 
-                except json_module.JSONDecodeError:
-                    print("[WARN] Failed to parse AI response, using template")
+                except orjson.JSONDecodeError:
+                    logger.warning("Failed to parse AI response, using template")
                     ai_analysis = None
 
         except Exception as e:
-            print(f"[WARN] AI analysis failed: {e}, using template")
+            logger.warning("AI analysis failed: %s, using template", e)
             ai_analysis = None
 
     # 如果没有AI分析，使用模板
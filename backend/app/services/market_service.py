@@ -3,15 +3,31 @@
 Market Service - Fetches stock market data using AkShare/Tushare
 使用 AkShare 或 Tushare 获取股票市场数据，支持 A 股、美股和港股
 """
+import asyncio
+import functools
+import importlib.util
+import io
+import json
+import logging
 import os
+import random
 import re
+import sqlite3
+import sys
+import threading
 import time
+import types
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional, List, Mapping, Tuple
+from zoneinfo import ZoneInfo
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
-import akshare as ak
+import numpy as np
 import pandas as pd
+import requests
+from cachetools import TTLCache
+from cachetools.func import ttl_cache
 
 # Import custom exceptions for better error handling
 try:
@@ -22,6 +38,16 @@ except ImportError:
         pass
 
 
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def _get_ak():
+    """延迟导入 AkShare（体积大、导入慢），仅在首次需要行情数据时加载"""
+    import akshare
+    return akshare
+
+
 # ============================================
 # Tushare 字段名常量（统一管理）
 # ============================================
@@ -34,18 +60,14 @@ TUSHARE_CLOSE_FIELD = 'close'
 # 数据源选择：Tushare → Baostock → AkShare
 # 优先级固定：Tushare优先，然后Baostock，最后AkShare（所有类型的备选）
 # 注意：优先级由 app.core.config.DATA_SOURCE_PRIORITY 统一管理
-_data_fetcher = None
 _tushare_available = False
 _akshare_available = True
 
-# Import Baostock for A-share data
-try:
-    from app.services.market_service_baostock import (
-        get_financials_baostock, get_stock_info_baostock
-    )
-    _baostock_available = True
-except ImportError:
-    _baostock_available = False
+# Baostock for A-share data：仅探测是否已安装，baostock 本身在首次查询时才导入
+from app.services.market_service_baostock import (
+    BAOSTOCK_SESSION_LOCK, get_financials_baostock, get_stock_info_baostock
+)
+_baostock_available = importlib.util.find_spec("baostock") is not None
 
 # 禁用代理，避免网络连接问题
 os.environ['HTTP_PROXY'] = ''
@@ -67,47 +89,48 @@ try:
 
     # 替换 Session.request 方法
     requests.Session.request = _request_no_proxy
-    print("[INFO] Disabled proxy for requests library")
+    logger.info("Disabled proxy for requests library")
 except Exception as e:
-    print(f"[WARN] Failed to disable proxy: {e}")
+    logger.warning("Failed to disable proxy: %s", e)
+
+# AkShare 内部直接调用 requests.get/post，改走进程内共享的连接池 Session
+from app.core.http_session import install_shared_session
+install_shared_session()
 
 # ============================================
 # 数据源配置管理（固定优先级）
 # ============================================
 # 优先级：Tushare → Baostock → AkShare (备选)
 # 详细配置：见 app.core.config.DATA_SOURCE_PRIORITY
-print("[DATA SOURCE] Priority: Tushare → Baostock → AkShare (备选)")
+logger.info("[DATA SOURCE] Priority: Tushare → Baostock → AkShare (备选)")
 
 # 检查Tushare配置
 try:
     from app.core.config import settings
     if getattr(settings, 'DISABLE_TUSHARE', False):
         _tushare_available = False
-        print("[DATA SOURCE] Tushare DISABLED by configuration (DISABLE_TUSHARE=True)")
+        logger.info("[DATA SOURCE] Tushare DISABLED by configuration (DISABLE_TUSHARE=True)")
     elif not getattr(settings, 'TUSHARE_TOKEN', None):
         _tushare_available = False
-        print("[DATA SOURCE] Tushare unavailable: TUSHARE_TOKEN not set")
+        logger.info("[DATA SOURCE] Tushare unavailable: TUSHARE_TOKEN not set")
     else:
-        # 尝试导入DataFetcher
-        try:
-            from app.services.data_fetcher import DataFetcher
+        # 仅探测 tushare 是否可导入，真正的导入推迟到首次创建 DataFetcher 时
+        if importlib.util.find_spec("tushare") is not None:
             _tushare_available = True
-            print("[DATA SOURCE] Tushare ENABLED (Token configured, DataFetcher available)")
-        except ImportError:
+            logger.info("[DATA SOURCE] Tushare ENABLED (Token configured, DataFetcher available)")
+        else:
             _tushare_available = False
-            print("[DATA SOURCE] Tushare unavailable: DataFetcher module not found")
+            logger.info("[DATA SOURCE] Tushare unavailable: DataFetcher module not found")
 except ImportError:
     _tushare_available = True  # 默认启用
-    print("[DATA SOURCE] Config not loaded, using Tushare if available")
+    logger.info("[DATA SOURCE] Config not loaded, using Tushare if available")
 
 # Baostock可用性
-print(f"[DATA SOURCE] Baostock {'ENABLED' if _baostock_available else 'DISABLED'}")
+logger.info("[DATA SOURCE] Baostock %s", 'ENABLED' if _baostock_available else 'DISABLED')
 
 # ============================================
 # 缓存配置
 # ============================================
-_CACHE = {}
-
 # 从配置读取缓存TTL，默认300秒
 try:
     from app.core.config import settings
@@ -117,23 +140,133 @@ except ImportError:
     _CACHE_TTL = 300
     _CACHE_ENABLED = True
 
+# 有界 TTL 缓存：写入时按 LRU 淘汰，过期条目惰性清理，避免长驻进程内存无限增长
+_CACHE_MAXSIZE = 2048
+_CACHE = TTLCache(maxsize=_CACHE_MAXSIZE, ttl=_CACHE_TTL)
+_CACHE_LOCK = threading.RLock()
+
 
-def _get_cache_key(key: str) -> tuple:
+def _get_cache_key(key: str):
     """从缓存获取数据"""
     if not _CACHE_ENABLED:
         return None
-    if key in _CACHE:
-        data, timestamp = _CACHE[key]
-        if time.time() - timestamp < _CACHE_TTL:
-            return data
-        else:
-            del _CACHE[key]
-    return None
+    with _CACHE_LOCK:
+        return _CACHE.get(key)
 
 
 def _set_cache(key: str, data):
     """设置缓存"""
-    _CACHE[key] = (data, time.time())
+    with _CACHE_LOCK:
+        _CACHE[key] = data
+
+
+# ============================================
+# Redis 共享缓存（可选）
+# ============================================
+# 沪深300日线、全市场快照等大对象放到 Redis，多个 worker 进程及重启后共享同一份数据。
+# 未安装 redis、未启用或连接不上时只使用进程内缓存。
+try:
+    from app.core.config import settings
+    _REDIS_CACHE_ENABLED = getattr(settings, 'REDIS_CACHE_ENABLED', True)
+    _REDIS_URL = getattr(settings, 'REDIS_URL', '')
+except ImportError:
+    _REDIS_CACHE_ENABLED = False
+    _REDIS_URL = ''
+
+_REDIS_KEY_PREFIX = "sentinel:market:"
+_REDIS_TIMEOUT = 0.5  # 秒；Redis 只是加速层，慢于此直接回源
+
+
+@functools.cache
+def _get_redis():
+    """懒加载 Redis 客户端（首次使用时 ping 一次，失败则本进程内不再尝试）"""
+    if not (_REDIS_CACHE_ENABLED and _REDIS_URL):
+        return None
+    try:
+        import redis
+        client = redis.Redis.from_url(
+            _REDIS_URL,
+            socket_timeout=_REDIS_TIMEOUT,
+            socket_connect_timeout=_REDIS_TIMEOUT
+        )
+        client.ping()
+        logger.info("Redis cache enabled: %s", _REDIS_URL)
+        return client
+    except Exception as e:
+        logger.info("Redis cache unavailable, using in-process cache only: %s", e)
+        return None
+
+
+# 共享缓存中的 DataFrame 只用数据格式序列化，不用 pickle：缓存内容一旦被他人写入，
+# 反序列化 pickle 即可在本进程执行任意代码。已安装 pyarrow 时用 Parquet（保留全部列类型），
+# 否则（或列类型 Parquet 不支持时）用 JSON table 格式
+_PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+_PARQUET_MAGIC = b"PAR1"
+
+
+def _df_to_bytes(df: pd.DataFrame) -> bytes:
+    """DataFrame → Parquet / JSON 字节串（列名与索引名冲突等无法序列化时抛 ValueError）"""
+    if _PARQUET_AVAILABLE:
+        try:
+            return df.to_parquet()
+        except Exception as e:
+            logger.debug("Parquet serialization failed, falling back to JSON: %s", e)
+    return df.to_json(orient="table", date_format="iso", force_ascii=False).encode("utf-8")
+
+
+def _df_from_bytes(payload: bytes) -> pd.DataFrame:
+    """_df_to_bytes 的逆操作；内容无法解析时抛 ValueError"""
+    if payload[:4] == _PARQUET_MAGIC:
+        return pd.read_parquet(io.BytesIO(payload))
+    return pd.read_json(io.StringIO(payload.decode("utf-8")), orient="table")
+
+
+def _redis_get_df(key: str) -> Optional[pd.DataFrame]:
+    """从 Redis 读取 DataFrame，未命中或出错返回 None"""
+    client = _get_redis()
+    if client is None:
+        return None
+    try:
+        payload = client.get(_REDIS_KEY_PREFIX + key)
+        return _df_from_bytes(payload) if payload else None
+    except Exception as e:
+        logger.debug("Redis get failed for %s: %s", key, e)
+        return None
+
+
+def _redis_set_df(key: str, df: pd.DataFrame, ttl: int) -> None:
+    """写入 Redis（带过期时间），出错只记日志"""
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        client.setex(_REDIS_KEY_PREFIX + key, ttl, _df_to_bytes(df))
+    except Exception as e:
+        logger.debug("Redis set failed for %s: %s", key, e)
+
+
+# 异常堆栈限流：上游持续 5xx 时每个失败都打印堆栈会刷屏并拖慢请求，
+# 同一条日志每分钟只在前 _EXC_LOG_LIMIT 次附带堆栈，之后只记一行 warning
+_EXC_LOG_LIMIT = 5
+_EXC_LOG_WINDOW = 60.0
+_exc_log_counts: Dict[str, Tuple[float, int]] = {}
+_EXC_LOG_LOCK = threading.Lock()
+
+
+def _log_exception(msg: str, *args) -> None:
+    """在 except 块中调用：按 msg 分别计数，超出限额后省略堆栈"""
+    now = time.monotonic()
+    with _EXC_LOG_LOCK:
+        window_start, count = _exc_log_counts.get(msg, (now, 0))
+        if now - window_start >= _EXC_LOG_WINDOW:
+            window_start, count = now, 0
+        count += 1
+        _exc_log_counts[msg] = (window_start, count)
+
+    if count <= _EXC_LOG_LIMIT:
+        logger.exception(msg, *args)
+    else:
+        logger.warning(msg, *args)
 
 
 # 导入股票数据库模块
@@ -142,126 +275,185 @@ try:
     _USE_STOCK_DB = True
 except ImportError:
     _USE_STOCK_DB = False
-    print("[WARN] stock_db module not available, using fallback database")
+    logger.warning("stock_db module not available, using fallback database")
 
 
 # ============================================
 # DataFetcher 初始化
 # ============================================
+@functools.cache
 def _get_data_fetcher():
-    """获取或创建 DataFetcher 实例"""
-    global _data_fetcher, _tushare_available
-
+    """获取 DataFetcher 单例（首次调用时创建，Tushare 不可用或初始化失败时为 None）"""
     if not _tushare_available:
         return None
 
-    if _data_fetcher is None:
-        try:
-            # 从配置读取 Tushare Token
-            from app.core.config import settings
-            token = settings.TUSHARE_TOKEN
+    try:
+        # 从配置读取 Tushare Token
+        from app.core.config import settings
+        from app.services.data_fetcher import DataFetcher
+        token = settings.TUSHARE_TOKEN
 
-            if token:
-                _data_fetcher = DataFetcher(token=token)
-                print("[DATA SOURCE] Tushare Pro initialized successfully (Token configured)")
-            else:
-                print("[DATA SOURCE] TUSHARE_TOKEN not set in environment")
-                _tushare_available = False
-        except Exception as e:
-            print(f"[DATA SOURCE] Failed to initialize Tushare Pro: {e}")
-            _tushare_available = False
+        if not token:
+            logger.info("[DATA SOURCE] TUSHARE_TOKEN not set in environment")
+            return None
 
-    return _data_fetcher
-
-
-# 本地股票数据库（常见股票）
-_STOCK_DATABASE = {
-    # A 股 - 科创板 (688xxx)
-    '688008': {'name': '澜起科技', 'sector': '科技', 'industry': '半导体'},
-    '688012': {'name': '澳华内镜', 'sector': '医疗健康', 'industry': '医疗器械'},
-    '688981': {'name': '中芯国际', 'sector': '科技', 'industry': '半导体'},
-    '688036': {'name': '传音控股', 'sector': '科技', 'industry': '消费电子'},
-    '688111': {'name': '金山办公', 'sector': '科技', 'industry': '软件'},
-    '688599': {'name': '天合光能', 'sector': '新能源', 'industry': '光伏'},
-    # A 股 - 主板
-    '600519': {'name': '贵州茅台', 'sector': '消费品', 'industry': '白酒'},
-    '000858': {'name': '五粮液', 'sector': '消费品', 'industry': '白酒'},
-    '600036': {'name': '招商银行', 'sector': '金融', 'industry': '银行'},
-    '601318': {'name': '中国平安', 'sector': '金融', 'industry': '保险'},
-    '600900': {'name': '长江电力', 'sector': '公用事业', 'industry': '电力'},
-    '600030': {'name': '中信证券', 'sector': '金融', 'industry': '证券'},
-    '000001': {'name': '平安银行', 'sector': '金融', 'industry': '银行'},
-    '002415': {'name': '海康威视', 'sector': '科技', 'industry': '安防'},
-    '300750': {'name': '宁德时代', 'sector': '新能源', 'industry': '锂电池'},
-    '002594': {'name': '比亚迪', 'sector': '新能源', 'industry': '新能源汽车'},
-    '600276': {'name': '恒瑞医药', 'sector': '医疗健康', 'industry': '化学制药'},
-    '000333': {'name': '美的集团', 'sector': '消费品', 'industry': '家电'},
-    '002050': {'name': '三花智控', 'sector': '工业', 'industry': '制冷设备'},
-    '600547': {'name': '山东黄金', 'sector': '材料', 'industry': '贵金属'},
-    '600887': {'name': '伊利股份', 'sector': '消费品', 'industry': '食品'},
-    '000651': {'name': '格力电器', 'sector': '消费品', 'industry': '家电'},
-    '601012': {'name': '隆基绿能', 'sector': '新能源', 'industry': '光伏'},
-    '300059': {'name': '东方财富', 'sector': '金融', 'industry': '证券'},
-    '000725': {'name': '京东方A', 'sector': '科技', 'industry': '半导体'},
-    '002475': {'name': '立讯精密', 'sector': '科技', 'industry': '消费电子'},
-    '002028': {'name': '思源电气', 'sector': '工业', 'industry': '电气设备'},
-    '002572': {'name': '索菲亚', 'sector': '消费品', 'industry': '家居'},
-    '600584': {'name': '长电科技', 'sector': '科技', 'industry': '半导体'},
-    '300124': {'name': '汇川技术', 'sector': '工业', 'industry': '自动化'},
-    '601390': {'name': '中国中铁', 'sector': '工业', 'industry': '基建'},
-    '601766': {'name': '中国中车', 'sector': '工业', 'industry': '轨道交通'},
-    # 美股
-    'AAPL': {'name': 'Apple Inc.', 'sector': '科技', 'industry': 'Technology'},
-    'MSFT': {'name': 'Microsoft', 'sector': '科技', 'industry': 'Software'},
-    'GOOGL': {'name': 'Alphabet', 'sector': '科技', 'industry': 'Internet'},
-    'AMZN': {'name': 'Amazon', 'sector': '消费品', 'industry': 'E-Commerce'},
-    'TSLA': {'name': 'Tesla', 'sector': '科技', 'industry': 'Automotive'},
-    'NVDA': {'name': 'NVIDIA', 'sector': '科技', 'industry': 'Semiconductor'},
-    'META': {'name': 'Meta', 'sector': '科技', 'industry': 'Social Media'},
-    'JPM': {'name': 'JPMorgan', 'sector': '金融', 'industry': 'Banking'},
-    'V': {'name': 'Visa', 'sector': '金融', 'industry': 'Payment'},
-    'JNJ': {'name': 'Johnson & Johnson', 'sector': '医疗健康', 'industry': 'Pharma'},
-    'WMT': {'name': 'Walmart', 'sector': '消费品', 'industry': 'Retail'},
-    'DIS': {'name': 'Disney', 'sector': '消费品', 'industry': 'Entertainment'},
-    'NFLX': {'name': 'Netflix', 'sector': '通信', 'industry': 'Streaming'},
-    'AMD': {'name': 'AMD', 'sector': '科技', 'industry': 'Semiconductor'},
-    'INTC': {'name': 'Intel', 'sector': '科技', 'industry': 'Semiconductor'},
-    # 港股
-    '00700': {'name': '腾讯控股', 'sector': '科技', 'industry': '互联网'},
-    '09988': {'name': '阿里巴巴', 'sector': '科技', 'industry': '电商'},
-    '00005': {'name': '汇丰控股', 'sector': '金融', 'industry': '银行'},
-    '09399': {'name': '美团', 'sector': '消费品', 'industry': '本地服务'},
-    '02020': {'name': '安踏体育', 'sector': '消费品', 'industry': '体育用品'},
-}
+        fetcher = DataFetcher(token=token)
+        logger.info("[DATA SOURCE] Tushare Pro initialized successfully (Token configured)")
+        return fetcher
+    except Exception as e:
+        logger.warning("[DATA SOURCE] Failed to initialize Tushare Pro: %s", e)
+        return None
 
 
+# 本地股票数据库（常见股票，降级用）：数据存放在 app/data/fallback_stocks.json，首次查询时加载
+_FALLBACK_DB_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "data", "fallback_stocks.json")
+
+
+@functools.cache
+def _get_stock_database() -> Mapping[str, Tuple[str, str, str]]:
+    """
+    加载硬编码降级股票表（只读视图，进程内只读一次）
+
+    每行存为 (name, sector, industry) 元组；板块/行业取值重复度高，驻留后各行共享同一字符串对象。
+    """
+    try:
+        with open(_FALLBACK_DB_FILE, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        return types.MappingProxyType({
+            code: (row['name'], sys.intern(row['sector']), sys.intern(row['industry']))
+            for code, row in raw.items()
+        })
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Failed to load fallback stock database: %s", e)
+        return types.MappingProxyType({})
+
+
+# 市场 → 计价货币
+_MARKET_CURRENCY = types.MappingProxyType({'A': 'CNY', 'HK': 'HKD', 'US': 'USD'})
+
+
+@functools.lru_cache(maxsize=4096)
 def _detect_market_type(symbol: str) -> str:
-    """检测股票类型: A(6位数字), US(字母), HK(4-5位数字)"""
+    """检测股票类型: A(6位数字), US(字母), HK(4-5位数字)；结果只取决于输入，按原始字符串缓存"""
     symbol = symbol.upper().strip()
-
-    if re.match(r'^\d{6}$', symbol):
-        return 'A'
-    if re.match(r'^\d{4,5}\.HK$', symbol) or re.match(r'^0?\d{4,5}$', symbol):
-        return 'HK'
-    if re.match(r'^[A-Z]+$', symbol):
+    # 纯 ASCII 字符判断即可覆盖全部格式，无需正则
+    if not symbol.isascii():
+        return 'UNKNOWN'
+
+    has_hk = symbol.endswith('.HK')
+    code = symbol[:-3] if has_hk else symbol
+    if code.isdigit():
+        n = len(code)
+        if n == 6 and not has_hk:
+            return 'A'
+        if 4 <= n <= 5:
+            return 'HK'
+        return 'UNKNOWN'
+    if not has_hk and symbol.isalpha():
         return 'US'
     return 'UNKNOWN'
 
 
+@functools.lru_cache(maxsize=4096)
 def _normalize_symbol(symbol: str, market: str) -> str:
-    """标准化股票代码"""
+    """标准化股票代码（纯字符串变换，与 _detect_market_type 一样按入参缓存）"""
     symbol = symbol.upper().strip()
 
     if market == 'A':
         return symbol.zfill(6)
     if market == 'HK':
-        return symbol.replace('.HK', '').zfill(5)
+        return (symbol[:-3] if symbol.endswith('.HK') else symbol).zfill(5)
     return symbol
 
 
+# ============================================
+# 实时股价缓存
+# ============================================
+# 同一标的在短时间内被多个调用方重复查询时直接复用，避免重复的历史行情请求
+# 值为 (price, expires_at)，expires_at 基于 time.monotonic()
+_PRICE_CACHE: Dict[Tuple[str, str], Tuple[float, float]] = {}
+_PRICE_CACHE_LOCK = threading.Lock()
+_PRICE_TTL_TRADING = 30     # 交易时段内（秒）
+_PRICE_TTL_CLOSED = 900     # 非交易时段（秒）
+_SHANGHAI_TZ = ZoneInfo("Asia/Shanghai")
+# 最新价只需要最后一个交易日，回看窗口覆盖国庆/春节等长假即可
+_PRICE_LOOKBACK_DAYS = 15
+
+
+def _price_cache_ttl() -> int:
+    """交易时段（北京时间 09:30-15:00）使用短 TTL，收盘后价格不变可使用长 TTL"""
+    now = datetime.now(_SHANGHAI_TZ)
+    hhmm = now.hour * 100 + now.minute
+    if now.weekday() < 5 and 930 <= hhmm < 1500:
+        return _PRICE_TTL_TRADING
+    return _PRICE_TTL_CLOSED
+
+
+# 全市场实时行情快照（AkShare stock_zh_a_spot_em，按 代码 索引），TTL 与实时股价一致
+# 一次请求覆盖全部 A 股，多只股票/多个调用方在有效期内共用；值为 (expires_at, DataFrame)
+_SPOT_LOCK = threading.Lock()
+_spot_snapshot: Tuple[float, Optional[pd.DataFrame]] = (0.0, None)
+# 批量查询股价时，标的数达到该值才值得先拉一次全市场快照
+_SPOT_BATCH_MIN = 20
+
+
+_SPOT_REDIS_KEY = "spot_em:all"
+
+
+def _get_a_share_spot(refresh: bool = True) -> Optional[pd.DataFrame]:
+    """
+    获取全市场行情快照（以 代码 为索引）
+
+    refresh=False 时只返回未过期的快照、不发起请求，也不等待进行中的下载。
+    拉取期间持有 _SPOT_LOCK，并发的刷新调用方等待同一次请求的结果，
+    而不是各自下载一遍全市场数据。
+    """
+    global _spot_snapshot
+    # 快照是整体替换的不可变元组，无锁读取即可；只有需要下载时才竞争锁
+    expires_at, spot_df = _spot_snapshot
+    if spot_df is not None and time.monotonic() < expires_at:
+        return spot_df
+    if not refresh:
+        return None
+
+    with _SPOT_LOCK:
+        # 等锁期间其他线程可能已刷新完成
+        expires_at, spot_df = _spot_snapshot
+        if spot_df is not None and time.monotonic() < expires_at:
+            return spot_df
+
+        # Redis 中存未建索引的快照（索引名与 代码 列同名时无法按 JSON table 格式序列化）
+        spot_df = _redis_get_df(_SPOT_REDIS_KEY)
+        if spot_df is None:
+            spot_df = _retry_akshare_call(_get_ak().stock_zh_a_spot_em)
+            if spot_df is None or spot_df.empty:
+                return None
+            spot_df = spot_df.drop_duplicates('代码')
+            _redis_set_df(_SPOT_REDIS_KEY, spot_df, _price_cache_ttl())
+        spot_df = spot_df.set_index('代码', drop=False)
+        _spot_snapshot = (time.monotonic() + _price_cache_ttl(), spot_df)
+        return spot_df
+
+
+def _spot_price(symbol: str) -> Optional[float]:
+    """从未过期的全市场快照中读取最新价（无快照、未收录或停牌无价时返回 None）"""
+    spot_df = _get_a_share_spot(refresh=False)
+    if spot_df is None or symbol not in spot_df.index:
+        return None
+    price = spot_df.at[symbol, '最新价']
+    return None if pd.isna(price) else float(price)
+
+
+def _format_date(d: datetime) -> Tuple[str, str]:
+    """返回 (YYYY-MM-DD, YYYYMMDD)：Tushare/AkShare 分别使用两种格式，f-string 拼接比两次 strftime 更快"""
+    compact = f"{d.year:04d}{d.month:02d}{d.day:02d}"
+    return f"{compact[:4]}-{compact[4:6]}-{compact[6:]}", compact
+
+
 def _get_realtime_price(symbol: str, market: str) -> Optional[float]:
     """
-    获取实时股价
+    获取实时股价（带 TTL 缓存）
 
     Args:
         symbol: 标准化的股票代码
@@ -270,61 +462,189 @@ def _get_realtime_price(symbol: str, market: str) -> Optional[float]:
     Returns:
         最新股价或None
     """
+    key = (symbol, market)
+    with _PRICE_CACHE_LOCK:
+        cached = _PRICE_CACHE.get(key)
+    if cached is not None and time.monotonic() < cached[1]:
+        return cached[0]
+
+    price = _fetch_realtime_price(symbol, market)
+    if price is not None:
+        with _PRICE_CACHE_LOCK:
+            _PRICE_CACHE[key] = (price, time.monotonic() + _price_cache_ttl())
+    return price
+
+
+def _fetch_realtime_price(symbol: str, market: str) -> Optional[float]:
+    """从 Tushare/AkShare 拉取最新股价（不经缓存）"""
     try:
         if market == 'A':
-            # A股实时行情 - 使用历史数据接口获取最新价格
-            print(f"[INFO] Fetching realtime price for A-share {symbol}...")
+            # 已有未过期的全市场快照时直接读取，无需单独请求
+            price = _spot_price(symbol)
+            if price is not None:
+                return price
+
+            # A股实时行情 - 只请求最近一小段日线，取最后一行收盘价
+            logger.info("Fetching realtime price for A-share %s...", symbol)
             end_date = datetime.now()
-            end_str = end_date.strftime('%Y-%m-%d')
+            start_dash, start_compact = _format_date(end_date - timedelta(days=_PRICE_LOOKBACK_DAYS))
+            end_dash, end_compact = _format_date(end_date)
 
-            if _tushare_available:
+            fetcher = _get_data_fetcher()
+            if fetcher:
                 # 使用 Tushare
-                fetcher = _get_data_fetcher()
-                if fetcher:
-                    hist_df = fetcher.get_stock_daily(
-                        symbol=symbol,
-                        end_date=end_str
-                    )
-                    if hist_df is not None and not hist_df.empty:
-                        price = float(hist_df.iloc[-1]['收盘'])
-                        print(f"[OK] {symbol} realtime price: {price}")
-                        return price
+                hist_df = fetcher.get_stock_daily(
+                    symbol=symbol,
+                    start_date=start_dash,
+                    end_date=end_dash
+                )
+                if hist_df is not None and not hist_df.empty:
+                    price = float(hist_df['收盘'].iat[-1])
+                    logger.info("%s realtime price: %s", symbol, price)
+                    return price
             else:
                 # 使用 AkShare
                 hist_df = _retry_akshare_call(
-                    ak.stock_zh_a_hist,
+                    _get_ak().stock_zh_a_hist,
                     symbol=symbol,
                     period="daily",
-                    end_date=end_date.strftime('%Y%m%d'),
+                    start_date=start_compact,
+                    end_date=end_compact,
                     adjust="",
                     max_retries=None  # 使用配置中的默认值
                 )
                 if hist_df is not None and not hist_df.empty:
-                    price = float(hist_df.iloc[-1]['收盘'])
-                    print(f"[OK] {symbol} realtime price: {price}")
+                    price = float(hist_df['收盘'].iat[-1])
+                    logger.info("%s realtime price: %s", symbol, price)
                     return price
 
         elif market == 'US':
             # 美股暂不支持实时
-            print("[WARN] US stocks realtime price not supported")
+            logger.warning("US stocks realtime price not supported")
             return None
 
         elif market == 'HK':
             # 港股暂不支持实时
-            print("[WARN] HK stocks realtime price not supported")
+            logger.warning("HK stocks realtime price not supported")
             return None
 
     except Exception as e:
-        print(f"[WARN] Failed to fetch realtime price: {e}")
+        logger.warning("Failed to fetch realtime price: %s", e)
+
+    return None
+
+
+def _pick_info_items(info_df: pd.DataFrame, *keys: str) -> Tuple:
+    """从 item/value 两列的个股信息表中取出指定 item 的值（不存在为 None），无需构建整张字典"""
+    items = info_df['item'].to_numpy()
+    values = info_df['value'].to_numpy()
+    picked = []
+    for key in keys:
+        hits = (items == key).nonzero()[0]
+        picked.append(values[hits[0]] if len(hits) else None)
+    return tuple(picked)
+
+
+def _detail_from_xq(symbol: str) -> Optional[Dict]:
+    """雪球接口获取名称/行业，失败返回 None"""
+    logger.info("Fetching stock details from 雪球 (xq) for %s...", symbol)
+    try:
+        # 雪球接口需要带交易所前缀
+        xq_symbol = symbol
+        if len(symbol) == 6:
+            if symbol.startswith('6'):
+                xq_symbol = f"SH{symbol}"
+            else:
+                xq_symbol = f"SZ{symbol}"
+
+        info_df = _get_ak().stock_individual_basic_info_xq(symbol=xq_symbol, timeout=15)
+        if info_df is not None and not info_df.empty:
+            stock_name, industry_dict = _pick_info_items(
+                info_df, 'org_short_name_cn', 'affiliate_industry'
+            )
+
+            # 解析行业信息（雪球返回的是 dict 类型）
+            industry = None
+            if isinstance(industry_dict, dict) and 'ind_name' in industry_dict:
+                industry = industry_dict['ind_name']
+
+            if stock_name:
+                # 根据行业名称推测板块
+                sector = _infer_sector_from_industry(industry) if industry else "其他"
+
+                logger.info("Got from 雪球: %s, industry=%s, sector=%s",
+                            stock_name, industry, sector)
+                return {
+                    "name": stock_name,
+                    "industry": industry or "其他",
+                    "sector": sector
+                }
+    except Exception as e:
+        logger.warning("雪球接口失败: %s", e)
+    return None
+
+
+def _detail_from_tushare(symbol: str) -> Optional[Dict]:
+    """Tushare 获取名称/行业，未配置或失败返回 None"""
+    fetcher = _get_data_fetcher()
+    if not fetcher:
+        return None
+    logger.info("Trying Tushare for %s...", symbol)
+    try:
+        result = fetcher.get_stock_info(symbol)
+        if result:
+            logger.info("Got from Tushare: %s, industry=%s, sector=%s",
+                        result.get('name'), result.get('industry'),
+                        result.get('sector'))
+            return result
+    except Exception as e:
+        logger.warning("Tushare failed: %s", e)
+    return None
+
 
+def _detail_from_em(symbol: str) -> Optional[Dict]:
+    """东方财富接口获取名称/行业，失败返回 None"""
+    logger.info("Trying 东方财富 (em) for %s...", symbol)
+    try:
+        info_df = _get_ak().stock_individual_info_em(symbol=symbol)
+        if info_df is not None and not info_df.empty:
+            stock_name, industry = _pick_info_items(info_df, '股票简称', '所属行业')
+            stock_name = stock_name or symbol
+
+            if stock_name and stock_name != symbol:
+                sector = _infer_sector_from_industry(industry) if industry else "其他"
+                logger.info("Got from 东方财富: %s, industry=%s, sector=%s",
+                            stock_name, industry, sector)
+                return {
+                    "name": stock_name,
+                    "industry": industry or "其他",
+                    "sector": sector
+                }
+    except Exception as e:
+        logger.warning("东方财富接口失败: %s", e)
     return None
 
 
+# 所有来源都查不到的代码（退市/输错等）在短时间内不再重复请求三个数据源。
+# 三个来源都因网络错误失败时同样记入：TTL 很短，上游故障期间也不必每次调用都重试三个来源
+_DETAIL_MISS_TTL = 60
+_DETAIL_MISS_CACHE = TTLCache(maxsize=10000, ttl=_DETAIL_MISS_TTL)
+_DETAIL_MISS_LOCK = threading.Lock()
+
+# 雪球请求超过该时长（秒）仍未返回时才发出东方财富对冲请求，正常情况下只请求雪球一个来源
+_DETAIL_HEDGE_DELAY = 1.5
+
+# 雪球/东方财富请求的线程池（独立于 _FETCH_POOL，避免批量任务内再提交子任务时互相等待）
+_DETAIL_HEDGE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stock-detail")
+
+
 def _fetch_stock_detail_from_akshare(symbol: str) -> Optional[Dict]:
     """
     从Tushare/AkShare获取股票详细信息（包括行业）
 
     优先级: 雪球接口 > Tushare > 东方财富接口
+    雪球在 _DETAIL_HEDGE_DELAY 内返回结果时不再请求其他来源；雪球变慢或失败时
+    才发出东方财富请求，与剩余的雪球/Tushare 查询重叠执行，结果仍按优先级选取。
 
     Returns:
         {
@@ -333,228 +653,372 @@ def _fetch_stock_detail_from_akshare(symbol: str) -> Optional[Dict]:
             "sector": str
         }
     """
-    try:
-        # 方案1: 优先使用雪球接口（更稳定）
-        print(f"[INFO] Fetching stock details from 雪球 (xq) for {symbol}...")
-        try:
-            # 雪球接口需要带交易所前缀
-            xq_symbol = symbol
-            if len(symbol) == 6:
-                if symbol.startswith('6'):
-                    xq_symbol = f"SH{symbol}"
-                else:
-                    xq_symbol = f"SZ{symbol}"
-
-            info_df = ak.stock_individual_basic_info_xq(symbol=xq_symbol, timeout=15)
-            if info_df is not None and not info_df.empty:
-                info_dict = dict(zip(info_df['item'], info_df['value']))
-
-                stock_name = info_dict.get('org_short_name_cn', None)
-
-                # 解析行业信息（雪球返回的是 dict 类型）
-                industry_dict = info_dict.get('affiliate_industry', {})
-                industry = None
-                if isinstance(industry_dict, dict) and 'ind_name' in industry_dict:
-                    industry = industry_dict['ind_name']
-
-                if stock_name:
-                    # 根据行业名称推测板块
-                    sector = _infer_sector_from_industry(industry) if industry else "其他"
-
-                    print(f"[OK] Got from 雪球: {stock_name}, industry={industry}, sector={sector}")
-                    return {
-                        "name": stock_name,
-                        "industry": industry or "其他",
-                        "sector": sector
-                    }
-        except Exception as e:
-            print(f"[WARN] 雪球接口失败: {e}")
+    with _DETAIL_MISS_LOCK:
+        if symbol in _DETAIL_MISS_CACHE:
+            logger.debug("Skipping detail lookup for %s (recent miss)", symbol)
+            return None
 
-        # 方案2: 尝试 Tushare
-        if _tushare_available:
-            fetcher = _get_data_fetcher()
-            if fetcher:
-                print(f"[INFO] Trying Tushare for {symbol}...")
-                try:
-                    result = fetcher.get_stock_info(symbol)
-                    if result:
-                        print(
-                            f"[OK] Got from Tushare: {result.get('name')}, "
-                            f"industry={result.get('industry')}, "
-                            f"sector={result.get('sector')}"
-                        )
-                        return result
-                except Exception as e:
-                    print(f"[WARN] Tushare failed: {e}")
+    xq_future = _DETAIL_HEDGE_POOL.submit(_detail_from_xq, symbol)
+    try:
+        done, _ = wait([xq_future], timeout=_DETAIL_HEDGE_DELAY)
+        if done:
+            result = xq_future.result()
+            if result:
+                return result
+
+        em_future = _DETAIL_HEDGE_POOL.submit(_detail_from_em, symbol)
+        if not done:
+            result = xq_future.result()
+            if result:
+                em_future.cancel()
+                return result
+
+        result = _detail_from_tushare(symbol)
+        if result:
+            em_future.cancel()
+            return result
+
+        result = em_future.result()
+        if result:
+            return result
+
+        logger.warning("All AkShare sources failed for %s", symbol)
+        with _DETAIL_MISS_LOCK:
+            _DETAIL_MISS_CACHE[symbol] = True
+        return None
 
-        # 方案3: 降级到东方财富接口
-        print(f"[INFO] Trying 东方财富 (em) for {symbol}...")
-        info_df = ak.stock_individual_info_em(symbol=symbol)
-        if info_df is not None and not info_df.empty:
-            # 将DataFrame转换为字典
-            info_dict = dict(zip(info_df['item'], info_df['value']))
+    except Exception:
+        logger.exception("Failed to fetch stock details for %s", symbol)
+        return None
 
-            stock_name = info_dict.get('股票简称', symbol)
-            industry = info_dict.get('所属行业', None)
 
-            if stock_name and stock_name != symbol:
-                sector = _infer_sector_from_industry(industry) if industry else "其他"
-                print(f"[OK] Got from 东方财富: {stock_name}, industry={industry}, sector={sector}")
-                return {
-                    "name": stock_name,
-                    "industry": industry or "其他",
-                    "sector": sector
-                }
+# 行业关键词 → 板块（按优先级排列，多条命中时取靠前的板块）
+_SECTOR_KEYWORDS: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (('银行', '保险', '证券', '信托'), '金融'),
+    (('医药', '生物', '医疗', '保健'), '医疗健康'),
+    (('电子', '计算机', '软件', '通信', '互联网', '半导体'), '科技'),
+    (('汽车', '新能源', '光伏', '风电', '锂电池'), '新能源'),
+    (('白酒', '食品', '家电', '纺织', '服饰'), '消费品'),
+    (('化工', '钢铁', '有色', '建材'), '材料'),
+    (('电力', '水务', '燃气'), '公用事业'),
+    (('建筑', '装修', '基建', '机械'), '工业'),
+    (('房地产',), '房地产'),
+    (('交通运输', '物流', '航空'), '交通运输'),
+    (('传媒', '娱乐', '教育'), '文化娱乐'),
+)
+
+# 每个板块一条预编译正则（无 pyahocorasick 时使用）
+_SECTOR_RULES: Tuple[Tuple[re.Pattern, str], ...] = tuple(
+    (re.compile('|'.join(keywords)), sector)
+    for keywords, sector in _SECTOR_KEYWORDS
+)
+
+
+def _build_sector_automaton():
+    """
+    构建 Aho-Corasick 自动机：一次线性扫描找出全部关键词命中，与关键词数量无关
 
-        print(f"[WARN] All AkShare sources failed for {symbol}")
+    pyahocorasick 为可选依赖，未安装时返回 None，回退到逐条正则匹配。
+    """
+    try:
+        import ahocorasick
+    except ImportError:
         return None
 
-    except Exception as e:
-        print(f"[ERROR] Failed to fetch stock details: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+    automaton = ahocorasick.Automaton()
+    for priority, (keywords, sector) in enumerate(_SECTOR_KEYWORDS):
+        for keyword in keywords:
+            automaton.add_word(keyword, (priority, sector))
+    automaton.make_automaton()
+    return automaton
+
 
+_SECTOR_AUTOMATON = _build_sector_automaton()
 
+
+@functools.lru_cache(maxsize=2048)
 def _infer_sector_from_industry(industry: str | None) -> str:
-    """根据行业名称推测板块"""
+    """根据行业名称推测板块（行业名称只有百余种，结果按名称缓存）"""
     if not industry:
         return "其他"
 
-    if any(x in industry for x in ['银行', '保险', '证券', '信托']):
-        return '金融'
-    elif any(x in industry for x in ['医药', '生物', '医疗', '保健']):
-        return '医疗健康'
-    elif any(x in industry for x in ['电子', '计算机', '软件', '通信', '互联网', '半导体']):
-        return '科技'
-    elif any(x in industry for x in ['汽车', '新能源', '光伏', '风电', '锂电池']):
-        return '新能源'
-    elif any(x in industry for x in ['白酒', '食品', '家电', '纺织', '服饰']):
-        return '消费品'
-    elif any(x in industry for x in ['化工', '钢铁', '有色', '建材']):
-        return '材料'
-    elif any(x in industry for x in ['电力', '水务', '燃气']):
-        return '公用事业'
-    elif any(x in industry for x in ['建筑', '装修', '基建', '机械']):
-        return '工业'
-    elif any(x in industry for x in ['房地产']):
-        return '房地产'
-    elif any(x in industry for x in ['交通运输', '物流', '航空']):
-        return '交通运输'
-    elif any(x in industry for x in ['传媒', '娱乐', '教育']):
-        return '文化娱乐'
-    else:
-        return '其他'
+    if _SECTOR_AUTOMATON is not None:
+        # 自动机按出现位置返回命中，取优先级最高（序号最小）的板块
+        best = min((value for _, value in _SECTOR_AUTOMATON.iter(industry)), default=None)
+        return best[1] if best else '其他'
 
+    for pattern, sector in _SECTOR_RULES:
+        if pattern.search(industry):
+            return sector
+    return '其他'
 
-def get_stock_info(
-    symbol: str,
-    fetch_price: bool = True,
-    max_retries: int = 0
-) -> Optional[Dict]:
-    """
-    获取股票基本信息（含实时股价）
 
-    数据源优先级（由 app.core.config.DATA_TYPE_PRIORITY["stock_info"] 定义）：
-        1. Tushare (主要数据源)
-        2. 本地数据库 (快速缓存)
-        3. 硬编码数据库 (降级)
-        4. Baostock (备选)
-        5. AkShare (最后备选)
+# 名称/板块/行业的缓存时间（秒）：极少变化，但 ST 摘帽/更名等需要在一天内生效
+_STATIC_INFO_TTL = 24 * 3600
 
-    Args:
-        symbol: 股票代码
-        fetch_price: 是否获取实时股价（默认True）
-        max_retries: 最大重试次数（已废弃，保留兼容性）
+# ============================================
+# 静态信息持久化缓存（SQLite，进程重启后仍有效）
+# ============================================
+# 查找顺序：进程内 ttl_cache → SQLite → 数据源；只缓存从网络数据源获得的结果
+_META_DB_NAME = "stock_meta_cache.sqlite3"
+_META_DB_LOCK = threading.Lock()
 
-    Returns:
-        {
-            "symbol": str,
-            "name": str,
-            "sector_en": str,
-            "industry_en": str,
-            "current_price": float | None,
-            "currency": str,
-            "market_cap": float | None,
-            "description": str
-        }
+try:
+    from app.core.config import settings
+    _CACHE_DIR = getattr(settings, 'CACHE_DIR', '')
+    _META_CACHE_ENABLED = getattr(settings, 'STOCK_META_CACHE_ENABLED', True)
+    _META_CACHE_TTL = getattr(settings, 'STOCK_META_CACHE_TTL_DAYS', 30) * 86400
+    _REPORT_CACHE_TTL = getattr(settings, 'FUNDAMENTALS_CACHE_TTL_DAYS', 7) * 86400
+except ImportError:
+    _CACHE_DIR = ''
+    _META_CACHE_ENABLED = True
+    _META_CACHE_TTL = 30 * 86400
+    _REPORT_CACHE_TTL = 7 * 86400
+
+
+@functools.cache
+def _get_meta_db() -> Optional[sqlite3.Connection]:
+    """打开（必要时创建）持久化缓存库，失败或禁用时返回 None；连接跨线程共用，访问需持有 _META_DB_LOCK"""
+    if not _META_CACHE_ENABLED:
+        return None
+    # 缓存放在源码目录之外（默认 ~/.cache/ashare-sentinel），只读部署的代码目录也能使用
+    cache_dir = os.path.expanduser(_CACHE_DIR or os.path.join("~", ".cache", "ashare-sentinel"))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(cache_dir, _META_DB_NAME), timeout=5, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS stock_meta ("
+            "code TEXT PRIMARY KEY, name TEXT NOT NULL, sector TEXT NOT NULL, "
+            "industry TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS report_cache ("
+            "endpoint TEXT NOT NULL, code TEXT NOT NULL, payload BLOB NOT NULL, "
+            "expires_at REAL NOT NULL, PRIMARY KEY (endpoint, code))"
+        )
+        return conn
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Stock metadata cache unavailable: %s", e)
+        return None
+
+
+def _meta_cache_get(code: str) -> Optional[Tuple[str, str, str]]:
+    """读取未过期的 (name, sector, industry)"""
+    conn = _get_meta_db()
+    if conn is None:
+        return None
+    try:
+        with _META_DB_LOCK:
+            row = conn.execute(
+                "SELECT name, sector, industry FROM stock_meta WHERE code = ? AND expires_at > ?",
+                (code, time.time())
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("Stock metadata cache read failed: %s", e)
+        return None
+    return tuple(row) if row else None
+
+
+def _meta_cache_set(code: str, info: Tuple[str, str, str]) -> None:
+    """写入 (name, sector, industry)，有效期 _META_CACHE_TTL 秒"""
+    conn = _get_meta_db()
+    if conn is None:
+        return
+    try:
+        with _META_DB_LOCK, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stock_meta VALUES (?, ?, ?, ?, ?)",
+                (code, *info, time.time() + _META_CACHE_TTL)
+            )
+    except sqlite3.Error as e:
+        logger.warning("Stock metadata cache write failed: %s", e)
+
+
+# 财报类接口（财务指标/利润表/现金流量表/分红）按季度更新，结果同样落盘到上面的 SQLite 库，
+# 有效期 _REPORT_CACHE_TTL；行情类数据变化快，仍只用进程内缓存。与 Redis 相同用 _df_to_bytes 序列化
+def _report_cache_get(endpoint: str, code: str) -> Optional[pd.DataFrame]:
+    """读取未过期的财报 DataFrame"""
+    conn = _get_meta_db()
+    if conn is None:
+        return None
+    try:
+        with _META_DB_LOCK:
+            row = conn.execute(
+                "SELECT payload FROM report_cache WHERE endpoint = ? AND code = ? AND expires_at > ?",
+                (endpoint, code, time.time())
+            ).fetchone()
+        return _df_from_bytes(row[0]) if row else None
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning("Report cache read failed for %s/%s: %s", endpoint, code, e)
+        return None
+
+
+def _report_cache_set(endpoint: str, code: str, df: pd.DataFrame) -> None:
+    """写入财报 DataFrame，有效期 _REPORT_CACHE_TTL 秒"""
+    conn = _get_meta_db()
+    if conn is None:
+        return
+    try:
+        payload = _df_to_bytes(df)
+        with _META_DB_LOCK, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO report_cache VALUES (?, ?, ?, ?)",
+                (endpoint, code, payload, time.time() + _REPORT_CACHE_TTL)
+            )
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning("Report cache write failed for %s/%s: %s", endpoint, code, e)
+
+
+def _cached_report(endpoint: str, code: str, fetch) -> Optional[pd.DataFrame]:
+    """先查持久化缓存，未命中时调用 fetch()，非空结果写回缓存（异常由调用方处理）"""
+    df = _report_cache_get(endpoint, code)
+    if df is not None:
+        logger.debug("Report cache hit: %s/%s", endpoint, code)
+        return df
+    df = fetch()
+    if df is not None and not df.empty:
+        _report_cache_set(endpoint, code, df)
+    return df
+
+
+@ttl_cache(maxsize=4096, ttl=_STATIC_INFO_TTL)
+def _get_static_stock_info(symbol: str) -> Tuple[str, str, str]:
+    """
+    获取股票静态信息 (name, sector, industry)，进程内缓存 _STATIC_INFO_TTL 秒
+
+    命中后无需再走数据库和网络；进程内未命中时先查 SQLite 持久化缓存。
+    所有数据源均未找到时抛出 LookupError（异常不会被缓存，下次仍会重试）。
     """
     market = _detect_market_type(symbol)
     normalized_symbol = _normalize_symbol(symbol, market)
 
-    print(f"[INFO] Fetching stock info for {symbol} (market: {market})")
+    # 标准化查询键（港股已在 _normalize_symbol 中去掉 .HK 后缀并补足5位）
+    lookup_key = normalized_symbol
 
-    # 标准化查询键
-    lookup_key = (
-        normalized_symbol if market != 'HK' else
-        symbol.upper().replace('.HK', '').zfill(5)
-    )
+    # 0. 持久化缓存（上次从网络数据源获取的结果）
+    cached = _meta_cache_get(lookup_key)
+    if cached is not None:
+        return cached
 
     stock_name = None
     stock_sector = None
     stock_industry = None
+    from_network = False  # 结果是否来自网络数据源（仅此类结果写入持久化缓存）
 
     # 1. 优先尝试 Tushare 获取股票基本信息
-    if market == 'A' and _data_fetcher:
-        print(f"[INFO] Trying Tushare for {symbol}...")
+    fetcher = _get_data_fetcher() if market == 'A' else None
+    if fetcher:
+        logger.info("Trying Tushare for %s...", symbol)
         try:
-            tushare_data = _data_fetcher.get_stock_info(symbol)
+            tushare_data = fetcher.get_stock_info(symbol)
             if tushare_data and tushare_data.get('name') != symbol:
-                print(
-                    f"[OK] Got from Tushare: {tushare_data.get('name')}, "
-                    f"industry={tushare_data.get('industry')}, "
-                    f"sector={tushare_data.get('sector')}"
-                )
+                logger.info("Got from Tushare: %s, industry=%s, sector=%s",
+                            tushare_data.get('name'), tushare_data.get('industry'),
+                            tushare_data.get('sector'))
                 stock_name = tushare_data['name']
                 stock_sector = tushare_data.get('sector', '未知')
                 stock_industry = tushare_data.get('industry', '未知')
+                from_network = True
         except Exception as e:
-            print(f"[WARN] Tushare failed for {symbol}: {e}")
+            logger.warning("Tushare failed for %s: %s", symbol, e)
 
     # 2. 回退到本地数据库文件（快速缓存）
     if not stock_name and _USE_STOCK_DB and market == 'A':
         stock_data = get_stock_from_db(lookup_key)
         if stock_data:
-            print(f"[DEBUG] Found in stock DB file: {lookup_key}")
+            logger.debug("Found in stock DB file: %s", lookup_key)
             stock_name = stock_data['name']
             stock_sector = stock_data.get('sector', '未知')
             stock_industry = stock_data.get('industry', '未知')
 
     # 3. 回退到旧的硬编码数据库
-    if not stock_name and lookup_key in _STOCK_DATABASE:
-        local_data = _STOCK_DATABASE[lookup_key]
-        print(f"[DEBUG] Found in fallback DB: {lookup_key}")
-        stock_name = local_data['name']
-        stock_sector = local_data['sector']
-        stock_industry = local_data['industry']
+    local_data = _get_stock_database().get(lookup_key) if not stock_name else None
+    if local_data is not None:
+        logger.debug("Found in fallback DB: %s", lookup_key)
+        stock_name, stock_sector, stock_industry = local_data
+
+    # Tushare/本地数据库已给出完整分类时，直接返回，不再请求 Baostock/AkShare
+    if stock_name and stock_sector != "其他" and stock_industry != "其他":
+        if from_network:
+            _meta_cache_set(lookup_key, (stock_name, stock_sector, stock_industry))
+        return stock_name, stock_sector, stock_industry
 
     # 4. 备选：从 Baostock 获取
-    if not stock_name or stock_sector == "其他" or stock_industry == "其他":
-        if _baostock_available:
-            print(f"[INFO] Trying Baostock for {symbol}...")
-            try:
-                baostock_data = get_stock_info_baostock(symbol)
-                if baostock_data:
-                    stock_name = baostock_data['name']
-                    stock_sector = baostock_data.get('sector', '未知')
-                    stock_industry = baostock_data.get('industry', '未知')
-                    print(f"[OK] Got data from Baostock for {symbol}")
-            except Exception as e:
-                print(f"[WARN] Baostock failed for {symbol}: {e}")
+    if _baostock_available:
+        logger.info("Trying Baostock for %s...", symbol)
+        try:
+            baostock_data = get_stock_info_baostock(symbol)
+            if baostock_data:
+                stock_name = baostock_data['name']
+                stock_sector = baostock_data.get('sector', '未知')
+                stock_industry = baostock_data.get('industry', '未知')
+                from_network = True
+                logger.info("Got data from Baostock for %s", symbol)
+        except Exception as e:
+            logger.warning("Baostock failed for %s: %s", symbol, e)
 
     # 5. 最后备选：从 AkShare 获取
     if not stock_name or stock_sector == "其他" or stock_industry == "其他":
-        print(f"[INFO] Trying AkShare for {symbol}...")
+        logger.info("Trying AkShare for %s...", symbol)
         akshare_data = _fetch_stock_detail_from_akshare(normalized_symbol)
         if akshare_data:
             stock_name = akshare_data['name']
             stock_sector = akshare_data['sector']
             stock_industry = akshare_data['industry']
-            print(f"[OK] Got data from AkShare for {symbol}")
+            from_network = True
+            logger.info("Got data from AkShare for %s", symbol)
 
-    # 6. 如果还是没有，返回默认值
     if not stock_name:
-        print(f"[WARN] Not found in any data source, using default for {symbol}")
+        raise LookupError(symbol)
+
+    if from_network:
+        _meta_cache_set(lookup_key, (stock_name, stock_sector, stock_industry))
+    return stock_name, stock_sector, stock_industry
+
+
+def get_stock_info(
+    symbol: str,
+    fetch_price: bool = True,
+    max_retries: int = 0
+) -> Optional[Dict]:
+    """
+    获取股票基本信息（含实时股价）
+
+    数据源优先级（由 app.core.config.DATA_TYPE_PRIORITY["stock_info"] 定义）：
+        1. Tushare (主要数据源)
+        2. 本地数据库 (快速缓存)
+        3. 硬编码数据库 (降级)
+        4. Baostock (备选)
+        5. AkShare (最后备选)
+
+    Args:
+        symbol: 股票代码
+        fetch_price: 是否获取实时股价（默认True）
+        max_retries: 最大重试次数（已废弃，保留兼容性）
+
+    Returns:
+        {
+            "symbol": str,
+            "name": str,
+            "sector_en": str,
+            "industry_en": str,
+            "current_price": float | None,
+            "currency": str,
+            "market_cap": float | None,
+            "description": str
+        }
+    """
+    market = _detect_market_type(symbol)
+    normalized_symbol = _normalize_symbol(symbol, market)
+
+    logger.info("Fetching stock info for %s (market: %s)", symbol, market)
+
+    # 1-5. 静态信息（Tushare → 本地数据库 → 硬编码 → Baostock → AkShare）
+    try:
+        stock_name, stock_sector, stock_industry = _get_static_stock_info(symbol)
+    except LookupError:
+        # 6. 如果还是没有，返回默认值
+        logger.warning("Not found in any data source, using default for %s", symbol)
         stock_name = symbol.upper()
         stock_sector = "其他"
         stock_industry = "其他"
@@ -565,7 +1029,7 @@ def get_stock_info(
         current_price = _get_realtime_price(normalized_symbol, market)
 
     # 确定货币
-    currency = "CNY" if market == 'A' else "HKD" if market == 'HK' else "USD"
+    currency = _MARKET_CURRENCY.get(market, "USD")
 
     return {
         "symbol": symbol.upper(),
@@ -579,75 +1043,82 @@ def get_stock_info(
     }
 
 
+def clear_stock_info_cache() -> None:
+    """清空股票静态信息（含持久化缓存）与实时股价缓存（供管理接口在数据源修正后调用）"""
+    _get_static_stock_info.cache_clear()
+    conn = _get_meta_db()
+    if conn is not None:
+        try:
+            with _META_DB_LOCK, conn:
+                conn.execute("DELETE FROM stock_meta")
+        except sqlite3.Error as e:
+            logger.warning("Stock metadata cache clear failed: %s", e)
+    with _PRICE_CACHE_LOCK:
+        _PRICE_CACHE.clear()
+
+
+async def aget_stock_info(symbol: str, fetch_price: bool = True) -> Optional[Dict]:
+    """
+    get_stock_info 的异步版本，供 async 接口调用
+
+    数据源 SDK 均为同步阻塞调用，放到线程池执行，避免阻塞事件循环上的其他请求。
+    """
+    return await asyncio.to_thread(get_stock_info, symbol, fetch_price)
+
+
 def get_weekly_performance(symbol: str, days: int = 7) -> Optional[Dict]:
     """获取股票週度表现（仅支持 A 股）"""
     market = _detect_market_type(symbol)
     normalized_symbol = _normalize_symbol(symbol, market)
 
-    print(f"[INFO] Fetching weekly performance for {symbol} (market: {market})")
+    logger.info("Fetching weekly performance for %s (market: %s)", symbol, market)
 
     if market != 'A':
-        print(f"[WARN] Weekly performance only supports A-shares, not {market}")  # noqa: E501
+        logger.warning("Weekly performance only supports A-shares, not %s", market)
         return None
 
     end_date = datetime.now()
-    start_date = end_date - timedelta(days=days + 10)
+    start_dash, start_compact = _format_date(end_date - timedelta(days=days + 10))
+    end_dash, end_compact = _format_date(end_date)
 
     try:
-        if _tushare_available:
+        fetcher = _get_data_fetcher()
+        if fetcher:
             # 使用 Tushare
-            fetcher = _get_data_fetcher()
-            if fetcher:
-                start_str = start_date.strftime('%Y-%m-%d')
-                end_str = end_date.strftime('%Y-%m-%d')
-                print(f"[DEBUG] Calling Tushare for {normalized_symbol}...")
+            logger.debug("Calling Tushare for %s...", normalized_symbol)
 
-                hist_df = fetcher.get_stock_daily(
-                    symbol=normalized_symbol,
-                    start_date=start_str,
-                    end_date=end_str
-                )
-            else:
-                # 降级到 AkShare
-                start_str = start_date.strftime('%Y%m%d')
-                end_str = end_date.strftime('%Y%m%d')
-                print(f"[DEBUG] Calling AkShare for {normalized_symbol}...")
-
-                hist_df = _retry_akshare_call(
-                    ak.stock_zh_a_hist,
-                    symbol=normalized_symbol,
-                    period="daily",
-                    start_date=start_str,
-                    end_date=end_str,
-                    adjust="qfq"
-                )
+            hist_df = fetcher.get_stock_daily(
+                symbol=normalized_symbol,
+                start_date=start_dash,
+                end_date=end_dash
+            )
         else:
-            # 只使用 AkShare
-            start_str = start_date.strftime('%Y%m%d')
-            end_str = end_date.strftime('%Y%m%d')
-            print(f"[DEBUG] Calling AkShare for {normalized_symbol}...")
+            # 降级到 AkShare
+            logger.debug("Calling AkShare for %s...", normalized_symbol)
 
             hist_df = _retry_akshare_call(
-                ak.stock_zh_a_hist,
+                _get_ak().stock_zh_a_hist,
                 symbol=normalized_symbol,
                 period="daily",
-                start_date=start_str,
-                end_date=end_str,
+                start_date=start_compact,
+                end_date=end_compact,
                 adjust="qfq"
             )
 
         if hist_df is None or hist_df.empty or len(hist_df) < 2:
-            print(f"[WARN] Insufficient data for {symbol}")
+            logger.warning("Insufficient data for %s", symbol)
             return None
 
-        hist_df = hist_df.sort_values('日期')
-        start_price = float(hist_df.iloc[0]['收盘'])
-        end_price = float(hist_df.iloc[-1]['收盘'])
+        # 只需要首尾两行：按日期取最早/最晚位置，无需整表排序
+        dates = pd.to_datetime(hist_df['日期'], errors='coerce').to_numpy()
+        closes = hist_df['收盘']
+        start_price = float(closes.iat[dates.argmin()])
+        end_price = float(closes.iat[dates.argmax()])
 
         price_change = end_price - start_price
         price_change_pct = (price_change / start_price) * 100 if start_price > 0 else 0
 
-        print(f"[OK] {symbol}: {price_change_pct:.2f}%")
+        logger.info("%s: %.2f%%", symbol, price_change_pct)
         return {
             "symbol": symbol,
             "start_price": round(start_price, 4),
@@ -658,17 +1129,84 @@ def get_weekly_performance(symbol: str, days: int = 7) -> Optional[Dict]:
         }
 
     except Exception as e:
-        print(f"[ERROR] Failed to fetch performance: {e}")
+        logger.error("Failed to fetch performance: %s", e)
         return None
 
 
+# 批量查询时同时在途的数据源请求上限（避免触发 Tushare/AkShare 限流）
+_STOCK_INFO_CONCURRENCY = 16
+
+# 批量接口共用的线程池（线程按需创建）
+_FETCH_POOL = ThreadPoolExecutor(
+    max_workers=_STOCK_INFO_CONCURRENCY, thread_name_prefix="stock-fetch")
+
+
+def _fetch_many(func, symbols: List[str], *args) -> List:
+    """在 _FETCH_POOL 中并发执行 func(symbol, *args)，结果与 symbols 顺序一致，单只失败时为 None"""
+    futures = [_FETCH_POOL.submit(func, symbol, *args) for symbol in symbols]
+    results = []
+    for symbol, future in zip(symbols, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            logger.warning("%s failed for %s: %s", func.__name__, symbol, e)
+            results.append(None)
+    return results
+
+
+def _prefetch_spot(symbols: List[str], fetch_price: bool) -> None:
+    """标的较多时先拉一次全市场快照，之后各只股票的股价直接从快照读取"""
+    if fetch_price and len(symbols) >= _SPOT_BATCH_MIN:
+        try:
+            _get_a_share_spot()
+        except Exception as e:
+            logger.warning("Spot snapshot failed, fetching prices per symbol: %s", e)
+
+
+def get_stock_info_many(
+    symbols: List[str],
+    fetch_price: bool = True
+) -> List[Optional[Dict]]:
+    """
+    并发获取多只股票的基本信息（含实时股价）
+
+    每个 symbol 在 _FETCH_POOL 中执行同步的 get_stock_info，网络等待相互重叠，
+    N 只股票的总耗时约等于最慢的一次请求，而不是逐个累加。
+
+    Args:
+        symbols: 股票代码列表
+        fetch_price: 是否获取实时股价（默认True）
+
+    Returns:
+        与 symbols 顺序一致的结果列表，单只失败时对应位置为 None
+    """
+    _prefetch_spot(symbols, fetch_price)
+    return _fetch_many(get_stock_info, symbols, fetch_price)
+
+
+async def get_stock_infos(
+    symbols: List[str],
+    fetch_price: bool = True
+) -> List[Optional[Dict]]:
+    """get_stock_info_many 的异步版本，供 async 接口调用（整批放到线程中执行，不阻塞事件循环）"""
+    return await asyncio.to_thread(get_stock_info_many, symbols, fetch_price)
+
+
+def get_weekly_performance_many(
+    symbols: List[str],
+    days: int = 7
+) -> List[Optional[Dict]]:
+    """并发获取多只股票的区间表现，结果与 symbols 顺序一致"""
+    return _fetch_many(get_weekly_performance, symbols, days)
+
+
 def validate_symbol(symbol: str) -> bool:
     """验证股票代码格式"""
     market = _detect_market_type(symbol)
     if market == 'UNKNOWN':
-        print(f"[WARN] Unknown symbol format: {symbol}")
+        logger.warning("Unknown symbol format: %s", symbol)
         return False
-    print(f"[INFO] Symbol {symbol} valid (market: {market})")
+    logger.info("Symbol %s valid (market: %s)", symbol, market)
     return True
 
 
@@ -677,6 +1215,52 @@ def validate_symbol(symbol: str) -> bool:
 # ============================================
 
 
+# 从配置读取 AkShare 重试参数（模块加载时解析一次，不在每次调用时导入配置）
+try:
+    from app.core.config import settings
+    _API_MAX_RETRIES = getattr(settings, 'API_MAX_RETRIES', 5)
+    _API_TIMEOUT_DEFAULT = getattr(settings, 'API_TIMEOUT_DEFAULT', 15)
+    _API_RETRY_DELAY = getattr(settings, 'API_RETRY_DELAY', 0.2)
+except ImportError:
+    _API_MAX_RETRIES = 5
+    _API_TIMEOUT_DEFAULT = 15
+    _API_RETRY_DELAY = 0.2
+
+# 指数退避的等待上限（秒）；服务端给出的 Retry-After 单独以 _AKSHARE_RETRY_AFTER_MAX 为上限
+_AKSHARE_BACKOFF_MAX = 5.0
+_AKSHARE_RETRY_AFTER_MAX = 30
+
+# 只重试 HTTP/连接/超时错误，以及限流时返回非 JSON 页面导致的 JSONDecodeError；
+# KeyError、ValueError、TypeError、AttributeError 等确定性错误重试也不会成功，直接抛出
+_AKSHARE_RETRYABLE_ERRORS = (
+    requests.RequestException,
+    ConnectionError,
+    TimeoutError,
+    json.JSONDecodeError,
+)
+
+
+def _is_retryable_error(error: Exception) -> bool:
+    """网络/超时/限流类错误可重试，其余错误不重试"""
+    return isinstance(error, _AKSHARE_RETRYABLE_ERRORS)
+
+
+def _akshare_backoff_delay(error: Exception, attempt: int, base: float) -> float:
+    """
+    计算重试等待时间：优先遵循异常所带响应的 Retry-After 头，
+    否则用 full jitter 指数退避，在 [0, min(上限, base * 2^attempt)] 内均匀取值，
+    使同时失败的大量请求错开重试时间
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    retry_after = headers.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), _AKSHARE_RETRY_AFTER_MAX)
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(_AKSHARE_BACKOFF_MAX, base * (2 ** attempt)))
+
+
 def _retry_akshare_call(
     func,
     *args,
@@ -685,42 +1269,70 @@ def _retry_akshare_call(
     **kwargs
 ):
     """带重试机制的 AkShare 调用"""
-    # 从配置读取默认值
-    try:
-        from app.core.config import settings
-        if max_retries is None:
-            max_retries = getattr(settings, 'API_MAX_RETRIES', 3)
-        if timeout is None:
-            timeout = getattr(settings, 'API_TIMEOUT_DEFAULT', 15)
-        retry_delay = getattr(settings, 'API_RETRY_DELAY', 2)
-    except ImportError:
-        if max_retries is None:
-            max_retries = 3
-        if timeout is None:
-            timeout = 15
-        retry_delay = 2
+    if max_retries is None:
+        max_retries = _API_MAX_RETRIES
+    if timeout is None:
+        timeout = _API_TIMEOUT_DEFAULT
+    retry_delay = _API_RETRY_DELAY
+
+    # 尝试添加超时参数（functools.partial、内置函数等没有 __code__，不添加）
+    if 'timeout' in getattr(getattr(func, '__code__', None), 'co_varnames', ()):
+        kwargs['timeout'] = timeout
 
     last_error = None
     for attempt in range(max_retries):
         try:
-            # 尝试添加超时参数
-            if 'timeout' in func.__code__.co_varnames:
-                kwargs['timeout'] = timeout
             return func(*args, **kwargs)
         except Exception as e:
             last_error = e
+            if not _is_retryable_error(e):
+                logger.error("API call failed with non-retryable error: %s", e)
+                raise
             if attempt < max_retries - 1:
-                wait_time = retry_delay * (attempt + 1)
-                print(
-                    f"[WARN] API call failed (attempt {attempt + 1}/"
-                    f"{max_retries}), retrying in {wait_time}s..."
-                )
+                wait_time = _akshare_backoff_delay(e, attempt, retry_delay)
+                logger.warning("API call failed (attempt %s/%s), retrying in %.1fs...",
+                               attempt + 1, max_retries, wait_time)
                 time.sleep(wait_time)
             else:
-                print(f"[ERROR] API call failed after {max_retries} attempts: {e}")
+                logger.error("API call failed after %s attempts: %s", max_retries, e)
     raise last_error
 
 
+# RSI → 市场情绪标签（区间左闭右开：RSI < 20 为极度恐慌）
+_RSI_THRESHOLDS = (20, 40, 60, 80)
+_RSI_LABELS = ("极度恐慌 (机会)", "恐慌", "中性", "贪婪", "极度贪婪 (风险)")
+
+# 健康分 → 操作信号（健康分 >= 80 为 STRONG_BUY）
+_SIGNAL_THRESHOLDS = (20, 40, 60, 80)
+_ACTION_SIGNALS = ("STRONG_SELL", "SELL", "HOLD", "BUY", "STRONG_BUY")
+
+
+def _sort_by_date(df: pd.DataFrame) -> pd.DataFrame:
+    """按日期升序排列；Tushare/AkShare 返回的数据通常已有序，此时直接返回原 DataFrame"""
+    if df['日期'].is_monotonic_increasing:
+        return df
+    return df.sort_values('日期')
+
+
+def _wilder_rsi(close: np.ndarray, length: int = 14) -> np.ndarray:
+    """
+    Wilder RSI：涨跌幅分别做 RMA (EMA, alpha=1/length) 平滑
+
+    返回与 close 等长的数组，前 length 个值为 NaN；区间内全部上涨时为 100。
+    """
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    gain[0] = loss[0] = np.nan
+
+    alpha = 1.0 / length
+    avg_gain = pd.Series(gain).ewm(alpha=alpha, adjust=False, min_periods=length).mean().to_numpy()
+    avg_loss = pd.Series(loss).ewm(alpha=alpha, adjust=False, min_periods=length).mean().to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 * avg_gain / (avg_gain + avg_loss)
+
+
 def get_market_sentiment() -> Optional[Dict]:
     """
     获取市场贪婪指数（基于沪深300 RSI）
@@ -735,119 +1347,71 @@ def get_market_sentiment() -> Optional[Dict]:
     """
     try:
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=90)  # 获取60个交易日左右
 
-        start_str = start_date.strftime('%Y-%m-%d')
-        end_str = end_date.strftime('%Y-%m-%d')
+        # 同一交易日内的重复请求直接复用结果（TTL 由 _CACHE 控制）
+        cache_key = f"sentiment:{_format_date(end_date)[0]}"
+        cached = _get_cache_key(cache_key)
+        if cached is not None:
+            return dict(cached)
 
-        print("[INFO] Fetching CSI 300 data for sentiment analysis...")
-
-        # 获取沪深300历史数据
-        hist_df = None
-        if _tushare_available:
-            fetcher = _get_data_fetcher()
-            if fetcher:
-                try:
-                    hist_df = fetcher.get_index_daily(
-                        symbol="000300",
-                        start_date=start_str,
-                        end_date=end_str
-                    )
-                    print("[INFO] Using Tushare Pro data source for index")
-                except Exception as e:
-                    print(f"[WARN] Tushare index data fetch failed: {e}, falling back to AkShare")
-                    hist_df = None
+        logger.info("Fetching CSI 300 data for sentiment analysis...")
 
-        # 如果 Tushare 失败或未启用，使用 AkShare
-        if hist_df is None:
-            print("[INFO] Using AkShare as fallback for index data")
-            try:
-                hist_df = _retry_akshare_call(
-                    ak.index_zh_a_hist,
-                    symbol="000300",
-                    period="daily",
-                    start_date=start_date.strftime('%Y%m%d'),
-                    end_date=end_date.strftime('%Y%m%d')
-                )
-            except Exception as e:
-                print(f"[WARN] AkShare index data fetch also failed: {e}")
-                hist_df = None
+        # 获取沪深300历史数据（与个股 Alpha 共用同一份缓存）
+        hist_df = _get_csi300_daily(end_date)
 
         # 如果两种数据源都失败，返回中性默认值
         if hist_df is None or hist_df.empty or len(hist_df) < 60:
-            print(
-                "[WARN] Insufficient CSI 300 data from all sources, "
-                "using neutral default"
-            )
+            logger.warning("Insufficient CSI 300 data from all sources, using neutral default")
             # 返回中性默认值
             return {
                 "score": 50.0,
                 "label": "中性 (数据暂不可用)",
                 "rsi": 50.0,
-                "date": datetime.now().strftime('%Y-%m-%d'),
+                "date": _format_date(end_date)[0],
                 "data_source": "default"
             }
 
-        hist_df = hist_df.sort_values('日期')
+        hist_df = _sort_by_date(hist_df)
 
-        # 计算RSI (使用pandas_ta)
-        try:
-            import pandas_ta as ta
-            close = hist_df['收盘'].values
-            rsi_values = ta.rsi(close, length=14)
-            current_rsi = float(rsi_values[-1])
-        except ImportError:
-            print("[WARN] pandas_ta not installed, using manual RSI calculation")
-            # 手动计算RSI
-            close = hist_df['收盘'].values
-            delta = pd.Series(close).diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi_values = 100 - (100 / (1 + rs))
-            current_rsi = float(rsi_values.iloc[-1])
+        # 计算RSI (Wilder 平滑，与 pandas_ta/TradingView 口径一致)
+        close = hist_df['收盘'].to_numpy(dtype=np.float64)
+        current_rsi = _latest_rsi(close, length=14)
 
         # RSI作为贪婪指数（RSI低=恐慌=贪婪机会高）
         # 我们反转RSI：RSI越低，市场越恐慌，贪婪指数越高
         greed_index = 100 - current_rsi
 
         # 标签映射
-        if current_rsi < 20:
-            label = "极度恐慌 (机会)"
-        elif current_rsi < 40:
-            label = "恐慌"
-        elif current_rsi < 60:
-            label = "中性"
-        elif current_rsi < 80:
-            label = "贪婪"
-        else:
-            label = "极度贪婪 (风险)"
+        label = _RSI_LABELS[bisect_right(_RSI_THRESHOLDS, current_rsi)]
 
-        print(f"[OK] Market sentiment: {label}, RSI={current_rsi:.2f}, Greed={greed_index:.2f}")
+        logger.info("Market sentiment: %s, RSI=%.2f, Greed=%.2f", label, current_rsi, greed_index)
 
         # 获取日期（确保是字符串格式）
-        date_value = hist_df.iloc[-1]['日期']
+        date_value = hist_df['日期'].iat[-1]
         if isinstance(date_value, str):
             date_str = date_value
         else:
             date_str = str(date_value)
 
-        return {
+        result = {
             "score": round(greed_index, 2),
             "label": label,
             "rsi": round(current_rsi, 2),
             "date": date_str
         }
+        _set_cache(cache_key, result)
+        return dict(result)
 
     except Exception as e:
-        print(f"[ERROR] Failed to calculate market sentiment: {e}")
-        import traceback
-        traceback.print_exc()
+        _log_exception("Failed to calculate market sentiment: %s", e)
         return None
 
 
 def _get_baostock_data(symbol: str, start_date, end_date):
-    """从 Baostock 获取股票数据"""
+    """从 Baostock 获取股票数据（仅支持A股）；调用方须持有 BAOSTOCK_SESSION_LOCK"""
+    if _detect_market_type(symbol) != 'A':
+        return None
+
     try:
         import baostock as bs
 
@@ -858,12 +1422,12 @@ def _get_baostock_data(symbol: str, start_date, end_date):
         market = 'sh' if symbol.startswith('6') else 'sz'
         bs_symbol = f"{market}.{symbol}"
 
-        # 获取历史数据
+        # 获取历史数据（只请求技术分析用到的字段，不再拉取 code 列）
         rs = bs.query_history_k_data_plus(
             bs_symbol,
-            fields="date,code,open,close,high,low,volume",
-            start_date=start_date.strftime('%Y-%m-%d'),
-            end_date=end_date.strftime('%Y-%m-%d'),
+            fields="date,open,close,high,low,volume",
+            start_date=_format_date(start_date)[0],
+            end_date=_format_date(end_date)[0],
             frequency="d",
             adjustflag="3"
         )
@@ -878,81 +1442,89 @@ def _get_baostock_data(symbol: str, start_date, end_date):
             return None
 
         # 转换为 DataFrame
-        df = pd.DataFrame(data_list)
-        df.columns = ['日期', '代码', '开盘', '收盘', '最高', '最低', '成交量']
+        df = pd.DataFrame(data_list, columns=['日期', '开盘', '收盘', '最高', '最低', '成交量'])
         df['日期'] = pd.to_datetime(df['日期'])
         for col in ['开盘', '收盘', '最高', '最低', '成交量']:
             df[col] = pd.to_numeric(df[col], errors='coerce')
 
         return df
     except Exception as e:
-        print(f"[WARN] Baostock data fetch failed: {e}")
+        logger.warning("Baostock data fetch failed: %s", e)
         return None
 
 
 def _get_akshare_data(symbol, start_date, end_date):
-    """从 AkShare 获取股票和指数数据"""
+    """从 AkShare 获取股票和指数数据（仅支持A股）"""
+    # 非A股代码在发起请求前直接返回，避免对无效代码走完整的重试流程
+    market = _detect_market_type(symbol)
+    if market != 'A':
+        logger.warning("AkShare daily data only supports A-shares, got %s", symbol)
+        return None, None
+
     try:
         # 标准化股票代码
-        market = _detect_market_type(symbol)
         normalized_symbol = _normalize_symbol(symbol, market)
+        start_compact = _format_date(start_date)[1]
+        end_compact = _format_date(end_date)[1]
 
         # 获取个股数据
         stock_df = _retry_akshare_call(
-            ak.stock_zh_a_hist,
+            _get_ak().stock_zh_a_hist,
             symbol=normalized_symbol,
-            start_date=start_date.strftime('%Y%m%d'),
-            end_date=end_date.strftime('%Y%m%d')
+            start_date=start_compact,
+            end_date=end_compact
         )
 
         # 获取沪深300作为基准
         try:
             index_df = _retry_akshare_call(
-                ak.index_zh_a_hist,
+                _get_ak().index_zh_a_hist,
                 symbol="000300",
                 period="daily",
-                start_date=start_date.strftime('%Y%m%d'),
-                end_date=end_date.strftime('%Y%m%d')
+                start_date=start_compact,
+                end_date=end_compact
             )
         except Exception as e:
-            print(f"[WARN] Failed to fetch index data: {e}")
+            logger.warning("Failed to fetch index data: %s", e)
             index_df = None
 
         return stock_df, index_df
     except Exception as e:
-        print(f"[ERROR] AkShare data fetch failed: {e}")
+        logger.error("AkShare data fetch failed: %s", e)
         return None, None
 
 
 def _try_tushare_data(symbol, start_date, end_date):
-    """尝试使用 Tushare 获取数据，失败则降级到 AkShare"""
+    """尝试使用 Tushare 获取数据，失败则降级到 AkShare（仅支持A股）"""
+    market = _detect_market_type(symbol)
+    if market != 'A':
+        logger.warning("Tushare daily data only supports A-shares, got %s", symbol)
+        return None, None
+
     try:
         fetcher = _get_data_fetcher()
         if fetcher:
-            print(f"[DATA SOURCE] Using Tushare Pro for {symbol}")
-            start_str = start_date.strftime('%Y-%m-%d')
-            end_str = end_date.strftime('%Y-%m-%d')
+            logger.info("[DATA SOURCE] Using Tushare Pro for %s", symbol)
+            start_str, _ = _format_date(start_date)
+            end_str, _ = _format_date(end_date)
 
             # 获取个股数据
             stock_df = fetcher.get_stock_daily(
-                symbol=_normalize_symbol(symbol, _detect_market_type(symbol)),
+                symbol=_normalize_symbol(symbol, market),
                 start_date=start_str,
                 end_date=end_str
             )
 
             # 获取沪深300作为基准
             try:
-                print(
-                    "[DATA SOURCE] Using Tushare Pro for index "
-                    "000300 (HS300)"
-                )
+                logger.info("[DATA SOURCE] Using Tushare Pro for index 000300 (HS300)")
                 index_df = fetcher.get_index_daily(
                     symbol="000300",
                     start_date=start_str,
                     end_date=end_str
                 )
             except Exception as e:
-                print(f"[WARN] Failed to fetch index data from Tushare: {e}")
+                logger.warning("Failed to fetch index data from Tushare: %s", e)
                 index_df = None
 
             if stock_df is not None and not stock_df.empty:
@@ -962,10 +1534,517 @@ def _try_tushare_data(symbol, start_date, end_date):
         else:
             raise Exception("Tushare not available")
     except Exception as e:
-        print(f"[WARN] Tushare failed, falling back to AkShare: {e}")
+        logger.warning("Tushare failed, falling back to AkShare: %s", e)
         return _get_akshare_data(symbol, start_date, end_date)
 
 
+def _tech_df_from_baostock(
+    symbol: str,
+    normalized_symbol: str,
+    start_date: datetime,
+    end_date: datetime
+) -> Optional[pd.DataFrame]:
+    """
+    Baostock 日线（技术分析备选源），失败、无数据或会话被占用时返回 None
+
+    Baostock 会话全进程只能串行使用；其他线程正在使用时不排队等待（否则会占住
+    _TECH_FALLBACK_POOL 的线程，让 AkShare 请求排在后面），直接由 AkShare 负责。
+    """
+    if not BAOSTOCK_SESSION_LOCK.acquire(blocking=False):
+        logger.info("Baostock session busy, skipping for %s", symbol)
+        return None
+    try:
+        logger.info("[DATA SOURCE] Using Baostock for %s", symbol)
+        stock_df = _get_baostock_data(symbol, start_date, end_date)
+        if stock_df is not None and not stock_df.empty:
+            logger.info("Baostock stock data fetched: %s records", len(stock_df))
+            return stock_df
+    except Exception as e:
+        logger.warning("Baostock failed: %s", e)
+    finally:
+        BAOSTOCK_SESSION_LOCK.release()
+    return None
+
+
+def _tech_df_from_akshare(
+    symbol: str,
+    normalized_symbol: str,
+    start_date: datetime,
+    end_date: datetime
+) -> Optional[pd.DataFrame]:
+    """AkShare 日线（技术分析备选源），失败或无数据返回 None"""
+    try:
+        logger.info("[DATA SOURCE] Using AkShare for %s", symbol)
+        stock_df = _retry_akshare_call(
+            _get_ak().stock_zh_a_hist,
+            symbol=normalized_symbol,
+            start_date=_format_date(start_date)[1],
+            end_date=_format_date(end_date)[1]
+        )
+        if stock_df is not None and not stock_df.empty:
+            logger.info("AkShare stock data fetched: %s records", len(stock_df))
+            return stock_df
+    except Exception as e:
+        logger.warning("AkShare failed: %s", e)
+    return None
+
+
+# Tushare 失败后 Baostock / AkShare 同时发出，先返回有效数据者胜出；
+# 每个调用方占两个线程，按批量接口的并发上限配置，避免不同调用方的请求互相排队
+_TECH_FALLBACK_POOL = ThreadPoolExecutor(
+    max_workers=2 * _STOCK_INFO_CONCURRENCY, thread_name_prefix="tech-fallback")
+
+
+def _fetch_technical_stock_df(
+    symbol: str,
+    normalized_symbol: str,
+    start_date: datetime,
+    end_date: datetime
+) -> Optional[pd.DataFrame]:
+    """
+    获取技术分析用的个股日线，数据源优先级: Tushare → (Baostock | AkShare)
+
+    Tushare 为主数据源，单独请求；失败时两个备选源并发请求，取先返回的有效数据，
+    避免某个备选源超时后才开始尝试下一个。
+    """
+    start_dash, _ = _format_date(start_date)
+    end_dash, _ = _format_date(end_date)
+
+    # 1. 首先尝试 Tushare
+    fetcher = _get_data_fetcher()
+    if fetcher:
+        try:
+            logger.info("[DATA SOURCE] Using Tushare Pro for %s", symbol)
+            stock_df = fetcher.get_stock_daily(
+                symbol=normalized_symbol,
+                start_date=start_dash,
+                end_date=end_dash
+            )
+            if stock_df is not None and not stock_df.empty:
+                logger.info("Tushare stock data fetched: %s records", len(stock_df))
+                return stock_df
+            logger.warning("Tushare returned empty data")
+        except Exception as e:
+            logger.warning("Tushare failed, trying fallbacks: %s", e)
+
+    # 2. 备选：Baostock 与 AkShare 并发
+    sources = [_tech_df_from_akshare]
+    if _baostock_available:
+        sources.insert(0, _tech_df_from_baostock)
+
+    pending = {
+        _TECH_FALLBACK_POOL.submit(source, symbol, normalized_symbol, start_date, end_date)
+        for source in sources
+    }
+    # 两个请求都会立即开始执行，落选者无法取消，会在后台跑完、结果丢弃
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            stock_df = future.result()
+            if stock_df is not None:
+                return stock_df
+
+    return None
+
+
+def _fetch_index_df(start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
+    """获取沪深300日线（Alpha 基准），数据源优先级: Tushare → AkShare"""
+    start_dash, start_compact = _format_date(start_date)
+    end_dash, end_compact = _format_date(end_date)
+
+    fetcher = _get_data_fetcher()
+    if fetcher:
+        try:
+            index_df = fetcher.get_index_daily(
+                symbol="000300",
+                start_date=start_dash,
+                end_date=end_dash
+            )
+            if index_df is not None and not index_df.empty:
+                return index_df
+        except Exception as e:
+            logger.warning("Failed to fetch index data from Tushare: %s", e)
+
+    try:
+        return _retry_akshare_call(
+            _get_ak().index_zh_a_hist,
+            symbol="000300",
+            period="daily",
+            start_date=start_compact,
+            end_date=end_compact
+        )
+    except Exception as e:
+        logger.warning("Failed to fetch index data: %s", e)
+        return None
+
+
+# 沪深300日线回看的自然日数（约 120 个交易日），覆盖情绪指数（>= 60 个交易日）与 Alpha 的需要
+_CSI300_LOOKBACK_DAYS = 180
+# Redis 中的沪深300日线缓存时长（秒）；进程内缓存仍按 _CACHE_TTL 过期
+_CSI300_REDIS_TTL = 3600
+
+
+def _get_csi300_daily(end_date: datetime) -> Optional[pd.DataFrame]:
+    """
+    获取截至 end_date 的沪深300日线，按自然日缓存
+
+    市场情绪与个股技术分析（Alpha 基准）共用同一份数据，刷新看板时只请求一次指数行情。
+    返回的 DataFrame 为共享缓存对象，调用方不得原地修改。
+    """
+    cache_key = f"csi300:{_format_date(end_date)[0]}"
+    cached = _get_cache_key(cache_key)
+    if cached is not None:
+        return cached
+
+    index_df = _redis_get_df(cache_key)
+    if index_df is None:
+        index_df = _fetch_index_df(end_date - timedelta(days=_CSI300_LOOKBACK_DAYS), end_date)
+        if index_df is None or index_df.empty:
+            return index_df
+        _redis_set_df(cache_key, index_df, _CSI300_REDIS_TTL)
+    _set_cache(cache_key, index_df)
+    return index_df
+
+
+def _tail_mean(values: np.ndarray, window: int) -> Optional[float]:
+    """最近 window 个值的均值（即最新一期的简单移动平均），数据不足或含 NaN 时返回 None"""
+    if values.size < window:
+        return None
+    mean = float(values[-window:].mean())
+    return None if np.isnan(mean) else mean
+
+
+def _latest_rsi(close: np.ndarray, length: int = 14) -> float:
+    """最新一期的 Wilder RSI（与市场情绪同一口径）；数据不足或无法计算时返回 NaN"""
+    if close.size <= length:
+        return float('nan')
+    return float(_wilder_rsi(close, length)[-1])
+
+
+# 投资名言（技术分析结果中随机附带一条）
+_QUOTES = (
+    "在别人贪婪时恐惧，在别人恐惧时贪婪。(巴菲特)",
+    "时间是优秀企业的朋友。(巴菲特)",
+    "趋势是你的朋友。(杰西·利弗莫尔)",
+    "截断亏损，让利润奔跑。(亚历山大·埃尔德)",
+    "投资最重要的品质是理智，而不是智力。(巴菲特)",
+    "股市从短期看是投票机，从长期看是称重机。(巴菲特)",
+)
+_QUOTE_RNG = random.Random()
+
+# K线形态表：代码 → (形态, 信号, 健康分调整)，代码 0 为默认
+_KLINE_PATTERNS: Tuple[Tuple[str, str, int], ...] = (
+    ("普通震荡", "neutral", 0),
+    ("金针探底", "bullish", 5),
+    ("冲高回落", "bearish", -5),
+    ("变盘十字星", "warning", 0),
+    ("光头大阳线", "bullish", 5),
+    ("光脚大阴线", "bearish", -5),
+)
+
+
+def _kline_pattern_codes(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray
+) -> np.ndarray:
+    """
+    向量化识别每根K线的形态，返回 _KLINE_PATTERNS 中的代码数组
+
+    多个条件同时成立时按 _KLINE_PATTERNS 顺序取第一个；
+    "金针探底" 需要前5日下跌（前一日收盘低于5日前收盘），前5根K线没有足够历史，视为非下跌。
+    """
+    body = np.abs(close - open_)
+    upper_shadow = high - np.maximum(close, open_)
+    lower_shadow = np.minimum(close, open_) - low
+    price_range = high - low
+
+    is_downtrend = np.zeros(close.shape, dtype=bool)
+    is_downtrend[5:] = close[4:-1] < close[:-5]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        open_change = (close - open_) / open_
+
+    conditions = [
+        (lower_shadow > 2 * body) & (lower_shadow > 0.02 * close) & (body < 0.03 * close) & is_downtrend,
+        (upper_shadow > 2 * body) & (upper_shadow > 0.02 * close) & (body < 0.03 * close),
+        (body < 0.001 * close) & (price_range > 0.01 * close),
+        (close > open_) & (open_change > 0.03) & (upper_shadow < 0.005 * close),
+        (close < open_) & (-open_change > 0.03) & (lower_shadow < 0.005 * close),
+    ]
+    return np.select(conditions, np.arange(1, len(_KLINE_PATTERNS)), default=0)
+
+
+def _compute_technical_analysis(
+    symbol: str,
+    stock_df: Optional[pd.DataFrame],
+    index_df: Optional[pd.DataFrame]
+) -> Dict:
+    """根据个股与沪深300日线计算 Sentinel Ultra 技术指标（纯计算，无网络请求）"""
+    # 降低最小数据要求：30天足够计算MA20、布林带等核心指标
+    # 原60天要求对Baostock等数据源过严（90天范围通常只有60-65个交易日）
+    MIN_DATA_DAYS = 30
+    if stock_df is None or stock_df.empty or len(stock_df) < MIN_DATA_DAYS:
+        logger.warning("Insufficient data for %s (need %s days, got %s)",
+                       symbol, MIN_DATA_DAYS, len(stock_df) if stock_df is not None else 0)
+        # 数据不足时返回部分可计算的指标，而不是全部None
+        # 这样至少能显示价格信息
+        pass  # 继续处理，在后续计算中处理空值
+
+    stock_df = _sort_by_date(stock_df)
+
+    # ========================================
+    # 1. 高级指标计算 (NumPy)
+    # ========================================
+
+    # OHLCV 一次性转成数组，后续只按位置取值；评分只需要最新一期的指标，
+    # 直接对数组尾部窗口计算，不再为整段历史生成 rolling 列
+    open_, high, low, close, volume = (
+        stock_df[col].to_numpy(dtype=np.float64)
+        for col in ('开盘', '最高', '最低', '收盘', '成交量')
+    )
+    current_price = float(close[-1])
+
+    # 基础均线
+    ma5 = _tail_mean(close, 5)
+    ma20 = _tail_mean(close, 20)
+    ma60 = _tail_mean(close, 60)
+
+    # VWAP (20日成交量加权平均价) - 筹码成本
+    vwap_20 = current_price
+    if close.size >= 20:
+        vwap = float((close[-20:] * volume[-20:]).sum() / volume[-20:].sum())
+        if not np.isnan(vwap):
+            vwap_20 = vwap
+
+    # Bollinger Bands (20, 2)，标准差与 pandas rolling().std() 一致取 ddof=1
+    bb_upper = bb_middle = bb_lower = bandwidth = None
+    if ma20 is not None:
+        std_20 = float(close[-20:].std(ddof=1))
+        bb_middle = ma20
+        bb_upper = ma20 + 2 * std_20
+        bb_lower = ma20 - 2 * std_20
+        bandwidth = (bb_upper - bb_lower) / ma20
+
+    # RSI (14日, Wilder 平滑)
+    rsi = _latest_rsi(close, 14)
+    rsi_14 = rsi if not np.isnan(rsi) else 50
+
+    # 换手率 (如果AkShare数据中包含)
+    turnover = None
+    if '换手率' in stock_df.columns:
+        value = stock_df['换手率'].iat[-1]
+        turnover = float(value) if not pd.isna(value) else None
+
+    # 均线状态 - 处理None值
+    ma20_status = "站上均线" if ma20 and current_price > ma20 else ("跌破均线" if ma20 else "数据不足")
+    ma5_status = "站上MA5" if ma5 and current_price > ma5 else ("跌破MA5" if ma5 else "数据不足")
+
+    # 量能分析
+    # nanmean 与 pandas mean 一样跳过缺失值
+    volume_20 = np.nanmean(volume[-20:])
+    volume_prev_20 = np.nanmean(volume[-40:-20]) if volume.size > 40 else volume_20
+
+    if volume_prev_20 > 0:
+        volume_change_pct = ((volume_20 - volume_prev_20) / volume_prev_20) * 100
+        if volume_change_pct > 10:
+            volume_status = "放量"
+        elif volume_change_pct < -10:
+            volume_status = "缩量"
+        else:
+            volume_status = "持平"
+    else:
+        volume_change_pct = 0
+        volume_status = "持平"
+
+    # 价格变化
+    price_change = (current_price - float(close[-2])) / float(close[-2])
+
+    # Alpha计算（相对沪深300，使用最近5个交易日）
+    if index_df is not None and not index_df.empty:
+        index_close = _sort_by_date(index_df)['收盘'].to_numpy(dtype=np.float64)
+        stock_return = (current_price / close[-5] - 1.0) * 100
+        index_return = (index_close[-1] / index_close[-5] - 1.0) * 100
+        alpha = float(stock_return - index_return)
+    else:
+        alpha = 0.0
+
+    # ========================================
+    # 2. Sentinel Ultra 评分逻辑 (核心算法)
+    # ========================================
+
+    health_score = 50  # 基础分
+
+    # --- A. 筹码与成本 (VWAP) [权重 ±15] ---
+    # 逻辑：价格在成本之上=获利盘(支撑)；在成本之下=套牢盘(压力)
+    if current_price > vwap_20:
+        health_score += 15
+    else:
+        health_score -= 15
+
+    # --- B. 趋势与均线 (Trend) [权重 ±20] ---
+    # 逻辑：保留 Pro 版的缓冲带逻辑
+    pct_diff_ma20 = (current_price - ma20) / ma20
+    if pct_diff_ma20 > 0.03:
+        health_score += 15
+    elif 0 < pct_diff_ma20 <= 0.03:
+        health_score += 5
+    elif -0.03 <= pct_diff_ma20 <= 0:
+        health_score -= 5
+    else:
+        health_score -= 15
+
+    if current_price > ma60:
+        health_score += 5  # 长期趋势加分
+
+    # --- C. 爆发潜力 (Bollinger Squeeze) [权重 +10] ---
+    # 逻辑：低波动率意味着变盘在即。配合趋势向上是绝佳买点。
+    if bandwidth < 0.15:  # 布林带极度收窄
+        if current_price > ma20:  # 趋势向上且收窄 -> 蓄势待发
+            health_score += 10
+        else:  # 趋势向下且收窄 -> 可能暴跌
+            health_score -= 5
+
+    # --- D. 活跃度 (Turnover) [权重 ±10] ---
+    # 逻辑：拒绝僵尸股，警惕过热股
+    if turnover is not None:
+        if turnover < 1.0:
+            health_score -= 10  # 僵尸股
+        elif 3.0 <= turnover <= 12.0:
+            health_score += 10  # 黄金活跃区
+        elif turnover > 20.0:
+            health_score -= 10  # 情绪过热风险
+
+    # --- E. 量价配合 (Volume) [权重 ±15] ---
+    # 逻辑：保留 Pro 版 (缩量回调是好事)
+    if price_change > 0:
+        if volume_status == "放量":
+            health_score += 15
+        elif volume_status == "缩量":
+            health_score -= 5
+    else:
+        if volume_status == "放量":
+            health_score -= 15
+        elif volume_status == "缩量":
+            health_score += 10  # 惜售/洗盘
+
+    # --- F. 情绪风控 (RSI) [权重 -20 ~ +10] ---
+    if rsi_14 > 80:
+        health_score -= 20  # 超买惩罚
+    elif rsi_14 < 20:
+        health_score += 10  # 超跌奖励
+
+    # Final Clamp
+    health_score = max(0, min(100, health_score))
+
+    # K线形态识别 (保留原逻辑，但权重降低到 +/- 5)
+    # 只需最新一根K线，传入最近6根（判断前5日趋势所需）
+    pattern_code = int(_kline_pattern_codes(
+        open_[-6:], high[-6:], low[-6:], close[-6:]
+    )[-1])
+    k_line_pattern, pattern_signal, pattern_delta = _KLINE_PATTERNS[pattern_code]
+    health_score = max(0, min(100, health_score + pattern_delta))
+
+    # 生成操作建议信号
+    action_signal = _ACTION_SIGNALS[bisect_right(_SIGNAL_THRESHOLDS, health_score)]
+
+    # 生成AI分析文本 (增强版，包含新指标)
+    analysis_parts = []
+
+    # 趋势分析
+    if current_price > ma20:
+        analysis_parts.append("站上MA20均线")
+        if current_price > vwap_20:
+            analysis_parts.append("高于筹码成本(VWAP)")
+    else:
+        analysis_parts.append("跌破MA20均线")
+        if current_price < vwap_20:
+            analysis_parts.append("低于筹码成本")
+
+    # 布林带分析
+    if bandwidth < 0.15:
+        if current_price > ma20:
+            analysis_parts.append("布林带收窄蓄势待发")
+        else:
+            analysis_parts.append("布林带收窄需谨慎")
+    elif current_price > bb_upper:
+        analysis_parts.append("突破布林带上轨")
+    elif current_price < bb_lower:
+        analysis_parts.append("跌破布林带下轨")
+
+    # Alpha分析
+    if alpha > 3:
+        analysis_parts.append(f"显著跑赢大盘(+{alpha:.1f}%)")
+    elif alpha < -3:
+        analysis_parts.append(f"明显弱于大盘({alpha:.1f}%)")  # noqa: E501
+
+    # RSI分析
+    if rsi_14 > 70:
+        analysis_parts.append("RSI超买警惕回调")
+    elif rsi_14 < 30:
+        analysis_parts.append("RSI超跌可能反弹")
+
+    # 换手率分析
+    if turnover is not None:
+        if turnover < 1:
+            analysis_parts.append("交投冷清")
+        elif turnover > 15:
+            analysis_parts.append("交投过度活跃")
+
+    # 根据信号给出建议
+    if action_signal in ["STRONG_BUY", "BUY"]:
+        advice = "建议积极配置或逢低买入。"
+    elif action_signal == "HOLD":
+        advice = "建议持有观望。"
+    else:
+        advice = "建议减仓或止盈防守。"
+
+    analysis = "，".join(analysis_parts) + "。" + advice
+
+    # 投资名言 (保留)
+    quote = _QUOTES[_QUOTE_RNG.randrange(len(_QUOTES))]
+
+    logger.info("%s Sentinel Ultra: Score=%s, VWAP=%.2f, BB_Width=%.3f, RSI=%.1f, Turnover=%s",
+                symbol, health_score, vwap_20, bandwidth, rsi_14, turnover)
+
+    # 获取日期
+    date_value = stock_df['日期'].iat[-1]
+    if isinstance(date_value, str):
+        date_str = date_value
+    else:
+        date_str = str(date_value)
+
+    result = {
+        "symbol": symbol,
+        "current_price": round(current_price, 2),
+        "ma5": round(ma5, 2),
+        "ma20": round(ma20, 2),
+        "ma60": round(ma60, 2),
+        "ma20_status": ma20_status,
+        "ma5_status": ma5_status,
+        "volume_status": volume_status,
+        "volume_change_pct": round(volume_change_pct, 2),
+        "alpha": round(alpha, 2),
+        "health_score": round(health_score, 0),
+        "k_line_pattern": k_line_pattern,
+        "pattern_signal": pattern_signal,
+        "action_signal": action_signal,
+        "analysis": analysis,
+        "quote": quote,
+        # 新增高级指标
+        "vwap_20": round(vwap_20, 2),
+        "bollinger_upper": round(bb_upper, 2),
+        "bollinger_middle": round(bb_middle, 2),
+        "bollinger_lower": round(bb_lower, 2),
+        "bandwidth": round(bandwidth, 4),
+        "turnover": round(turnover, 2) if turnover is not None else None,
+        "rsi_14": round(rsi_14, 2),
+        "date": date_str
+    }
+    return result
+
+
 def get_stock_technical_analysis(symbol: str) -> Optional[Dict]:
     """
     Sentinel Ultra 技术分析 - 引入市场微观结构和筹码分布概念
@@ -994,431 +2073,128 @@ def get_stock_technical_analysis(symbol: str) -> Optional[Dict]:
     normalized_symbol = _normalize_symbol(symbol, market)
 
     if market != 'A':
-        print(f"[WARN] Technical analysis only supports A-shares, not {market}")
+        logger.warning("Technical analysis only supports A-shares, not %s", market)
         return None
 
     try:
         end_date = datetime.now()
+
+        cache_key = f"tech:{normalized_symbol}:{_format_date(end_date)[0]}"
+        cached = _get_cache_key(cache_key)
+        if cached is not None:
+            return dict(cached)
+
         # 扩展数据获取范围到180天，确保有足够的交易日数据
         # 180个自然日 ≈ 120-130个交易日，足以计算MA60等技术指标
         start_date = end_date - timedelta(days=180)
 
-        start_str = start_date.strftime('%Y-%m-%d')
-        end_str = end_date.strftime('%Y-%m-%d')
-
-        print(f"[INFO] Fetching technical data for {symbol}...")
+        logger.info("Fetching technical data for %s...", symbol)
 
-        # 数据源优先级: Tushare → Baostock → AkShare
-        stock_df = None
-        index_df = None
+        # 个股与沪深300互不依赖，并行下载，总耗时取两者中较慢的一个
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            stock_future = executor.submit(
+                _fetch_technical_stock_df, symbol, normalized_symbol, start_date, end_date
+            )
+            index_future = executor.submit(_get_csi300_daily, end_date)
+            stock_df = stock_future.result()
+            index_df = index_future.result()
 
-        # 1. 首先尝试 Tushare
-        if _tushare_available:
-            try:
-                fetcher = _get_data_fetcher()
-                if fetcher:
-                    print(f"[DATA SOURCE] Using Tushare Pro for {symbol}")
-                    stock_df = fetcher.get_stock_daily(
-                        symbol=normalized_symbol,
-                        start_date=start_str,
-                        end_date=end_str
-                    )
-                    if stock_df is not None and not stock_df.empty:
-                        print(f"[OK] Tushare stock data fetched: {len(stock_df)} records")
-                    else:
-                        print("[WARN] Tushare returned empty data")
-                        stock_df = None
+        result = _compute_technical_analysis(symbol, stock_df, index_df)
+        _set_cache(cache_key, result)
+        return dict(result)
 
-                    # 获取沪深300作为基准
-                    try:
-                        index_df = fetcher.get_index_daily(
-                            symbol="000300",
-                            start_date=start_str,
-                            end_date=end_str
-                        )
-                    except Exception as e:
-                        print(f"[WARN] Failed to fetch index data from Tushare: {e}")
-            except Exception as e:
-                print(f"[WARN] Tushare failed, trying Baostock: {e}")
+    except Exception as e:
+        _log_exception("Failed to analyze %s: %s", symbol, e)
+        return None
 
-        # 2. 备选：尝试 Baostock
-        if (stock_df is None or stock_df.empty) and _baostock_available:
-            try:
-                print(f"[DATA SOURCE] Using Baostock for {symbol}")
-                stock_df = _get_baostock_data(symbol, start_date, end_date)
-                index_df = None  # Baostock 暂不支持指数数据
-                if stock_df is not None and not stock_df.empty:
-                    print(f"[OK] Baostock stock data fetched: {len(stock_df)} records")
-            except Exception as e:
-                print(f"[WARN] Baostock failed: {e}")
 
-        # 3. 最后备选：AkShare
-        if stock_df is None or stock_df.empty:
-            try:
-                print(f"[DATA SOURCE] Using AkShare for {symbol}")
-                stock_df = _retry_akshare_call(
-                    ak.stock_zh_a_hist,
-                    symbol=normalized_symbol,
-                    start_date=start_date.strftime('%Y%m%d'),
-                    end_date=end_date.strftime('%Y%m%d')
-                )
-                if stock_df is not None and not stock_df.empty:
-                    print(f"[OK] AkShare stock data fetched: {len(stock_df)} records")
+# Tushare daily 单次最多返回约 6000 行：180 个自然日 ≈ 125 个交易日，每批 40 只约 5000 行
+_BATCH_TECH_CHUNK = 40
 
-                # 获取沪深300
-                try:
-                    index_df = _retry_akshare_call(
-                        ak.index_zh_a_hist,
-                        symbol="000300",
-                        period="daily",
-                        start_date=start_date.strftime('%Y%m%d'),
-                        end_date=end_date.strftime('%Y%m%d')
-                    )
-                except Exception as e:
-                    print(f"[WARN] Failed to fetch index data: {e}")
-                    index_df = None
-            except Exception as e:
-                print(f"[WARN] AkShare failed: {e}")
-
-        # 降低最小数据要求：30天足够计算MA20、布林带等核心指标
-        # 原60天要求对Baostock等数据源过严（90天范围通常只有60-65个交易日）
-        MIN_DATA_DAYS = 30
-        if stock_df is None or stock_df.empty or len(stock_df) < MIN_DATA_DAYS:
-            print(f"[WARN] Insufficient data for {symbol} (need {MIN_DATA_DAYS} days, got {len(stock_df) if stock_df is not None else 0})")
-            # 数据不足时返回部分可计算的指标，而不是全部None
-            # 这样至少能显示价格信息
-            pass  # 继续处理，在后续计算中处理空值
-
-        stock_df = stock_df.sort_values('日期').reset_index(drop=True)
-
-        # ========================================
-        # 1. 高级指标计算 (使用 Pandas)
-        # ========================================
-
-        # 基础均线
-        stock_df['MA5'] = stock_df['收盘'].rolling(window=5).mean()
-        stock_df['MA20'] = stock_df['收盘'].rolling(window=20).mean()
-        stock_df['MA60'] = stock_df['收盘'].rolling(window=60).mean()
-
-        # VWAP (20日成交量加权平均价) - 筹码成本
-        stock_df['VWAP_20'] = (
-            (stock_df['收盘'] * stock_df['成交量']).rolling(
-                window=20).sum() /
-            stock_df['成交量'].rolling(window=20).sum()
-        )
 
-        # Bollinger Bands (20, 2)
-        stock_df['BB_Middle'] = stock_df['收盘'].rolling(window=20).mean()
-        std_20 = stock_df['收盘'].rolling(window=20).std()
-        stock_df['BB_Upper'] = stock_df['BB_Middle'] + 2 * std_20
-        stock_df['BB_Lower'] = stock_df['BB_Middle'] - 2 * std_20
-        stock_df['BB_Width'] = (stock_df['BB_Upper'] - stock_df['BB_Lower']) / stock_df['BB_Middle']
-
-        # RSI (14日)
-        delta = stock_df['收盘'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        stock_df['RSI_14'] = 100 - (100 / (1 + rs))
-
-        # 获取最新数据
-        latest = stock_df.iloc[-1]
-        current_price = float(latest['收盘'])
-        open_price = float(latest['开盘'])
-        high_price = float(latest['最高'])
-        low_price = float(latest['最低'])
-
-        # 处理可能为NaN的指标值
-        ma5 = float(latest['MA5']) if not pd.isna(latest['MA5']) else None
-        ma20 = float(latest['MA20']) if not pd.isna(latest['MA20']) else None
-        ma60 = float(latest['MA60']) if not pd.isna(latest['MA60']) else None
-        vwap_20 = float(latest['VWAP_20']) if not pd.isna(latest['VWAP_20']) else current_price
-        bb_upper = float(latest['BB_Upper']) if not pd.isna(latest['BB_Upper']) else None
-        bb_middle = float(latest['BB_Middle']) if not pd.isna(latest['BB_Middle']) else None
-        bb_lower = float(latest['BB_Lower']) if not pd.isna(latest['BB_Lower']) else None
-        bandwidth = float(latest['BB_Width']) if not pd.isna(latest.get('BB_Width', pd.NA)) else None
-        rsi_14 = float(latest['RSI_14']) if not pd.isna(latest['RSI_14']) else 50
-
-        # 换手率 (如果AkShare数据中包含)
-        turnover = None
-        if '换手率' in stock_df.columns:
-            turnover = float(latest['换手率']) if not pd.isna(latest['换手率']) else None
-
-        # 均线状态 - 处理None值
-        ma20_status = "站上均线" if ma20 and current_price > ma20 else ("跌破均线" if ma20 else "数据不足")
-        ma5_status = "站上MA5" if ma5 and current_price > ma5 else ("跌破MA5" if ma5 else "数据不足")
-
-        # 量能分析
-        volume_20 = stock_df.tail(20)['成交量'].mean()
-        volume_prev_20 = (
-            stock_df.iloc[-40:-20]['成交量'].mean()
-            if len(stock_df) > 40 else volume_20
-        )
+def get_batch_technical(symbols: List[str]) -> Dict[str, Dict]:
+    """
+    批量技术分析（自选股列表等场景）
 
-        if volume_prev_20 > 0:
-            volume_change_pct = ((volume_20 - volume_prev_20) / volume_prev_20) * 100
-            if volume_change_pct > 10:
-                volume_status = "放量"
-            elif volume_change_pct < -10:
-                volume_status = "缩量"
-            else:
-                volume_status = "持平"
-        else:
-            volume_change_pct = 0
-            volume_status = "持平"
+    Tushare daily 支持多代码查询：每 _BATCH_TECH_CHUNK 只股票一次请求拉取日线，
+    沪深300 只拉取一次，再按 ts_code 分组复用 _compute_technical_analysis。
+    Tushare 不可用、请求失败或个别股票无数据时，剩余股票并发回退到
+    get_stock_technical_analysis。
 
-        # 价格变化
-        price_change = (
-            (current_price - float(stock_df.iloc[-2]['收盘'])) /
-            float(stock_df.iloc[-2]['收盘'])
-        )
+    Returns:
+        {symbol: 技术分析结果}，无法分析的股票不出现在结果中
+    """
+    end_date = datetime.now()
+    today = _format_date(end_date)[0]
+    results: Dict[str, Dict] = {}
+    pending: Dict[str, str] = {}  # normalized_symbol -> symbol
 
-        # Alpha计算（相对沪深300，使用最近5个交易日）
-        if index_df is not None and not index_df.empty:
-            index_df = index_df.sort_values('日期')
-            stock_start_price = float(stock_df.iloc[-5]['收盘'])
-            stock_end_price = current_price
-            index_start_price = float(index_df.iloc[-5]['收盘'])
-            index_end_price = float(index_df.iloc[-1]['收盘'])
-            stock_return = (stock_end_price - stock_start_price) / stock_start_price * 100
-            index_return = (index_end_price - index_start_price) / index_start_price * 100
-            alpha = stock_return - index_return
+    for symbol in symbols:
+        market = _detect_market_type(symbol)
+        if market != 'A':
+            continue
+        normalized_symbol = _normalize_symbol(symbol, market)
+        cached = _get_cache_key(f"tech:{normalized_symbol}:{today}")
+        if cached is not None:
+            results[symbol] = dict(cached)
         else:
-            alpha = 0.0
-
-        # ========================================
-        # 2. Sentinel Ultra 评分逻辑 (核心算法)
-        # ========================================
+            pending[normalized_symbol] = symbol
 
-        health_score = 50  # 基础分
-
-        # --- A. 筹码与成本 (VWAP) [权重 ±15] ---
-        # 逻辑：价格在成本之上=获利盘(支撑)；在成本之下=套牢盘(压力)
-        if current_price > vwap_20:
-            health_score += 15
-        else:
-            health_score -= 15
+    fetcher = _get_data_fetcher()
+    if pending and fetcher:
+        start_date = end_date - timedelta(days=180)
+        start_dash, _ = _format_date(start_date)
+        index_df = _get_csi300_daily(end_date)
+        codes = list(pending)
+        for i in range(0, len(codes), _BATCH_TECH_CHUNK):
+            chunk = codes[i:i + _BATCH_TECH_CHUNK]
+            try:
+                frame = fetcher.get_stock_daily_batch(chunk, start_date=start_dash, end_date=today)
+            except Exception as e:
+                logger.warning("Batch daily fetch failed for %s symbols: %s", len(chunk), e)
+                continue
+            if frame is None or frame.empty:
+                continue
+
+            for ts_code, stock_df in frame.groupby('ts_code', sort=False):
+                normalized_symbol = ts_code.split('.', 1)[0]
+                symbol = pending.get(normalized_symbol)
+                if symbol is None:
+                    continue
+                try:
+                    result = _compute_technical_analysis(
+                        symbol, stock_df.drop(columns='ts_code'), index_df
+                    )
+                except Exception as e:
+                    logger.warning("Batch analysis failed for %s: %s", symbol, e)
+                    continue
+                _set_cache(f"tech:{normalized_symbol}:{today}", result)
+                results[symbol] = dict(result)
+                del pending[normalized_symbol]
+
+    # 回退：剩余股票在 _FETCH_POOL 中并发走完整的多数据源路径
+    # （调用方不得在 _FETCH_POOL 线程中调用本函数，否则可能等待自身所在线程池）
+    remaining = list(pending.values())
+    for symbol, result in zip(remaining, _fetch_many(get_stock_technical_analysis, remaining)):
+        if result is not None:
+            results[symbol] = result
 
-        # --- B. 趋势与均线 (Trend) [权重 ±20] ---
-        # 逻辑：保留 Pro 版的缓冲带逻辑
-        pct_diff_ma20 = (current_price - ma20) / ma20
-        if pct_diff_ma20 > 0.03:
-            health_score += 15
-        elif 0 < pct_diff_ma20 <= 0.03:
-            health_score += 5
-        elif -0.03 <= pct_diff_ma20 <= 0:
-            health_score -= 5
-        else:
-            health_score -= 15
+    return results
 
-        if current_price > ma60:
-            health_score += 5  # 长期趋势加分
-
-        # --- C. 爆发潜力 (Bollinger Squeeze) [权重 +10] ---
-        # 逻辑：低波动率意味着变盘在即。配合趋势向上是绝佳买点。
-        if bandwidth < 0.15:  # 布林带极度收窄
-            if current_price > ma20:  # 趋势向上且收窄 -> 蓄势待发
-                health_score += 10
-            else:  # 趋势向下且收窄 -> 可能暴跌
-                health_score -= 5
-
-        # --- D. 活跃度 (Turnover) [权重 ±10] ---
-        # 逻辑：拒绝僵尸股，警惕过热股
-        if turnover is not None:
-            if turnover < 1.0:
-                health_score -= 10  # 僵尸股
-            elif 3.0 <= turnover <= 12.0:
-                health_score += 10  # 黄金活跃区
-            elif turnover > 20.0:
-                health_score -= 10  # 情绪过热风险
-
-        # --- E. 量价配合 (Volume) [权重 ±15] ---
-        # 逻辑：保留 Pro 版 (缩量回调是好事)
-        if price_change > 0:
-            if volume_status == "放量":
-                health_score += 15
-            elif volume_status == "缩量":
-                health_score -= 5
-        else:
-            if volume_status == "放量":
-                health_score -= 15
-            elif volume_status == "缩量":
-                health_score += 10  # 惜售/洗盘
-
-        # --- F. 情绪风控 (RSI) [权重 -20 ~ +10] ---
-        if rsi_14 > 80:
-            health_score -= 20  # 超买惩罚
-        elif rsi_14 < 20:
-            health_score += 10  # 超跌奖励
-
-        # Final Clamp
-        health_score = max(0, min(100, health_score))
-
-        # K线形态识别 (保留原逻辑，但权重降低)
-        k_line_pattern = "普通震荡"
-        pattern_signal = "neutral"
-
-        body = abs(current_price - open_price)
-        upper_shadow = high_price - max(current_price, open_price)
-        lower_shadow = min(current_price, open_price) - low_price
-        price_range = high_price - low_price
-
-        if len(stock_df) >= 6:
-            recent_5 = stock_df.iloc[-6:-1]['收盘'].values
-            is_downtrend = recent_5[-1] < recent_5[0]
-        else:
-            is_downtrend = False
-
-        # 形态识别 (权重降低到 +/- 5)
-        if (lower_shadow > 2 * body and lower_shadow > 0.02 * current_price and
-                body < 0.03 * current_price and is_downtrend):
-            k_line_pattern = "金针探底"
-            pattern_signal = "bullish"
-            health_score = min(100, health_score + 5)
-        elif (upper_shadow > 2 * body and upper_shadow > 0.02 * current_price and
-              body < 0.03 * current_price):
-            k_line_pattern = "冲高回落"
-            pattern_signal = "bearish"
-            health_score = max(0, health_score - 5)
-        elif body < 0.001 * current_price and price_range > 0.01 * current_price:
-            k_line_pattern = "变盘十字星"
-            pattern_signal = "warning"
-        elif (current_price > open_price and
-              (current_price - open_price) / open_price > 0.03 and
-              upper_shadow < 0.005 * current_price):
-            k_line_pattern = "光头大阳线"
-            pattern_signal = "bullish"
-            health_score = min(100, health_score + 5)
-        elif (current_price < open_price and
-              (open_price - current_price) / open_price > 0.03 and
-              lower_shadow < 0.005 * current_price):
-            k_line_pattern = "光脚大阴线"
-            pattern_signal = "bearish"
-            health_score = max(0, health_score - 5)
-
-        # 生成操作建议信号
-        if health_score >= 80:
-            action_signal = "STRONG_BUY"
-        elif health_score >= 60:
-            action_signal = "BUY"
-        elif health_score >= 40:
-            action_signal = "HOLD"
-        elif health_score >= 20:
-            action_signal = "SELL"
-        else:
-            action_signal = "STRONG_SELL"
 
-        # 生成AI分析文本 (增强版，包含新指标)
-        analysis_parts = []
+async def aget_market_sentiment() -> Optional[Dict]:
+    """get_market_sentiment 的异步版本（线程池执行，不阻塞事件循环）"""
+    return await asyncio.to_thread(get_market_sentiment)
 
-        # 趋势分析
-        if current_price > ma20:
-            analysis_parts.append("站上MA20均线")
-            if current_price > vwap_20:
-                analysis_parts.append("高于筹码成本(VWAP)")
-        else:
-            analysis_parts.append("跌破MA20均线")
-            if current_price < vwap_20:
-                analysis_parts.append("低于筹码成本")
-
-        # 布林带分析
-        if bandwidth < 0.15:
-            if current_price > ma20:
-                analysis_parts.append("布林带收窄蓄势待发")
-            else:
-                analysis_parts.append("布林带收窄需谨慎")
-        elif current_price > bb_upper:
-            analysis_parts.append("突破布林带上轨")
-        elif current_price < bb_lower:
-            analysis_parts.append("跌破布林带下轨")
-
-        # Alpha分析
-        if alpha > 3:
-            analysis_parts.append(f"显著跑赢大盘(+{alpha:.1f}%)")
-        elif alpha < -3:
-            analysis_parts.append(f"明显弱于大盘({alpha:.1f}%)")  # noqa: E501
-
-        # RSI分析
-        if rsi_14 > 70:
-            analysis_parts.append("RSI超买警惕回调")
-        elif rsi_14 < 30:
-            analysis_parts.append("RSI超跌可能反弹")
-
-        # 换手率分析
-        if turnover is not None:
-            if turnover < 1:
-                analysis_parts.append("交投冷清")
-            elif turnover > 15:
-                analysis_parts.append("交投过度活跃")
-
-        # 根据信号给出建议
-        if action_signal in ["STRONG_BUY", "BUY"]:
-            advice = "建议积极配置或逢低买入。"
-        elif action_signal == "HOLD":
-            advice = "建议持有观望。"
-        else:
-            advice = "建议减仓或止盈防守。"
-
-        analysis = "，".join(analysis_parts) + "。" + advice
-
-        # 投资名言 (保留)
-        quotes = [
-            "在别人贪婪时恐惧，在别人恐惧时贪婪。(巴菲特)",
-            "时间是优秀企业的朋友。(巴菲特)",
-            "趋势是你的朋友。(杰西·利弗莫尔)",
-            "截断亏损，让利润奔跑。(亚历山大·埃尔德)",
-            "投资最重要的品质是理智，而不是智力。(巴菲特)",
-            "股市从短期看是投票机，从长期看是称重机。(巴菲特)"
-        ]
-        import random
-        quote = random.choice(quotes)
-
-        print(
-            f"[OK] {symbol} Sentinel Ultra: Score={health_score}, "
-            f"VWAP={vwap_20:.2f}, BB_Width={bandwidth:.3f}, "
-            f"RSI={rsi_14:.1f}, Turnover={turnover}"
-        )
 
-        # 获取日期
-        date_value = latest['日期']
-        if isinstance(date_value, str):
-            date_str = date_value
-        else:
-            date_str = str(date_value)
+async def aget_stock_technical_analysis(symbol: str) -> Optional[Dict]:
+    """get_stock_technical_analysis 的异步版本（线程池执行，不阻塞事件循环）"""
+    return await asyncio.to_thread(get_stock_technical_analysis, symbol)
 
-        return {
-            "symbol": symbol,
-            "current_price": round(current_price, 2),
-            "ma5": round(ma5, 2),
-            "ma20": round(ma20, 2),
-            "ma60": round(ma60, 2),
-            "ma20_status": ma20_status,
-            "ma5_status": ma5_status,
-            "volume_status": volume_status,
-            "volume_change_pct": round(volume_change_pct, 2),
-            "alpha": round(alpha, 2),
-            "health_score": round(health_score, 0),
-            "k_line_pattern": k_line_pattern,
-            "pattern_signal": pattern_signal,
-            "action_signal": action_signal,
-            "analysis": analysis,
-            "quote": quote,
-            # 新增高级指标
-            "vwap_20": round(vwap_20, 2),
-            "bollinger_upper": round(bb_upper, 2),
-            "bollinger_middle": round(bb_middle, 2),
-            "bollinger_lower": round(bb_lower, 2),
-            "bandwidth": round(bandwidth, 4),
-            "turnover": round(turnover, 2) if turnover is not None else None,
-            "rsi_14": round(rsi_14, 2),
-            "date": date_str
-        }
 
-    except Exception as e:
-        print(f"[ERROR] Failed to analyze {symbol}: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+async def aget_batch_technical(symbols: List[str]) -> Dict[str, Dict]:
+    """get_batch_technical 的异步版本（线程池执行，不阻塞事件循环）"""
+    return await asyncio.to_thread(get_batch_technical, symbols)
 
 
 # ============================================
@@ -1454,34 +2230,24 @@ def get_market_snapshot(symbol: str) -> Optional[Dict]:
     normalized_symbol = _normalize_symbol(symbol, market)
 
     if market != 'A':
-        print(
-            f"[WARN] Market snapshot only supports A-shares, not {market}"
-        )  # noqa: E501
+        logger.warning("Market snapshot only supports A-shares, not %s", market)
         return None
 
     try:
-        print(f"[INFO] Fetching market snapshot for {symbol}...")
+        logger.info("Fetching market snapshot for %s...", symbol)
 
-        # 获取实时行情数据
-        timeout = (
-            getattr(settings, 'API_TIMEOUT_FAST', 10) if
-            'settings' in dir() else 10
-        )
-        spot_info = _retry_akshare_call(
-            ak.stock_zh_a_spot_em, timeout=timeout
-        )
+        # 获取实时行情数据（全市场快照，TTL 内复用）
+        spot_info = _get_a_share_spot()
 
-        if spot_info is None or spot_info.empty:
-            print(f"[WARN] Failed to fetch spot data for {symbol}")
+        if spot_info is None:
+            logger.warning("Failed to fetch spot data for %s", symbol)
             return None
 
-        stock_info = spot_info[spot_info['代码'] == normalized_symbol]
-
-        if stock_info.empty:
-            print(f"[WARN] Symbol {symbol} not found in spot data")
+        if normalized_symbol not in spot_info.index:
+            logger.warning("Symbol %s not found in spot data", symbol)
             return None
 
-        stock_row = stock_info.iloc[0]
+        stock_row = spot_info.loc[normalized_symbol]
 
         # 基础价格数据
         current_price = _safe_float(stock_row.get('最新价', 0))
@@ -1519,10 +2285,10 @@ def get_market_snapshot(symbol: str) -> Optional[Dict]:
                 "volume_ratio": round(volume_ratio, 2) if volume_ratio else None
             }
 
-            print(f"[OK] {symbol} PE:{pe_ttm} PB:{pb} MV:{total_mv}亿 ROE:{roe:.2f}%")
+            logger.info("%s PE:%s PB:%s MV:%s亿 ROE:%.2f%%", symbol, pe_ttm, pb, total_mv, roe)
 
         except Exception as e:
-            print(f"[WARN] Failed to extract fundamentals for {symbol}: {e}")
+            logger.warning("Failed to extract fundamentals for %s: %s", symbol, e)
             fundamentals = {"error": "数据缺失"}
 
         result = {
@@ -1537,12 +2303,15 @@ def get_market_snapshot(symbol: str) -> Optional[Dict]:
         return result
 
     except Exception as e:
-        print(f"[ERROR] Failed to get market snapshot for {symbol}: {e}")
-        import traceback
-        traceback.print_exc()
+        _log_exception("Failed to get market snapshot for %s: %s", symbol, e)
         return None
 
 
+async def aget_market_snapshot(symbol: str) -> Optional[Dict]:
+    """get_market_snapshot 的异步版本（线程池执行，不阻塞事件循环）"""
+    return await asyncio.to_thread(get_market_snapshot, symbol)
+
+
 # ============================================
 # 财务指标分析 - 支持 AI 投委会
 # ============================================
@@ -1565,7 +2334,6 @@ def _fetch_tushare_data_parallel(fetcher, normalized_symbol: str, start_date: da
             'dividend_df': DataFrame
         }
     """
-    import time
     results = {
         'stock_df': None,
         'index_df': None,
@@ -1574,20 +2342,26 @@ def _fetch_tushare_data_parallel(fetcher, normalized_symbol: str, start_date: da
         'dividend_df': None
     }
 
+    # 各并行任务的日期参数只格式化一次（end_date 即调用时刻）
+    start_dash = _format_date(start_date)[0]
+    end_dash = _format_date(end_date)[0]
+    month_ago_dash = _format_date(end_date - timedelta(days=30))[0]
+    year_ago_dash = _format_date(end_date - timedelta(days=365))[0]
+
     def fetch_stock():
         start = time.time()
         try:
             df = fetcher.get_stock_daily(
                 symbol=normalized_symbol,
-                start_date=start_date.strftime('%Y-%m-%d'),
-                end_date=end_date.strftime('%Y-%m-%d')
+                start_date=start_dash,
+                end_date=end_dash
             )
             elapsed = time.time() - start
-            print(f"[TIMING] get_stock_daily: {elapsed:.2f}s")
+            logger.info("[TIMING] get_stock_daily: %.2fs", elapsed)
             return ('stock_df', df)
         except Exception as e:
             elapsed = time.time() - start
-            print(f"[TIMING] get_stock_daily failed: {elapsed:.2f}s - {str(e)[:50]}")
+            logger.info("[TIMING] get_stock_daily failed: %.2fs - %s", elapsed, str(e)[:50])
             return ('stock_df', None)
 
     def fetch_index():
@@ -1595,65 +2369,65 @@ def _fetch_tushare_data_parallel(fetcher, normalized_symbol: str, start_date: da
         try:
             df = fetcher.get_index_daily(
                 symbol="000300",
-                start_date=start_date.strftime('%Y-%m-%d'),
-                end_date=end_date.strftime('%Y-%m-%d')
+                start_date=start_dash,
+                end_date=end_dash
             )
             elapsed = time.time() - start
-            print(f"[TIMING] get_index_daily: {elapsed:.2f}s")
+            logger.info("[TIMING] get_index_daily: %.2fs", elapsed)
             return ('index_df', df)
         except Exception as e:
             elapsed = time.time() - start
-            print(f"[TIMING] get_index_daily failed: {elapsed:.2f}s - {str(e)[:50]}")
+            logger.info("[TIMING] get_index_daily failed: %.2fs - %s", elapsed, str(e)[:50])
             return ('index_df', None)
 
     def fetch_daily_basic():
         start = time.time()
         try:
-            basic_end = datetime.now()
-            basic_start = basic_end - timedelta(days=30)
             df = fetcher.get_daily_basic(
                 symbol=normalized_symbol,
-                start_date=basic_start.strftime('%Y-%m-%d'),
-                end_date=basic_end.strftime('%Y-%m-%d')
+                start_date=month_ago_dash,
+                end_date=end_dash
             )
             elapsed = time.time() - start
-            print(f"[TIMING] get_daily_basic: {elapsed:.2f}s")
+            logger.info("[TIMING] get_daily_basic: %.2fs", elapsed)
             return ('daily_basic_df', df)
         except Exception as e:
             elapsed = time.time() - start
-            print(f"[TIMING] get_daily_basic failed: {elapsed:.2f}s - {str(e)[:50]}")
+            logger.info("[TIMING] get_daily_basic failed: %.2fs - %s", elapsed, str(e)[:50])
             return ('daily_basic_df', None)
 
     def fetch_fina_indicator():
         timing_start = time.time()
         try:
-            end = datetime.now()
-            start_date = end - timedelta(days=365)
-            df = fetcher.get_financial_indicator(
-                symbol=normalized_symbol,
-                start_date=start_date.strftime('%Y-%m-%d'),
-                end_date=end.strftime('%Y-%m-%d')
+            df = _cached_report(
+                'tushare_fina_indicator', normalized_symbol,
+                lambda: fetcher.get_financial_indicator(
+                    symbol=normalized_symbol,
+                    start_date=year_ago_dash,
+                    end_date=end_dash
+                )
             )
             elapsed = time.time() - timing_start
-            print(f"[TIMING] get_financial_indicator: {elapsed:.2f}s")
+            logger.info("[TIMING] get_financial_indicator: %.2fs", elapsed)
             return ('fina_indicator_df', df)
         except Exception as e:
             elapsed = time.time() - timing_start
-            print(f"[TIMING] get_financial_indicator failed: {elapsed:.2f}s - {str(e)[:50]}")
+            logger.info("[TIMING] get_financial_indicator failed: %.2fs - %s", elapsed, str(e)[:50])
             return ('fina_indicator_df', None)
 
     def fetch_dividend():
         timing_start = time.time()
         try:
-            end = datetime.now()
-            start_date = end - timedelta(days=365)
-            df = fetcher.get_dividend_data(
-                symbol=normalized_symbol,
-                start_date=start_date.strftime('%Y-%m-%d'),
-                end_date=end.strftime('%Y-%m-%d')
+            df = _cached_report(
+                'tushare_dividend', normalized_symbol,
+                lambda: fetcher.get_dividend_data(
+                    symbol=normalized_symbol,
+                    start_date=year_ago_dash,
+                    end_date=end_dash
+                )
             )
             elapsed = time.time() - timing_start
-            print(f"[TIMING] get_dividend_data: {elapsed:.2f}s")
+            logger.info("[TIMING] get_dividend_data: %.2fs", elapsed)
             return ('dividend_df', df)
         except Exception as e:
             return ('dividend_df', None)  # 常失败，不打印
@@ -1673,12 +2447,17 @@ def _fetch_tushare_data_parallel(fetcher, normalized_symbol: str, start_date: da
                 key, value = future.result()
                 results[key] = value
             except Exception as e:
-                print(f"[WARN] Parallel task failed: {str(e)[:50]}")
+                logger.warning("Parallel task failed: %s", str(e)[:50])
 
-    print(f"[TIMING] 并行获取Tushare数据完成")
+    logger.info("[TIMING] 并行获取Tushare数据完成")
     return results
 
 
+# calculate_financial_metrics 中 AkShare 财报/指数请求的并发线程池
+# （独立于 _FETCH_POOL，批量计算时外层任务等待内层任务不会互相占满）
+_FUNDAMENTALS_POOL = ThreadPoolExecutor(max_workers=6, thread_name_prefix="fundamentals")
+
+
 def calculate_financial_metrics(symbol: str) -> Dict:
     """
     计算股票的硬核财务指标，为 AI 投委会提供数据支撑
@@ -1723,10 +2502,7 @@ def calculate_financial_metrics(symbol: str) -> Dict:
     normalized_symbol = _normalize_symbol(symbol, market)
 
     if market != 'A':
-        print(
-            f"[WARN] Financial metrics only supports A-shares, "
-            f"not {market}"
-        )  # noqa: E501
+        logger.warning("Financial metrics only supports A-shares, not %s", market)
         return {
             "symbol": symbol.upper(),
             "market": market,
@@ -1735,7 +2511,7 @@ def calculate_financial_metrics(symbol: str) -> Dict:
         }
 
     try:
-        print(f"[INFO] Calculating financial metrics for {symbol}...")
+        logger.info("Calculating financial metrics for %s...", symbol)
 
         # ============================================
         # 优先使用 Tushare 获取数据
@@ -1749,7 +2525,7 @@ def calculate_financial_metrics(symbol: str) -> Dict:
                 fetcher = _get_data_fetcher()
                 if fetcher:
                     # ⚡ 性能优化：并行获取所有Tushare数据
-                    print(f"[DATA SOURCE] Using Tushare Pro (PARALLEL) for {symbol}")
+                    logger.info("[DATA SOURCE] Using Tushare Pro (PARALLEL) for %s", symbol)
                     end_date = datetime.now()
                     start_date = end_date - timedelta(days=120)
 
@@ -1764,18 +2540,20 @@ def calculate_financial_metrics(symbol: str) -> Dict:
                     dividend_df = parallel_results['dividend_df']
 
                     if stock_df is not None and not stock_df.empty:
-                        print(f"[OK] Tushare price data fetched: {len(stock_df)} records")
+                        logger.info("Tushare price data fetched: %s records", len(stock_df))
                     else:
-                        print("[WARN] Tushare returned empty stock data, falling back to AkShare")
+                        logger.warning("Tushare returned empty stock data, falling back to AkShare")
                         stock_df = None
 
                     if index_df is None:
-                        print("[WARN] Parallel index fetch failed, will use AkShare fallback later")
+                        logger.warning("Parallel index fetch failed, will use AkShare fallback later")
 
                     # 处理并行获取的基本面数据
                     if daily_basic_df is not None and not daily_basic_df.empty:
                         latest = daily_basic_df.iloc[-1]
-                        print(f"[DEBUG] Tushare daily_basic columns: {list(daily_basic_df.columns)}")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Tushare daily_basic columns: %s",
+                                         list(daily_basic_df.columns))
 
                         fundamental_data['pe_ratio'] = (
                             _safe_float(latest[TUSHARE_PE_TTM_FIELD])
@@ -1802,12 +2580,10 @@ def calculate_financial_metrics(symbol: str) -> Dict:
                             if TUSHARE_TURNOVER_RATE_FIELD in daily_basic_df.columns
                             else None
                         )
-                        print(
-                            f"[OK] Tushare daily_basic: "
-                            f"PE={fundamental_data.get('pe_ratio')}, "
-                            f"PB={fundamental_data.get('pb_ratio')}, "
-                            f"Turnover={fundamental_data.get('turnover_rate')}"
-                        )
+                        logger.info("Tushare daily_basic: PE=%s, PB=%s, Turnover=%s",
+                                    fundamental_data.get('pe_ratio'),
+                                    fundamental_data.get('pb_ratio'),
+                                    fundamental_data.get('turnover_rate'))
 
                     # 处理财务指标数据
                     if fina_indicator_df is not None and not fina_indicator_df.empty:
@@ -1818,11 +2594,8 @@ def calculate_financial_metrics(symbol: str) -> Dict:
                         fundamental_data['debt_to_equity'] = _safe_float(
                             latest.get('debt_to_assets', None)
                         )
-                        print(
-                            f"[OK] Tushare fina_indicator: "
-                            f"ROE={fundamental_data.get('roe')}, "
-                            f"D/E={fundamental_data.get('debt_to_equity')}"
-                        )
+                        logger.info("Tushare fina_indicator: ROE=%s, D/E=%s",
+                                    fundamental_data.get('roe'), fundamental_data.get('debt_to_equity'))
 
                     # 处理分红数据
                     if dividend_df is not None and not dividend_df.empty:
@@ -1831,34 +2604,58 @@ def calculate_financial_metrics(symbol: str) -> Dict:
                             if 'cash_div' in dividend_df.columns else 0
                         )
                         fundamental_data['total_dividend'] = total_dividend
-                        print(f"[OK] Tushare dividend data: total_dividend={total_dividend}")
+                        logger.info("Tushare dividend data: total_dividend=%s", total_dividend)
 
                     # 如果所有数据都已获取，跳过后续数据源
                     if all(
                         fundamental_data.get(k) is not None
                         for k in ['pe_ratio', 'pb_ratio', 'roe']
                     ):
-                        print("[OK] Tushare complete data, skipping other sources")
+                        logger.info("Tushare complete data, skipping other sources")
             except Exception as e:
-                print(f"[WARN] Tushare connection error: {e}, falling back to AkShare")
+                logger.warning("Tushare connection error: %s, falling back to AkShare", e)
                 stock_df = None
                 index_df = None
             except Exception as e:
-                print(f"[WARN] Tushare financial metrics failed: {e}, falling back to AkShare")
+                logger.warning("Tushare financial metrics failed: %s, falling back to AkShare", e)
                 stock_df = None
                 index_df = None
 
+        end_date = datetime.now()
+        start_str = _format_date(end_date - timedelta(days=120))[1]
+        end_str = _format_date(end_date)[1]
+
+        # AkShare 财报接口与沪深300互不依赖，先并发发出，
+        # 与下面的价格 / Baostock / 行情快照获取重叠，总耗时约为最慢的一个而不是逐个相加
+        report_futures = {
+            endpoint: _FUNDAMENTALS_POOL.submit(_cached_report, endpoint, normalized_symbol, fetch)
+            for endpoint, fetch in (
+                ('ak_financial_analysis_indicator',
+                 lambda: _get_ak().stock_financial_analysis_indicator_em(symbol=normalized_symbol)),
+                ('ak_cash_flow_sheet',
+                 lambda: _get_ak().stock_cash_flow_sheet_by_report_em(symbol=normalized_symbol)),
+                ('ak_profit_sheet',
+                 lambda: _get_ak().stock_profit_sheet_by_report_em(symbol=normalized_symbol)),
+            )
+        }
+        index_future = None
+        if index_df is None:
+            index_future = _FUNDAMENTALS_POOL.submit(
+                lambda: _retry_akshare_call(
+                    _get_ak().index_zh_a_hist,
+                    symbol="000300",
+                    period="daily",
+                    start_date=start_str,
+                    end_date=end_str
+                )
+            )
+
         # ============================================
         # 1. 获取价格数据 (如果 Tushare 失败，使用 AkShare)
         # ============================================
         if stock_df is None:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=120)
-            start_str = start_date.strftime('%Y%m%d')
-            end_str = end_date.strftime('%Y%m%d')
-
             stock_df = _retry_akshare_call(
-                ak.stock_zh_a_hist,
+                _get_ak().stock_zh_a_hist,
                 symbol=normalized_symbol,
                 period="daily",
                 start_date=start_str,
@@ -1866,30 +2663,21 @@ def calculate_financial_metrics(symbol: str) -> Dict:
             )
 
         if stock_df is None or stock_df.empty or len(stock_df) < 20:
-            print(f"[WARN] Insufficient price data for {symbol}")
+            logger.warning("Insufficient price data for %s", symbol)
             return _build_financial_fallback(symbol, market, "Insufficient price data")
 
-        stock_df = stock_df.sort_values('日期')
+        stock_df = _sort_by_date(stock_df)
 
         # 获取沪深300数据 (用于计算 Beta)
-        if index_df is None:
-            index_df = _retry_akshare_call(
-                ak.index_zh_a_hist,
-                symbol="000300",
-                period="daily",
-                start_date=start_str,
-                end_date=end_str
-            )
+        if index_future is not None:
+            index_df = index_future.result()
 
         # ============================================
         # 2. 备选：使用 Baostock 获取财务指标（如果Tushare没有返回完整数据）
         # ============================================
         if _baostock_available and not fundamental_data.get('pe_ratio'):
             try:
-                print(
-                    f"[DATA SOURCE] Using Baostock for {symbol} "
-                    "financial metrics"
-                )
+                logger.info("[DATA SOURCE] Using Baostock for %s financial metrics", symbol)
                 baostock_result = get_financials_baostock(symbol)
                 if baostock_result and baostock_result.get('metrics'):
                     metrics = baostock_result['metrics']
@@ -1919,13 +2707,10 @@ def calculate_financial_metrics(symbol: str) -> Dict:
                         fundamental_data['market_cap'] = metrics.get(
                             'market_cap'
                         )
-                    print(
-                        f"[OK] Baostock financial data: "
-                        f"PE={fundamental_data.get('pe_ratio')}, "
-                        f"ROE={fundamental_data.get('roe')}"
-                    )
+                    logger.info("Baostock financial data: PE=%s, ROE=%s",
+                                fundamental_data.get('pe_ratio'), fundamental_data.get('roe'))
             except Exception as e:
-                print(f"[WARN] Baostock financial metrics failed: {e}")
+                logger.warning("Baostock financial metrics failed: %s", e)
 
         # 3. 最后备选：使用 AkShare 获取财务指标
         # 性能优化：如果 Tushare/Baostock 已提供完整数据，跳过耗时的 stock_zh_a_spot_em 调用
@@ -1939,36 +2724,36 @@ def calculate_financial_metrics(symbol: str) -> Dict:
         if not _essential_fields_present:
             try:
                 # 获取个股信息 (包含 PE, PB)
-                print("[DATA SOURCE] Using AkShare stock_zh_a_spot_em for PE/PB/market_cap")
-                stock_info = ak.stock_zh_a_spot_em()
-                if stock_info is not None and not stock_info.empty:
-                    stock_row = stock_info[
-                        stock_info['代码'] == normalized_symbol
-                    ]
-                    if not stock_row.empty:
-                        if not fundamental_data.get('pe_ratio'):
-                            fundamental_data['pe_ratio'] = _safe_float(
-                                stock_row.iloc[0].get('市盈率-动态', None)
-                            )
-                        if not fundamental_data.get('pb_ratio'):
-                            fundamental_data['pb_ratio'] = _safe_float(
-                                stock_row.iloc[0].get('市净率', None)
-                            )
-                        if not fundamental_data.get('market_cap'):
-                            fundamental_data['market_cap'] = _safe_float(
-                                stock_row.iloc[0].get('总市值', None)
-                            )
+                # 优先读取已缓存的全市场快照；只缺总市值时用单只股票的个股信息接口（约 10 行），
+                # 缺 PE/PB 时才下载全市场快照（与实时股价/行情快照共用，按 代码 索引直接定位）
+                stock_info = _get_a_share_spot(refresh=False)
+                if (stock_info is None
+                        and fundamental_data.get('pe_ratio') is not None
+                        and fundamental_data.get('pb_ratio') is not None):
+                    logger.info("[DATA SOURCE] Using AkShare stock_individual_info_em for market_cap")
+                    info_df = _get_ak().stock_individual_info_em(symbol=normalized_symbol)
+                    if info_df is not None and not info_df.empty:
+                        fundamental_data['market_cap'] = _safe_float(_pick_info_items(info_df, '总市值')[0])
+                elif stock_info is None:
+                    logger.info("[DATA SOURCE] Using AkShare stock_zh_a_spot_em for PE/PB/market_cap")
+                    stock_info = _get_a_share_spot()
+                if stock_info is not None and normalized_symbol in stock_info.index:
+                    stock_row = stock_info.loc[normalized_symbol]
+                    if not fundamental_data.get('pe_ratio'):
+                        fundamental_data['pe_ratio'] = _safe_float(stock_row.get('市盈率-动态', None))
+                    if not fundamental_data.get('pb_ratio'):
+                        fundamental_data['pb_ratio'] = _safe_float(stock_row.get('市净率', None))
+                    if not fundamental_data.get('market_cap'):
+                        fundamental_data['market_cap'] = _safe_float(stock_row.get('总市值', None))
             except Exception as e:
-                print(f"[WARN] Failed to fetch spot data: {e}")
+                logger.warning("Failed to fetch spot data: %s", e)
         else:
-            print("[DATA SOURCE] Skipping AkShare stock_zh_a_spot_em - PE/PB/market_cap already available from Tushare/Baostock")
+            logger.info("[DATA SOURCE] Skipping AkShare stock_zh_a_spot_em - PE/PB/market_cap already available from Tushare/Baostock")
 
         try:
             # 获取财务数据 (ROE, 负债率, 研发投入等)
             # AkShare 财务接口: ak.stock_financial_analysis_indicator_em
-            financial_df = ak.stock_financial_analysis_indicator_em(
-                symbol=normalized_symbol
-            )
+            financial_df = report_futures['ak_financial_analysis_indicator'].result()
             if financial_df is not None and not financial_df.empty:
                 # 获取最新一期的财务数据
                 latest = financial_df.iloc[0]
@@ -1982,13 +2767,11 @@ def calculate_financial_metrics(symbol: str) -> Dict:
                     latest.get('研发费用', None)
                 )
         except Exception as e:
-            print(f"[WARN] Failed to fetch financial analysis: {e}")
+            logger.warning("Failed to fetch financial analysis: %s", e)
 
         try:
             # 获取现金流数据 (用于 FCF Yield)
-            cashflow_df = ak.stock_cash_flow_sheet_by_report_em(
-                symbol=normalized_symbol
-            )
+            cashflow_df = report_futures['ak_cash_flow_sheet'].result()
             if cashflow_df is not None and not cashflow_df.empty:
                 latest_cf = cashflow_df.iloc[0]
                 # 经营活动现金流
@@ -1997,13 +2780,11 @@ def calculate_financial_metrics(symbol: str) -> Dict:
                 )
                 fundamental_data['operating_cash_flow'] = ocf
         except Exception as e:
-            print(f"[WARN] Failed to fetch cash flow data: {e}")
+            logger.warning("Failed to fetch cash flow data: %s", e)
 
         try:
             # 获取营收数据 (用于计算 CAGR)
-            profit_df = ak.stock_profit_sheet_by_report_em(
-                symbol=normalized_symbol
-            )
+            profit_df = report_futures['ak_profit_sheet'].result()
             if profit_df is not None and not profit_df.empty and len(
                 profit_df
             ) >= 3:
@@ -2021,7 +2802,7 @@ def calculate_financial_metrics(symbol: str) -> Dict:
                     cagr = _calculate_cagr(revenues)
                     fundamental_data['revenue_growth_cagr'] = cagr
         except Exception as e:
-            print(f"[WARN] Failed to fetch profit data: {e}")
+            logger.warning("Failed to fetch profit data: %s", e)
 
         # ============================================
         # 3. 计算动量指标 (RSI, Beta, Volatility)
@@ -2031,7 +2812,7 @@ def calculate_financial_metrics(symbol: str) -> Dict:
         # ============================================
         # 4. 组装最终指标
         # ============================================
-        latest_price = float(stock_df.iloc[-1]['收盘'])
+        latest_price = float(stock_df['收盘'].iat[-1])
 
         # PEG Ratio 计算
         pe_ratio = fundamental_data.get('pe_ratio')
@@ -2058,10 +2839,8 @@ def calculate_financial_metrics(symbol: str) -> Dict:
             # 注意：total_dividend 可能是每股分红，需要确认数据格式
             # 如果是每股分红，直接计算；如果是总分红，需要除以总股本
             dividend_yield = (total_dividend / current_price) * 100
-            print(
-                f"[INFO] Calculated dividend yield: {dividend_yield:.2f}% "
-                f"(dividend={total_dividend}, price={current_price})"
-            )
+            logger.info("Calculated dividend yield: %.2f%% (dividend=%s, price=%s)",
+                        dividend_yield, total_dividend, current_price)
 
         # R&D Intensity 计算
         rd_expense = fundamental_data.get('rd_expense')
@@ -2097,10 +2876,8 @@ def calculate_financial_metrics(symbol: str) -> Dict:
         # 生成文本上下文
         context = _format_financial_context(symbol, latest_price, metrics)
 
-        print(
-            f"[OK] Financial metrics calculated for {symbol}, "
-            f"turnover_rate={metrics.get('turnover_rate')}"
-        )
+        logger.info("Financial metrics calculated for %s, turnover_rate=%s",
+                    symbol, metrics.get('turnover_rate'))
 
         return {
             "symbol": symbol.upper(),
@@ -2110,9 +2887,7 @@ def calculate_financial_metrics(symbol: str) -> Dict:
         }
 
     except Exception as e:
-        print(f"[ERROR] Failed to calculate financial metrics for {symbol}: {e}")
-        import traceback
-        traceback.print_exc()
+        _log_exception("Failed to calculate financial metrics for %s: %s", symbol, e)
         return _build_financial_fallback(symbol, market, str(e))
 
 
@@ -2157,15 +2932,9 @@ def _calculate_momentum_metrics(stock_df: pd.DataFrame, index_df: pd.DataFrame)
 
     try:
         # 计算 RSI (14)
-        close_prices = stock_df['收盘'].values
-        delta = pd.Series(close_prices).diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        metrics['rsi_14'] = float(rsi.iloc[-1])
+        metrics['rsi_14'] = _latest_rsi(stock_df['收盘'].to_numpy(dtype=np.float64), 14)
     except Exception as e:
-        print(f"[WARN] Failed to calculate RSI: {e}")
+        logger.warning("Failed to calculate RSI: %s", e)
 
     try:
         # 计算 Beta (相对沪深300)
@@ -2184,7 +2953,7 @@ def _calculate_momentum_metrics(stock_df: pd.DataFrame, index_df: pd.DataFrame)
                     beta = covariance / index_variance
                     metrics['beta'] = float(beta)
     except Exception as e:
-        print(f"[WARN] Failed to calculate Beta: {e}")
+        logger.warning("Failed to calculate Beta: %s", e)
 
     try:
         # 计算 Volatility (年化波动率)
@@ -2193,7 +2962,7 @@ def _calculate_momentum_metrics(stock_df: pd.DataFrame, index_df: pd.DataFrame)
             volatility = returns.std() * (252 ** 0.5) * 100  # 年化
             metrics['volatility'] = float(volatility)
     except Exception as e:
-        print(f"[WARN] Failed to calculate volatility: {e}")
+        logger.warning("Failed to calculate volatility: %s", e)
 
     return metrics
 
@@ -2414,7 +3183,7 @@ def get_stock_main_business_tushare(symbol: str) -> Optional[Dict]:
         )
 
         if not _CUSTOM_TUSHARE_TOKEN:
-            print("[TUSHARE] No TUSHARE_TOKEN configured")
+            logger.info("[TUSHARE] No TUSHARE_TOKEN configured")
             return None
 
         import tushare as ts
@@ -2424,7 +3193,7 @@ def get_stock_main_business_tushare(symbol: str) -> Optional[Dict]:
         pro._DataApi__token = _CUSTOM_TUSHARE_TOKEN
         pro._DataApi__http_url = _CUSTOM_TUSHARE_URL
 
-        print(f"[TUSHARE] Fetching main_business for {symbol}...")
+        logger.info("[TUSHARE] Fetching main_business for %s...", symbol)
 
         # 标准化股票代码格式为 Tushare 格式 (如 600519.SH)
         ts_symbol = (
@@ -2454,7 +3223,7 @@ def get_stock_main_business_tushare(symbol: str) -> Optional[Dict]:
                 result["area"] = row.get("area", "")
                 result["name"] = row.get("name", "")
         except Exception as e:
-            print(f"[TUSHARE] Failed to fetch basic data: {e}")
+            logger.info("[TUSHARE] Failed to fetch basic data: %s", e)
 
         # 尝试获取公司信息 (包含主营业务)
         try:
@@ -2467,12 +3236,11 @@ def get_stock_main_business_tushare(symbol: str) -> Optional[Dict]:
                 result["main_business"] = row.get("main_business", "")
                 result["business_scope"] = row.get("business_scope", "")
         except Exception as e:
-            print(f"[TUSHARE] Failed to fetch company data: {e}")
+            logger.info("[TUSHARE] Failed to fetch company data: %s", e)
 
         # 如果还是没有，尝试从 income 接口获取业务构成
         if not result["main_business"]:
             try:
-                from datetime import datetime
                 current_year = datetime.now().year
                 income_data = pro.income(
                     ts_code=ts_symbol,
@@ -2485,19 +3253,15 @@ def get_stock_main_business_tushare(symbol: str) -> Optional[Dict]:
                         "main_business", ""
                     )
             except Exception as e:
-                print(f"[TUSHARE] Failed to fetch income data: {e}")
+                logger.info("[TUSHARE] Failed to fetch income data: %s", e)
 
-        print(
-            f"[TUSHARE] Got main_business for {symbol}: "
-            f"{result['main_business'][:100] if result['main_business'] else 'N/A'}..."
-        )
+        logger.info("[TUSHARE] Got main_business for %s: %s...",
+                    symbol, result['main_business'][:100] if result['main_business'] else 'N/A')
 
         return result if result["main_business"] or result["industry"] else None
 
     except Exception as e:
-        print(f"[ERROR] Tushare main_business fetch failed: {e}")
-        import traceback
-        traceback.print_exc()
+        _log_exception("Tushare main_business fetch failed: %s", e)
         return None
 
 
@@ -2523,11 +3287,11 @@ def get_news_titles(symbol: str, limit: int = 5) -> str:
         return "[新闻] 仅支持A股"
 
     try:
-        print(f"[INFO] Fetching news for {symbol}...")
+        logger.info("Fetching news for %s...", symbol)
 
         # 使用AkShare获取新闻标题
         news_df = _retry_akshare_call(
-            ak.stock_news_em,
+            _get_ak().stock_news_em,
             symbol=normalized_symbol,
             max_retries=None,  # 使用配置中的默认值
             timeout=None  # 使用配置中的默认值
@@ -2542,9 +3306,84 @@ def get_news_titles(symbol: str, limit: int = 5) -> str:
         # 格式化输出
         formatted = " | ".join(titles)
 
-        print(f"[OK] Found {len(titles)} news items")
+        logger.info("Found %s news items", len(titles))
         return formatted
 
     except Exception as e:
-        print(f"[WARN] Failed to fetch news for {symbol}: {e}")
+        logger.warning("Failed to fetch news for %s: %s", symbol, e)
         return "[新闻] 暂无最新新闻"
+
+
+def get_news_titles_many(symbols: List[str], limit: int = 5) -> List[Optional[str]]:
+    """并发获取多只股票的新闻标题，结果与 symbols 顺序一致"""
+    return _fetch_many(get_news_titles, symbols, limit)
+
+
+async def aget_news_titles(symbol: str, limit: int = 5) -> str:
+    """get_news_titles 的异步版本（线程池执行，不阻塞事件循环）"""
+    return await asyncio.to_thread(get_news_titles, symbol, limit)
+
+
+# ============================================
+# 批量扫描（自选股/全市场）
+# ============================================
+# 可用的单股分析项：名称 → 分析函数（均为 func(symbol)，失败时返回 None 或默认文本）
+_SCAN_ANALYSES: Mapping[str, object] = types.MappingProxyType({
+    'technical': get_stock_technical_analysis,
+    'snapshot': get_market_snapshot,
+    'news': get_news_titles,
+})
+_SCAN_TIMEOUT = 600  # 整个扫描的最长等待时间（秒）
+
+# 扫描专用线程池：线程中的任务无法强制中止，超时后仍在执行的任务会继续占用线程直到自行结束，
+# 与 _FETCH_POOL 分开后，卡住的扫描最多占满这 8 个线程，不影响其他批量接口
+_SCAN_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stock-scan")
+
+
+def scan_symbols(
+    symbols: List[str],
+    analyses: Tuple[str, ...] = ('technical',),
+    timeout: float = _SCAN_TIMEOUT
+) -> Dict[str, Dict[str, object]]:
+    """
+    并发对多只股票执行多项分析
+
+    所有 (股票, 分析项) 任务提交到 _SCAN_POOL，最多 8 个并发，
+    避免同时向数据源发出过多请求；单个任务失败或超时只影响对应结果。
+    超时后只取消尚未开始的任务，已在执行的任务会在后台跑完，结果丢弃。
+
+    Args:
+        symbols: 股票代码列表
+        analyses: 分析项，取值见 _SCAN_ANALYSES ('technical' / 'snapshot' / 'news')
+        timeout: 整个扫描的最长等待时间（秒），超时未完成的任务结果为 None
+
+    Returns:
+        {symbol: {analysis: 结果或 None}}
+    """
+    unknown = [name for name in analyses if name not in _SCAN_ANALYSES]
+    if unknown:
+        raise ValueError(f"Unknown analyses: {unknown}")
+
+    futures = {
+        _SCAN_POOL.submit(_SCAN_ANALYSES[name], symbol): (symbol, name)
+        for symbol in symbols
+        for name in analyses
+    }
+    done, not_done = wait(futures, timeout=timeout)
+
+    results: Dict[str, Dict[str, object]] = {
+        symbol: dict.fromkeys(analyses) for symbol in symbols
+    }
+    for future in done:
+        symbol, name = futures[future]
+        try:
+            results[symbol][name] = future.result()
+        except Exception as e:
+            logger.warning("Scan %s failed for %s: %s", name, symbol, e)
+
+    if not_done:
+        logger.warning("Scan timed out after %ss, %s tasks unfinished", timeout, len(not_done))
+        for future in not_done:
+            future.cancel()
+
+    return results
@@ -4,11 +4,34 @@ Baostock Financial Data Fetcher - Simplified and Tested
 经过测试的Baostock财务数据获取函数
 """
 
-import baostock as bs
+import functools
+import threading
 from datetime import datetime
 from typing import Dict, Optional
 
 
+@functools.cache
+def _get_bs():
+    """延迟导入 baostock，仅在首次查询时加载"""
+    import baostock
+    return baostock
+
+
+# baostock 全进程共用一个模块级 socket/会话，不是线程安全的：
+# 一个线程的 logout() 会中断另一个线程正在读取的查询，login → 查询 → logout 必须整体串行
+BAOSTOCK_SESSION_LOCK = threading.Lock()
+
+
+def serialize_baostock(func):
+    """装饰器：整个函数调用（含 login/logout）期间持有 BAOSTOCK_SESSION_LOCK"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with BAOSTOCK_SESSION_LOCK:
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@serialize_baostock
 def get_stock_info_baostock(symbol: str) -> Optional[Dict]:
     """
     使用Baostock获取A股基本信息
@@ -24,6 +47,8 @@ def get_stock_info_baostock(symbol: str) -> Optional[Dict]:
         }
     """
     try:
+        bs = _get_bs()
+
         # 登录
         lg = bs.login()
         if lg.error_code != '0':
@@ -130,6 +155,7 @@ def _infer_sector_from_industry(industry: str) -> str:
     return '其他'
 
 
+@serialize_baostock
 def get_financials_baostock(symbol: str) -> Optional[Dict]:
     """
     使用Baostock获取A股财务数据
@@ -151,6 +177,8 @@ def get_financials_baostock(symbol: str) -> Optional[Dict]:
         }
     """
     try:
+        bs = _get_bs()
+
         # 登录
         lg = bs.login()
         if lg.error_code != '0':
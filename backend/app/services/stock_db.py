@@ -3,12 +3,11 @@
 股票数据库管理模块
 提供A股股票信息的本地缓存和动态查询
 """
+import functools
 import json
 import os
 from typing import Dict, Optional
 
-import akshare as ak
-
 
 # 本地数据库文件路径
 _STOCK_DB_FILE = os.path.join(
@@ -26,6 +25,21 @@ def _load_local_db() -> Dict:
     return {}
 
 
+@functools.lru_cache(maxsize=1)
+def _load_local_db_cached(mtime_ns: int) -> Dict:
+    """按文件修改时间缓存解析结果：文件被 update_stock_database 重写后 mtime 变化，自动重新加载"""
+    return _load_local_db()
+
+
+def _get_local_db() -> Dict:
+    """只读查询用的本地数据库（共享对象，调用方不得修改）"""
+    try:
+        mtime_ns = os.stat(_STOCK_DB_FILE).st_mtime_ns
+    except OSError:
+        return {}
+    return _load_local_db_cached(mtime_ns)
+
+
 def _save_local_db(data: Dict):
     """保存本地股票数据库"""
     os.makedirs(os.path.dirname(_STOCK_DB_FILE), exist_ok=True)
@@ -41,6 +55,9 @@ def fetch_all_a_stocks() -> Dict:
     Returns:
         {股票代码: {name, sector, industry}}
     """
+    # 延迟导入：market_service 导入本模块时只需要本地查询，不加载 AkShare
+    import akshare as ak
+
     stock_db = {}
 
     try:
@@ -143,7 +160,7 @@ def get_stock_from_db(symbol: str) -> Optional[Dict]:
     Returns:
         {name, sector, industry} 或 None
     """
-    stock_db = _load_local_db()
+    stock_db = _get_local_db()
     code = symbol.upper().zfill(6)
 
     if code in stock_db:
@@ -163,7 +180,7 @@ def search_stocks(keyword: str, limit: int = 20) -> list:
     Returns:
         [{code, name, sector, industry}]
     """
-    stock_db = _load_local_db()
+    stock_db = _get_local_db()
     keyword = keyword.upper()
 
     results = []
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+研报文本块向量重建脚本
+切换向量模型（LOCAL_EMBEDDING_MODEL / EMBEDDING_DIM）后运行，用当前配置的模型
+重新生成 report_chunks.embedding，使已存向量与查询向量出自同一模型
+"""
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings  # noqa: E402
+from app.core.db import db_client  # noqa: E402
+from app.services.llm_service import create_embedding  # noqa: E402
+
+
+def reembed_report_chunks(report_id=None, only_missing=False, batch_size=100):
+    """按 id 顺序分批重建向量，返回 (成功数, 失败数)"""
+    done = failed = 0
+    last_id = None
+    while True:
+        query = db_client.table("report_chunks").select("id, content").order("id").limit(batch_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        if report_id:
+            query = query.eq("report_id", report_id)
+        if only_missing:
+            query = query.is_("embedding", "null")
+        rows = query.execute().data or []
+
+        for row in rows:
+            embedding = create_embedding(row["content"])
+            if embedding is None:
+                failed += 1
+                continue
+            db_client.table("report_chunks").update({"embedding": embedding}).eq("id", row["id"]).execute()
+            done += 1
+
+        if len(rows) < batch_size:
+            return done, failed
+        last_id = rows[-1]["id"]
+        print(f"已处理 {done + failed} 个文本块 (失败 {failed})")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='用当前向量模型重建 report_chunks.embedding')
+    parser.add_argument('--report-id', type=str, help='只处理指定研报')
+    parser.add_argument('--only-missing', action='store_true', help='只处理 embedding 为空的文本块')
+    parser.add_argument('--batch-size', type=int, default=100, help='每批读取的文本块数量')
+
+    args = parser.parse_args()
+
+    model = settings.LOCAL_EMBEDDING_MODEL or "DashScope text-embedding-v1"
+    print(f"向量模型: {model} (EMBEDDING_DIM={settings.EMBEDDING_DIM})")
+
+    done, failed = reembed_report_chunks(args.report_id, args.only_missing, args.batch_size)
+    print(f"完成: 成功 {done}, 失败 {failed}")
+    if failed:
+        sys.exit(1)
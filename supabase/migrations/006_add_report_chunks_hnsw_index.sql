@@ -0,0 +1,49 @@
+-- Add pgvector HNSW index for report_chunks embeddings and rewrite match_documents
+-- Exact KNN over report_chunks is O(N) per chat turn; HNSW graph search is ~O(log N)
+
+-- Enable pgvector
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- Embedding column (DashScope text-embedding-v1 = 1536 维，需与 EMBEDDING_DIM 一致)
+ALTER TABLE report_chunks
+ADD COLUMN IF NOT EXISTS embedding vector(1536);
+
+-- HNSW index (cosine distance)
+CREATE INDEX IF NOT EXISTS report_chunks_embedding_hnsw
+    ON report_chunks
+    USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+COMMENT ON COLUMN report_chunks.embedding IS '文本块向量（HNSW 索引，用于 RAG 检索）';
+
+-- Vector search RPC used by llm_service (db.rpc("match_documents", ...))
+-- hnsw.ef_search 在函数级别设置，只影响本次查询
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    filter_report_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    report_id UUID,
+    content TEXT,
+    page_number INTEGER,
+    similarity FLOAT
+)
+LANGUAGE sql STABLE
+SET hnsw.ef_search = 40
+AS $$
+    SELECT
+        report_chunks.id,
+        report_chunks.report_id,
+        report_chunks.content,
+        report_chunks.page_number,
+        1 - (report_chunks.embedding <=> query_embedding) AS similarity
+    FROM report_chunks
+    WHERE (filter_report_id IS NULL OR report_chunks.report_id = filter_report_id)
+      AND report_chunks.embedding IS NOT NULL
+      AND 1 - (report_chunks.embedding <=> query_embedding) > match_threshold
+    ORDER BY report_chunks.embedding <=> query_embedding
+    LIMIT match_count;
+$$;
@@ -0,0 +1,59 @@
+-- Quantize report_chunks embeddings to halfvec for the ANN index
+-- halfvec (FP16) halves index size and bandwidth per HNSW hop; FP32 embedding is kept for reranking
+
+-- Quantized copy, kept in sync with embedding automatically (requires pgvector >= 0.7)
+ALTER TABLE report_chunks
+ADD COLUMN IF NOT EXISTS embedding_q halfvec(1536)
+    GENERATED ALWAYS AS (embedding::halfvec(1536)) STORED;
+
+COMMENT ON COLUMN report_chunks.embedding_q IS '文本块向量 FP16 量化副本（HNSW 索引，用于候选召回）';
+
+-- HNSW index on the quantized column replaces the FP32 index
+CREATE INDEX IF NOT EXISTS report_chunks_embedding_q_hnsw
+    ON report_chunks
+    USING hnsw (embedding_q halfvec_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+DROP INDEX IF EXISTS report_chunks_embedding_hnsw;
+
+-- match_documents: ANN prefilter on embedding_q, then exact rerank on FP32 embedding
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    filter_report_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    report_id UUID,
+    content TEXT,
+    page_number INTEGER,
+    similarity FLOAT
+)
+LANGUAGE sql STABLE
+SET hnsw.ef_search = 40
+AS $$
+    WITH candidates AS (
+        SELECT
+            report_chunks.id,
+            report_chunks.report_id,
+            report_chunks.content,
+            report_chunks.page_number,
+            report_chunks.embedding
+        FROM report_chunks
+        WHERE (filter_report_id IS NULL OR report_chunks.report_id = filter_report_id)
+          AND report_chunks.embedding_q IS NOT NULL
+        ORDER BY report_chunks.embedding_q <=> query_embedding::halfvec(1536)
+        LIMIT match_count * 4
+    )
+    SELECT
+        candidates.id,
+        candidates.report_id,
+        candidates.content,
+        candidates.page_number,
+        1 - (candidates.embedding <=> query_embedding) AS similarity
+    FROM candidates
+    WHERE 1 - (candidates.embedding <=> query_embedding) > match_threshold
+    ORDER BY candidates.embedding <=> query_embedding
+    LIMIT match_count;
+$$;
@@ -0,0 +1,58 @@
+-- Switch report_chunks vector search to inner-product distance
+-- Embeddings are L2-normalized (llm_service.create_embedding), so cosine ≡ inner product
+-- and <#> skips the per-row norm computation
+
+-- Normalize vectors stored before normalization was done at embed time (requires pgvector >= 0.7)
+UPDATE report_chunks
+SET embedding = l2_normalize(embedding)
+WHERE embedding IS NOT NULL;
+
+-- Rebuild the HNSW index with inner-product ops
+DROP INDEX IF EXISTS report_chunks_embedding_q_hnsw;
+
+CREATE INDEX IF NOT EXISTS report_chunks_embedding_q_ip_hnsw
+    ON report_chunks
+    USING hnsw (embedding_q halfvec_ip_ops)
+    WITH (m = 16, ef_construction = 64);
+
+-- match_documents: <#> returns the negative inner product, so similarity = -(a <#> b)
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    filter_report_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    report_id UUID,
+    content TEXT,
+    page_number INTEGER,
+    similarity FLOAT
+)
+LANGUAGE sql STABLE
+SET hnsw.ef_search = 40
+AS $$
+    WITH candidates AS (
+        SELECT
+            report_chunks.id,
+            report_chunks.report_id,
+            report_chunks.content,
+            report_chunks.page_number,
+            report_chunks.embedding
+        FROM report_chunks
+        WHERE (filter_report_id IS NULL OR report_chunks.report_id = filter_report_id)
+          AND report_chunks.embedding_q IS NOT NULL
+        ORDER BY report_chunks.embedding_q <#> query_embedding::halfvec(1536)
+        LIMIT match_count * 4
+    )
+    SELECT
+        candidates.id,
+        candidates.report_id,
+        candidates.content,
+        candidates.page_number,
+        -(candidates.embedding <#> query_embedding) AS similarity
+    FROM candidates
+    WHERE -(candidates.embedding <#> query_embedding) > match_threshold
+    ORDER BY candidates.embedding <#> query_embedding
+    LIMIT match_count;
+$$;
@@ -0,0 +1,66 @@
+-- match_documents: exact search when filtering by report
+-- HNSW returns its top candidates before filter_report_id is applied; for a single report in a
+-- large table most candidates belong to other reports and the RAG query gets few or no chunks.
+-- With a report filter, scan that report's chunks exactly via idx_report_chunks_report_id
+-- (tens to hundreds of rows); the HNSW prefilter is only used for unfiltered searches.
+
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding vector(1536),
+    match_threshold FLOAT,
+    match_count INT,
+    filter_report_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    report_id UUID,
+    content TEXT,
+    page_number INTEGER,
+    similarity FLOAT
+)
+LANGUAGE plpgsql STABLE
+SET hnsw.ef_search = 40
+AS $$
+BEGIN
+    IF filter_report_id IS NOT NULL THEN
+        -- 单份研报：精确计算该报告全部文本块（FP32 embedding 上没有 HNSW 索引，不会走 ANN）
+        RETURN QUERY
+        SELECT
+            rc.id,
+            rc.report_id,
+            rc.content,
+            rc.page_number,
+            -(rc.embedding <#> query_embedding)::FLOAT AS similarity
+        FROM report_chunks rc
+        WHERE rc.report_id = filter_report_id
+          AND rc.embedding IS NOT NULL
+          AND -(rc.embedding <#> query_embedding) > match_threshold
+        ORDER BY rc.embedding <#> query_embedding
+        LIMIT match_count;
+    ELSE
+        -- 全库检索：HNSW (embedding_q) 召回候选，再用 FP32 embedding 精排
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT
+                rc.id,
+                rc.report_id,
+                rc.content,
+                rc.page_number,
+                rc.embedding
+            FROM report_chunks rc
+            WHERE rc.embedding_q IS NOT NULL
+            ORDER BY rc.embedding_q <#> query_embedding::halfvec(1536)
+            LIMIT match_count * 4
+        )
+        SELECT
+            c.id,
+            c.report_id,
+            c.content,
+            c.page_number,
+            -(c.embedding <#> query_embedding)::FLOAT AS similarity
+        FROM candidates c
+        WHERE -(c.embedding <#> query_embedding) > match_threshold
+        ORDER BY c.embedding <#> query_embedding
+        LIMIT match_count;
+    END IF;
+END;
+$$;
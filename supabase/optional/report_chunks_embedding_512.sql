@@ -0,0 +1,87 @@
+-- Switch report_chunks to 512-dim embeddings (e.g. LOCAL_EMBEDDING_MODEL=BAAI/bge-small-zh-v1.5)
+-- Not a numbered migration: run manually after migrations 001-009, only when using a 512-dim model.
+--
+-- Existing 1536-dim vectors cannot be cast to another dimension and are cleared here.
+-- Afterwards set EMBEDDING_DIM=512, restart the backend and run
+--   python backend/scripts/reembed_report_chunks.py
+-- Chat returns no context for a report until its chunks have been re-embedded.
+
+-- Quantized column and its index depend on embedding; drop them before changing the type
+DROP INDEX IF EXISTS report_chunks_embedding_q_ip_hnsw;
+ALTER TABLE report_chunks DROP COLUMN IF EXISTS embedding_q;
+
+UPDATE report_chunks SET embedding = NULL WHERE embedding IS NOT NULL;
+ALTER TABLE report_chunks ALTER COLUMN embedding TYPE vector(512);
+
+ALTER TABLE report_chunks
+ADD COLUMN embedding_q halfvec(512)
+    GENERATED ALWAYS AS (embedding::halfvec(512)) STORED;
+
+COMMENT ON COLUMN report_chunks.embedding_q IS '文本块向量 FP16 量化副本（HNSW 索引，用于候选召回）';
+
+CREATE INDEX IF NOT EXISTS report_chunks_embedding_q_ip_hnsw
+    ON report_chunks
+    USING hnsw (embedding_q halfvec_ip_ops)
+    WITH (m = 16, ef_construction = 64);
+
+-- match_documents with a 512-dim query (same logic as migration 009)
+DROP FUNCTION IF EXISTS match_documents(vector(1536), FLOAT, INT, UUID);
+
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding vector(512),
+    match_threshold FLOAT,
+    match_count INT,
+    filter_report_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    report_id UUID,
+    content TEXT,
+    page_number INTEGER,
+    similarity FLOAT
+)
+LANGUAGE plpgsql STABLE
+SET hnsw.ef_search = 40
+AS $$
+BEGIN
+    IF filter_report_id IS NOT NULL THEN
+        RETURN QUERY
+        SELECT
+            rc.id,
+            rc.report_id,
+            rc.content,
+            rc.page_number,
+            -(rc.embedding <#> query_embedding)::FLOAT AS similarity
+        FROM report_chunks rc
+        WHERE rc.report_id = filter_report_id
+          AND rc.embedding IS NOT NULL
+          AND -(rc.embedding <#> query_embedding) > match_threshold
+        ORDER BY rc.embedding <#> query_embedding
+        LIMIT match_count;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT
+                rc.id,
+                rc.report_id,
+                rc.content,
+                rc.page_number,
+                rc.embedding
+            FROM report_chunks rc
+            WHERE rc.embedding_q IS NOT NULL
+            ORDER BY rc.embedding_q <#> query_embedding::halfvec(512)
+            LIMIT match_count * 4
+        )
+        SELECT
+            c.id,
+            c.report_id,
+            c.content,
+            c.page_number,
+            -(c.embedding <#> query_embedding)::FLOAT AS similarity
+        FROM candidates c
+        WHERE -(c.embedding <#> query_embedding) > match_threshold
+        ORDER BY c.embedding <#> query_embedding
+        LIMIT match_count;
+    END IF;
+END;
+$$;